@@ -0,0 +1,65 @@
+print("# ======== pydecorium: Benchmark of the numpy and pandas exports ======== #")
+
+# The exports build the columns of the arrays from the typed columns of the
+# record stores, instead of materializing one list and one dictionary per record.
+
+import statistics
+import threading
+import time
+
+from pydecorium.decorators import FunctionProfiler, Timer, Memory
+
+
+def function():
+    pass
+
+
+number_of_calls = 250_000
+number_of_threads = 4
+
+function_profiler = FunctionProfiler(profiler_utils=[Timer, Memory])
+profiled_function = function_profiler(function)
+
+
+def run():
+    for _ in range(number_of_calls):
+        profiled_function()
+
+
+threads = [threading.Thread(target=run) for _ in range(number_of_threads)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+
+print(f"\n\nMean runtime of {number_of_calls * number_of_threads} records ({number_of_threads} threads)")
+print("------------------------")
+
+start = time.perf_counter()
+mean = statistics.fmean(record[2][0] for record in function_profiler.profiled_data)
+print(f"{'profiled_data loop':>30} : {time.perf_counter() - start:8.3f} s - mean runtime {mean:.0f} ns")
+
+start = time.perf_counter()
+records = function_profiler.to_numpy()
+mean = records["runtime"].mean()
+print(f"{'to_numpy':>30} : {time.perf_counter() - start:8.3f} s - mean runtime {mean:.0f} ns")
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+if pandas is not None:
+    start = time.perf_counter()
+    dataframe = function_profiler.to_dataframe()
+    mean = dataframe.groupby("function", observed=True)["runtime"].mean().iloc[0]
+    print(f"{'to_dataframe + groupby':>30} : {time.perf_counter() - start:8.3f} s - mean runtime {mean:.0f} ns")
+
+start = time.perf_counter()
+summary = function_profiler.summarize_records()
+mean = summary["function"]["runtime"]["mean"]
+print(f"{'summarize_records':>30} : {time.perf_counter() - start:8.3f} s - mean runtime {mean:.0f} ns")
+
+# Expected output:
+# ----------------
+# The exports are more than 10 times faster than the loop over the profiled
+# data, since no Python object is created per record.
@@ -0,0 +1,47 @@
+print("# ======== pydecorium: Benchmark of the FunctionProfiler with asyncio ======== #")
+
+# The coroutine functions are profiled until the end of their execution, even
+# when thousands of tasks are interleaved on the same event loop.
+
+import asyncio
+import time
+
+from pydecorium.decorators import FunctionProfiler, Timer
+
+
+number_of_tasks = 10_000
+sleep_duration = 0.1
+
+function_profiler = FunctionProfiler(profiler_utils=[Timer], report_format="statistics")
+
+
+async def handler(duration):
+    await asyncio.sleep(duration)
+    return duration
+
+profiled_handler = function_profiler(handler)
+
+
+async def run(coroutine_function):
+    tic = time.perf_counter()
+    await asyncio.gather(*(coroutine_function(sleep_duration) for _ in range(number_of_tasks)))
+    return time.perf_counter() - tic
+
+
+print(f"\n\nRuntime of {number_of_tasks} concurrent tasks sleeping {sleep_duration}s")
+print("------------------------")
+
+runtime = asyncio.run(run(handler))
+print(f"   not profiled : {runtime:6.3f}s")
+runtime = asyncio.run(run(profiled_handler))
+print(f"       profiled : {runtime:6.3f}s")
+
+print(f"\n\nReport of the profiled tasks")
+print("------------------------")
+
+print(function_profiler)
+
+# Expected output:
+# ----------------
+# The 10 000 tasks are reported and the minimum runtime of a task is at least
+# the sleep duration (0.1s): the whole execution of each coroutine is measured.
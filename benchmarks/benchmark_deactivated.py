@@ -0,0 +1,47 @@
+print("# ======== pydecorium: Benchmark of the deactivated decorators ======== #")
+
+# A deactivated decorator still checks its activation status at each call. The
+# rebind mode and the compile-out switch remove the wrapper entirely.
+
+import timeit
+
+from pydecorium import Decorator
+from pydecorium.decorators import FunctionProfiler, Timer
+
+
+def function():
+    pass
+
+
+number_of_calls = 1_000_000
+
+print(f"\n\nRuntime per call ({number_of_calls} calls of an empty function)")
+print("------------------------")
+
+def measure(name):
+    runtime = min(timeit.repeat("function()", globals=globals(), number=number_of_calls, repeat=3))
+    print(f"{name:>35} : {runtime / number_of_calls * 1e9:8.1f} ns per call")
+
+original_function = function
+measure("not decorated")
+
+function_profiler = FunctionProfiler(Timer, activated=False)
+function = function_profiler(original_function)
+measure("deactivated")
+
+# The rebind mode replaces the global name "function" by the original function
+function_profiler = FunctionProfiler(Timer, activated=False, rebind=True)
+function = function_profiler(original_function)
+measure("deactivated, rebind=True")
+function_profiler.activated = True
+measure("activated again, rebind=True")
+
+Decorator.compiled_out = True
+function = FunctionProfiler(Timer)(original_function)
+measure("Decorator.compiled_out = True")
+Decorator.compiled_out = False
+
+# Expected output:
+# ----------------
+# The deactivated decorator costs an extra call per call, the rebound and the
+# compiled-out functions run as fast as the function not decorated.
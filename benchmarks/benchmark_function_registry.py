@@ -0,0 +1,31 @@
+print("# ======== pydecorium: Benchmark of the FunctionProfiler function registry ======== #")
+
+# The overhead per call of a FunctionProfiler must not depend on the number of
+# functions decorated by the same profiler.
+
+import timeit
+
+from pydecorium.decorators import FunctionProfiler
+
+
+def make_function():
+    def function():
+        pass
+    return function
+
+
+number_of_calls = 100_000
+
+print(f"\n\nOverhead per call ({number_of_calls} calls of the last decorated function)")
+print("------------------------")
+
+for number_of_functions in [1, 10, 100, 1_000, 10_000]:
+    function_profiler = FunctionProfiler()
+    decorated_functions = [function_profiler(make_function()) for _ in range(number_of_functions)]
+    last_function = decorated_functions[-1]
+    runtime = min(timeit.repeat(last_function, number=number_of_calls, repeat=3))
+    print(f"{number_of_functions:>6} registered functions : {runtime / number_of_calls * 1e9:8.1f} ns per call")
+
+# Expected output:
+# ----------------
+# The overhead per call is the same for 1 and 10 000 registered functions.
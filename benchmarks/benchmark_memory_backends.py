@@ -0,0 +1,54 @@
+print("# ======== pydecorium: Benchmark of the Memory backends ======== #")
+
+# The overhead per call of the Memory profiler utils depends on the backend
+# reading the resident set size of the process and on the sampling.
+
+import timeit
+
+import psutil
+
+from pydecorium.decorators import FunctionProfiler, Memory
+
+
+class UncachedPsutilMemory(Memory):
+    # Reference: a new psutil.Process() is created at each measure
+    def pre_execute(self, func, *args, **kwargs):
+        return psutil.Process().memory_info().rss
+
+    def post_execute(self, token, func, *args, **kwargs):
+        return psutil.Process().memory_info().rss - token
+
+
+def function():
+    pass
+
+
+number_of_calls = 100_000
+
+configurations = [
+    ("no profiler utils", None),
+    ("psutil (uncached)", UncachedPsutilMemory(backend="psutil")),
+    ("psutil", Memory(backend="psutil")),
+]
+try:
+    configurations.append(("statm", Memory(backend="statm")))
+    configurations.append(("statm, sample_every=10", Memory(backend="statm", sample_every=10)))
+    configurations.append(("statm, sample_every=100", Memory(backend="statm", sample_every=100)))
+except ValueError: # /proc/self/statm is not available
+    configurations.append(("psutil, sample_every=10", Memory(backend="psutil", sample_every=10)))
+    configurations.append(("psutil, sample_every=100", Memory(backend="psutil", sample_every=100)))
+
+print(f"\n\nOverhead per call ({number_of_calls} calls of an empty function)")
+print("------------------------")
+
+for name, memory in configurations:
+    function_profiler = FunctionProfiler(profiler_utils=memory, aggregate_only=True)
+    profiled_function = function_profiler(function)
+    runtime = min(timeit.repeat(profiled_function, number=number_of_calls, repeat=3))
+    print(f"{name:>25} : {runtime / number_of_calls * 1e9:8.1f} ns per call")
+
+# Expected output:
+# ----------------
+# The cached psutil handle is several times faster than the uncached one, and
+# the statm backend is faster than psutil. The sampling divides the cost of the
+# measure by the sampling period.
@@ -0,0 +1,38 @@
+print("# ======== pydecorium: Benchmark of the OpenMetrics exposition ======== #")
+
+# The metrics are generated from the aggregates updated at each call, so the
+# cost of a scrape depends on the number of functions, not on the number of calls.
+
+import timeit
+
+from pydecorium.decorators import FunctionProfiler, Timer, Memory
+
+
+def make_function(index):
+    def function():
+        pass
+    function.__name__ = f"function_{index}"
+    function.__qualname__ = f"function_{index}"
+    return function
+
+
+number_of_functions = 50
+number_of_scrapes = 20
+
+print(f"\n\nRuntime of a scrape ({number_of_functions} functions, Timer and Memory connected)")
+print("------------------------")
+
+for number_of_calls in [1_000, 10_000, 100_000]:
+    function_profiler = FunctionProfiler(profiler_utils=[Timer, Memory], aggregate_only=True)
+    profiled_functions = [function_profiler(make_function(index)) for index in range(number_of_functions)]
+    for _ in range(number_of_calls // number_of_functions):
+        for profiled_function in profiled_functions:
+            profiled_function()
+    runtime = timeit.timeit(function_profiler.generate_openmetrics, number=number_of_scrapes)
+    size = len(function_profiler.generate_openmetrics())
+    print(f"{number_of_calls:>12} calls : {runtime / number_of_scrapes * 1e3:8.2f} ms per scrape - {size / 1e3:.1f} kB")
+
+# Expected output:
+# ----------------
+# The runtime of a scrape stays nearly constant when the number of calls grows,
+# it only grows with the number of buckets filled in the quantile sketches.
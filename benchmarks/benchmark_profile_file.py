@@ -0,0 +1,59 @@
+print("# ======== pydecorium: Benchmark of the binary profile files ======== #")
+
+# The records are moved to the profile file while profiling, so the memory used
+# by the records stays bounded. The file is read back through a memory mapping.
+
+import os
+import tempfile
+import time
+import timeit
+
+from pydecorium.decorators import FunctionProfiler, Timer, Memory, ProfileReader
+
+
+def function():
+    pass
+
+
+number_of_calls = 1_000_000
+file_path = os.path.join(tempfile.mkdtemp(), "profile.pdprof")
+
+print(f"\n\nOverhead per call ({number_of_calls} calls of an empty function, Timer and Memory connected)")
+print("------------------------")
+
+function_profiler = FunctionProfiler(profiler_utils=[Timer, Memory])
+profiled_function = function_profiler(function)
+runtime = timeit.timeit(profiled_function, number=number_of_calls)
+print(f"{'records in memory':>30} : {runtime / number_of_calls * 1e9:8.1f} ns per call - {len(function_profiler.profiled_data)} records in memory")
+
+function_profiler = FunctionProfiler(profiler_utils=[Timer, Memory])
+profiled_function = function_profiler(function)
+function_profiler.open_profile_file(file_path)
+runtime = timeit.timeit(profiled_function, number=number_of_calls)
+function_profiler.close_profile_file()
+print(f"{'records in the profile file':>30} : {runtime / number_of_calls * 1e9:8.1f} ns per call - {len(function_profiler.profiled_data)} records in memory")
+print(f"{'':>30}   file size : {os.path.getsize(file_path) / 1e6:.1f} MB")
+
+print("\n\nReading the profile file")
+print("------------------------")
+
+with ProfileReader(file_path) as reader:
+    start = time.perf_counter()
+    total = sum(row[2] for row in reader.iter_rows())
+    print(f"{'iter_rows':>30} : {time.perf_counter() - start:8.3f} s - total runtime {total} ns")
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    if numpy is not None:
+        start = time.perf_counter()
+        records = reader.to_numpy()
+        total = int(records["runtime"].sum())
+        print(f"{'to_numpy':>30} : {time.perf_counter() - start:8.3f} s - total runtime {total} ns")
+        del records
+
+# Expected output:
+# ----------------
+# The overhead per call is close to the one of the records kept in memory, the
+# memory holds at most one chunk of records per thread, and the numpy view sums
+# a column of the file without copying the records.
@@ -0,0 +1,46 @@
+print("# ======== pydecorium: Benchmark of the FunctionProfiler report generation ======== #")
+
+# The generation of the reports must be linear in the number of records.
+
+import time
+
+from pydecorium.decorators import FunctionProfiler, Timer, Memory
+
+number_of_records = 1_000_000
+
+print(f"\n\nProfiling {number_of_records} calls")
+print("------------------------")
+
+# The call tree is tracked, so the "tree" report can be generated too
+function_profiler = FunctionProfiler(profiler_utils=[Timer, Memory], track_call_tree=True)
+
+@function_profiler
+def my_function():
+    pass
+
+@function_profiler
+def my_second_function():
+    pass
+
+tic = time.perf_counter()
+for _ in range(number_of_records // 2):
+    my_function()
+    my_second_function()
+print(f"Profiling time : {time.perf_counter() - tic:.2f}s")
+
+
+
+
+print(f"\n\nGenerating the reports of {number_of_records} records")
+print("------------------------")
+
+for report_format in FunctionProfiler.correct_report_format:
+    function_profiler.report_format = report_format
+    tic = time.perf_counter()
+    report = function_profiler.generate_report()
+    print(f"{report_format:>12} : {time.perf_counter() - tic:6.2f}s - {len(report) / 1024**2:6.1f} MB")
+
+# Expected output:
+# ----------------
+# The "datetime" and "function" reports take a few seconds for one million records.
+# The other reports only depend on the number of functions.
@@ -0,0 +1,40 @@
+print("# ======== pydecorium: Benchmark of the sampling policies ======== #")
+
+# The calls which are not selected by the sampling policy are only counted, so
+# the overhead per call decreases with the sampling rate.
+
+import timeit
+
+from pydecorium.decorators import FunctionProfiler, Timer, Memory, EveryNSampling, ProbabilisticSampling, AdaptiveSampling
+
+
+def function():
+    pass
+
+
+number_of_calls = 100_000
+
+configurations = [
+    ("no sampling", None),
+    ("EveryNSampling(10)", EveryNSampling(10)),
+    ("EveryNSampling(100)", EveryNSampling(100)),
+    ("ProbabilisticSampling(0.01)", ProbabilisticSampling(0.01)),
+    ("AdaptiveSampling(0.01)", AdaptiveSampling(max_overhead=0.01)),
+]
+
+print(f"\n\nOverhead per call ({number_of_calls} calls of an empty function, Timer and Memory connected)")
+print("------------------------")
+
+print(f"{'not profiled':>30} : {min(timeit.repeat(function, number=number_of_calls, repeat=3)) / number_of_calls * 1e9:8.1f} ns per call")
+for name, sampling in configurations:
+    function_profiler = FunctionProfiler(profiler_utils=[Timer, Memory], report_format="cumulative", aggregate_only=True, sampling=sampling)
+    profiled_function = function_profiler(function)
+    runtime = min(timeit.repeat(profiled_function, number=number_of_calls, repeat=3))
+    print(f"{name:>30} : {runtime / number_of_calls * 1e9:8.1f} ns per call")
+    print(f"{'':>30}   {function_profiler.generate_report()}", end="")
+
+# Expected output:
+# ----------------
+# The overhead of the unsampled calls is a fraction of the overhead of the
+# profiled calls, and the cumulative reports estimate the runtime of all the
+# calls from the profiled ones.
@@ -0,0 +1,42 @@
+print("# ======== pydecorium: Benchmark of the sinks ======== #")
+
+# The profiled calls only append their record to the queue of the sinks, the
+# records are formatted and written by a background thread.
+
+import os
+import tempfile
+import timeit
+
+from pydecorium.decorators import FunctionProfiler, Timer, JSONLinesSink, SQLiteSink
+
+
+def function():
+    pass
+
+
+number_of_calls = 200_000
+directory = tempfile.mkdtemp()
+
+print(f"\n\nOverhead per call ({number_of_calls} calls of an empty function, Timer connected, aggregate_only)")
+print("------------------------")
+
+function_profiler = FunctionProfiler(profiler_utils=[Timer], aggregate_only=True)
+profiled_function = function_profiler(function)
+runtime = timeit.timeit(profiled_function, number=number_of_calls)
+print(f"{'no sink':>30} : {runtime / number_of_calls * 1e9:8.1f} ns per call")
+
+for name, sink in [("JSONLinesSink", JSONLinesSink(os.path.join(directory, "records.jsonl"))), ("SQLiteSink", SQLiteSink(os.path.join(directory, "records.db")))]:
+    for overflow in ["drop", "block"]:
+        function_profiler = FunctionProfiler(profiler_utils=[Timer], aggregate_only=True)
+        profiled_function = function_profiler(function)
+        function_profiler.connect_sinks(sink, max_queue_size=50_000, overflow=overflow)
+        runtime = timeit.timeit(profiled_function, number=number_of_calls)
+        statistics = function_profiler.disconnect_sinks()
+        print(f"{name + ' (' + overflow + ')':>30} : {runtime / number_of_calls * 1e9:8.1f} ns per call - {statistics['written']} written - {statistics['dropped']} dropped")
+
+# Expected output:
+# ----------------
+# The profiled calls do no formatting and no I/O: the extra overhead per call
+# comes from the background thread sharing the GIL while it writes the records.
+# With overflow="drop", some records can be dropped when the sink is slower than
+# the profiled calls, with overflow="block" no record is dropped.
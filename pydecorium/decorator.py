@@ -1,5 +1,9 @@
 import re
 import functools
+import inspect
+import os
+import sys
+import weakref
 
 class Decorator(object):
     """
@@ -15,9 +19,29 @@ class Decorator(object):
             post_execute()
             return outputs
 
+    The coroutine functions (``async def``) are decorated by an ``async`` function which awaits the ``_async_wrapper`` method.
+    The subclasses can implement it to await the coroutine between their pre-execution and post-execution:
+
+    .. code-block:: python
+
+        async def _async_wrapper(self, func, *args, **kwargs):
+            pre_execute()
+            outputs = await func(*args, **kwargs)
+            post_execute()
+            return outputs
+
     The subclasses can access several attributes about the function to decorate:
     
     - function_signature_name: The signature name of the function. The signature name can be set using the signature_name_format attribute.
+
+    The signature name format is compiled once, when it is set, into a ``str.format`` template.
+    The signature name of each function is then cached (weakly keyed by the function) until the format changes.
+
+    When a decorator is deactivated, the decorated functions still check the activation status at each call before calling the original function.
+    Two modes remove this cost:
+
+    - The global "compile-out" switch ``Decorator.compiled_out`` (initialized from the environment variable ``PYDECORIUM_COMPILE_OUT``): while it is True, decorating a function returns the function itself. The functions decorated while it is True are never profiled, even if the switch is set to False later.
+    - The ``rebind`` option: when the decorator is deactivated, the decorated functions are replaced by the original functions in their module or class (see :meth:`_rebind_functions`), and the decorated functions are put back when the decorator is activated again.
     
     Parameters
     ----------
@@ -28,16 +52,27 @@ class Decorator(object):
     signature_name_format: str, optional
         The format of the signature name to display. (see :meth:`set_signature_name_format`)
         Default value is "{name}"
+
+    rebind: bool, optional
+        If True, the decorated functions are replaced by the original functions in their module or class while the decorator is deactivated.
+        Default value is False
     """
     
     correct_signature_name_format_args = ["name", "module", "qualname"]
+    _signature_name_pattern = re.compile(r'(?<!\\)\{(.*?)(?<!\\)\}')
+    compiled_out: bool = os.environ.get("PYDECORIUM_COMPILE_OUT", "").lower() not in ("", "0", "false", "no")
 
     def __init__(self, *, 
         activated: bool = True,
         signature_name_format: str = "{name}",
+        rebind: bool = False,
         ):
-        self._activated = True
-        self._signature_name_format = signature_name_format
+        if not isinstance(rebind, bool):
+            raise TypeError("Parameter rebind is not a booleen.")
+        self._rebind = rebind
+        self._decorated_functions = []
+        self.activated = activated
+        self._set_compiled_signature_name_format(signature_name_format)
 
     # Properties getters and setters
     @property
@@ -61,7 +96,16 @@ class Decorator(object):
     def activated(self, activated: bool):
         if not isinstance(activated, bool):
             raise TypeError("Parameter activated is not a booleen.")
+        if self._rebind and activated != getattr(self, "_activated", activated):
+            self._rebind_functions(activated)
         self._activated = activated
+
+    @property
+    def rebind(self) -> bool:
+        """
+        Getter for the rebind mode: if True, the decorated functions are replaced by the original functions while the decorator is deactivated.
+        """
+        return self._rebind
     
     @property
     def signature_name_format(self) -> str:
@@ -86,7 +130,50 @@ class Decorator(object):
     def signature_name_format(self, signature_name_format: str):
         if not self.check_signature_name_format(signature_name_format):
             raise ValueError("The given name format is not correct.")
+        self._set_compiled_signature_name_format(signature_name_format)
+
+    def _set_compiled_signature_name_format(self, signature_name_format: str) -> None:
+        """
+        Sets the signature name format, compiles it and invalidates the cache of the signature names.
+
+        Parameters
+        ----------
+        signature_name_format: str
+            The format of the signature name to display.
+        """
         self._signature_name_format = signature_name_format
+        self._signature_name_template = self._compile_signature_name_format(signature_name_format)
+        self._signature_name_cache = weakref.WeakKeyDictionary()
+
+    def _compile_signature_name_format(self, signature_name_format: str) -> str:
+        """
+        Compiles a signature name format into a ``str.format`` template.
+
+        The valid arguments become replacement fields, the unknown arguments and the escaped brackets become literal text.
+        For example, "{qualname} \\{other}" becomes "{qualname} {{other}}".
+
+        Parameters
+        ----------
+        signature_name_format: str
+            The format of the signature name to compile.
+
+        Returns
+        -------
+        template: str
+            The ``str.format`` template with the fields "name", "module" and "qualname".
+        """
+        def literal(text: str) -> str:
+            text = text.replace(r'\{', '{').replace(r'\}', '}')
+            return text.replace('{', '{{').replace('}', '}}')
+        template = []
+        for index, part in enumerate(self._signature_name_pattern.split(signature_name_format)):
+            if index % 2 == 0:
+                template.append(literal(part))
+            elif part in self.correct_signature_name_format_args:
+                template.append(f"{{{part}}}")
+            else:
+                template.append(literal(f"{{{part}}}")) # Keep the key if not valid
+        return "".join(template)
     
     # Decorator activation and deactivation (other way around)
     def is_activated(self) -> bool:
@@ -254,6 +341,9 @@ class Decorator(object):
         """
         Get the signature name of the function.
 
+        The signature name is computed with the compiled signature name format and cached until the format changes.
+        The cache is weakly keyed by the function, so it does not keep the function alive.
+
         Parameters
         ----------
         func: function
@@ -264,21 +354,20 @@ class Decorator(object):
         signature_name: str
             The signature name of the function.
         """
-        pattern = r'(?<!\\)\{(.*?)(?<!\\)\}'
-        # Replace the format with the function attributes
-        def replace(match, format_args: dict) -> str:
-            key = match.group(1)
-            return format_args.get(key, f"{{{key}}}") # Return the key if not found
-        # Get the function attributes
-        format_args = {
-            "name": func.__name__,
-            "module": func.__module__,
-            "qualname": func.__qualname__,
-        }
-        # Replace the format with the function attributes
-        formatted_name = re.sub(pattern, lambda match: replace(match, format_args), self.signature_name_format)
-        formatted_name = formatted_name.replace(r'\{', '{').replace(r'\}', '}')
+        try:
+            return self._signature_name_cache[func]
+        except KeyError:
+            pass
+        except TypeError: # The function can't be weakly referenced
+            return self._format_signature_name(func)
+        formatted_name = self._signature_name_cache[func] = self._format_signature_name(func)
         return formatted_name
+
+    def _format_signature_name(self, func) -> str:
+        """
+        Formats the signature name of the function with the compiled signature name format.
+        """
+        return self._signature_name_template.format(name=func.__name__, module=func.__module__, qualname=func.__qualname__)
         
     def _check_accolades(self, signature_name_format: str) -> bool:
         """
@@ -338,8 +427,7 @@ class Decorator(object):
             raise TypeError("Parameter signature_name_format is not a string.")
         if not self._check_accolades(signature_name_format):
             return False
-        pattern = r'(?<!\\)\{(.*?)(?<!\\)\}'
-        matches = re.findall(pattern, signature_name_format)
+        matches = self._signature_name_pattern.findall(signature_name_format)
         for match in matches:
             if match not in self.correct_signature_name_format_args:
                 return False
@@ -347,13 +435,97 @@ class Decorator(object):
 
     # Decorator wrapper
     def __call__(self, func):
-        @functools.wraps(func)
-        def wrapped(*args, **kwargs):
-            if self._activated:
-                return self._wrapper(func, *args, **kwargs)
-            else:
-                return func(*args, **kwargs)
-        return wrapped
+        if Decorator.compiled_out: # The function runs without any wrapper
+            return func
+        if inspect.iscoroutinefunction(func):
+            async_wrapper = self._bind_async_wrapper(func)
+            @functools.wraps(func)
+            async def async_wrapped(*args, **kwargs):
+                if self._activated:
+                    return await async_wrapper(*args, **kwargs)
+                else:
+                    return await func(*args, **kwargs)
+            wrapped = async_wrapped
+        else:
+            wrapper = self._bind_wrapper(func)
+            @functools.wraps(func)
+            def wrapped(*args, **kwargs):
+                if self._activated:
+                    return wrapper(*args, **kwargs)
+                else:
+                    return func(*args, **kwargs)
+        if not self._rebind:
+            return wrapped
+        self._decorated_functions.append((func, wrapped))
+        # A deactivated decorator binds the original function
+        return wrapped if self._activated else func
+
+    def _rebind_functions(self, activated: bool) -> None:
+        """
+        Replaces the decorated functions by the original functions (``activated`` is False) or the original functions by the decorated functions (``activated`` is True) in their module or class.
+
+        The module or class of a function is found from its ``__module__`` and ``__qualname__`` when the activation status changes.
+        The methods wrapped in a ``staticmethod`` or a ``classmethod`` are rebound too.
+        The functions defined in another function (``<locals>`` in their qualified name) and the references to the functions kept elsewhere (``from module import function`` in another module for example) are not rebound: they keep checking the activation status at each call.
+
+        Parameters
+        ----------
+        activated: bool
+            The new activation status of the decorator.
+        """
+        for func, wrapped in self._decorated_functions:
+            current, replacement = (func, wrapped) if activated else (wrapped, func)
+            path = func.__qualname__.split(".")
+            if "<locals>" in path:
+                continue
+            namespace = sys.modules.get(func.__module__)
+            for name in path[:-1]:
+                namespace = getattr(namespace, name, None)
+            if namespace is None:
+                continue
+            name = path[-1]
+            attribute = inspect.getattr_static(namespace, name, None)
+            if attribute is current:
+                setattr(namespace, name, replacement)
+            elif isinstance(attribute, (staticmethod, classmethod)) and attribute.__func__ is current:
+                setattr(namespace, name, type(attribute)(replacement))
+
+    def _bind_wrapper(self, func):
+        """
+        Returns the callable executed by the decorated function when the decorator is activated.
+
+        This method is called once, when the function is decorated. 
+        The subclasses can override it to resolve once the data they need about the function (an index in a registry for example) instead of resolving it at each call.
+
+        Parameters
+        ----------
+        func: function
+            The function to decorate.
+
+        Returns
+        -------
+        wrapper: Callable
+            The callable with the signature ``wrapper(*args, **kwargs)``. By default, the ``_wrapper`` method bound to ``func``.
+        """
+        return functools.partial(self._wrapper, func)
+
+    def _bind_async_wrapper(self, func):
+        """
+        Returns the coroutine function awaited by the decorated coroutine function when the decorator is activated.
+
+        This method is called once, when the coroutine function is decorated (see :meth:`_bind_wrapper`).
+
+        Parameters
+        ----------
+        func: function
+            The coroutine function to decorate.
+
+        Returns
+        -------
+        async_wrapper: Callable
+            The coroutine function with the signature ``async_wrapper(*args, **kwargs)``. By default, the ``_async_wrapper`` method bound to ``func``.
+        """
+        return functools.partial(self._async_wrapper, func)
 
     # To be implemented in subclasses
     def _wrapper(self, func, *args, **kwargs):
@@ -362,5 +534,14 @@ class Decorator(object):
         """
         raise NotImplementedError("Method _wrapper must be implemented in subclasses.")
 
+    async def _async_wrapper(self, func, *args, **kwargs):
+        """
+        Wrapper method of the coroutine functions.
+
+        By default, awaits the coroutine returned by the ``_wrapper`` method, so the pre-execution and the post-execution of ``_wrapper`` surround only the creation of the coroutine.
+        The subclasses can override it to await the coroutine between them.
+        """
+        return await self._wrapper(func, *args, **kwargs)
+
 
     
\ No newline at end of file
@@ -1,11 +1,40 @@
 from .function_profiler import FunctionProfiler
 from .timer import Timer
+from .cpu_timer import CPUTimer
 from .memory import Memory
+from .allocations import Allocations
 from .profiler_utils import ProfilerUtils
+from .record_store import RecordStore
+from .aggregate import Aggregate
+from .quantile_sketch import QuantileSketch
+from .sampling import Sampling, EveryNSampling, ProbabilisticSampling, AdaptiveSampling
+from .profile_file import ProfileWriter, ProfileWriterQueue, ProfileReader
+from .openmetrics import MetricsServer
+from .sinks import Sink, SinkQueue, FileSink, JSONLinesSink, CSVSink, SQLiteSink, StatsDSink
 
 __all__ = [
     'FunctionProfiler',
     'Timer',
+    'CPUTimer',
     'Memory',
-    'ProfilerUtils'
+    'Allocations',
+    'ProfilerUtils',
+    'RecordStore',
+    'Aggregate',
+    'QuantileSketch',
+    'Sampling',
+    'EveryNSampling',
+    'ProbabilisticSampling',
+    'AdaptiveSampling',
+    'ProfileWriter',
+    'ProfileWriterQueue',
+    'ProfileReader',
+    'Sink',
+    'SinkQueue',
+    'FileSink',
+    'JSONLinesSink',
+    'CSVSink',
+    'SQLiteSink',
+    'StatsDSink',
+    'MetricsServer'
 ]
\ No newline at end of file
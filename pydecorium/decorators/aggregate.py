@@ -0,0 +1,161 @@
+from .quantile_sketch import QuantileSketch
+
+from typing import Optional, Union
+import math
+
+class Aggregate(object):
+    r"""
+    ``Aggregate`` is a streaming accumulator of numeric values used by the :class:`pydecorium.decorators.FunctionProfiler` to summarize the data of a profiler utils for a function.
+
+    Each value is added in O(1) and nothing is kept per value:
+
+    - the number of values, their sum, minimum and maximum.
+    - the mean and the variance computed with the Welford's online algorithm.
+
+    Optionally, the values are also added to a :class:`pydecorium.decorators.QuantileSketch` to estimate the percentiles with a bounded memory.
+
+    Two aggregates can be merged (Chan's parallel algorithm), for example to combine the aggregates collected by several threads or processes.
+
+    .. code-block:: python
+
+        aggregate = Aggregate()
+        for value in [1, 2, 3]:
+            aggregate.add(value)
+        aggregate.mean # 2.0
+        aggregate.variance # 0.666...
+
+    Parameters
+    ----------
+    quantiles : bool
+        If True, the values are also added to a ``QuantileSketch`` (see :meth:`quantile`).
+        Default is False.
+
+    Attributes
+    ----------
+    count : int
+        The number of values.
+    total : Union[int, float]
+        The sum of the values (None if no value).
+    minimum : Union[int, float]
+        The minimum of the values (None if no value).
+    maximum : Union[int, float]
+        The maximum of the values (None if no value).
+    mean : float
+        The mean of the values (None if no value).
+    variance : float
+        The population variance of the values (None if no value).
+    std : float
+        The population standard deviation of the values (None if no value).
+    sketch : QuantileSketch
+        The sketch of the values (None if ``quantiles`` is False).
+    """
+    __slots__ = ("count", "total", "minimum", "maximum", "_mean", "_m2", "sketch")
+
+    def __init__(self, quantiles: bool = False) -> None:
+        self.sketch = QuantileSketch() if quantiles else None
+        self.count = 0
+        self.total = None
+        self.minimum = None
+        self.maximum = None
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: Union[int, float]) -> None:
+        r"""
+        Adds a value to the aggregate.
+
+        Parameters
+        ----------
+        value : Union[int, float]
+            The value to add.
+        """
+        count = self.count + 1
+        self.count = count
+        if count == 1:
+            self.total = self.minimum = self.maximum = value
+        else:
+            self.total += value
+            if value < self.minimum:
+                self.minimum = value
+            elif value > self.maximum:
+                self.maximum = value
+        delta = value - self._mean
+        self._mean += delta / count
+        self._m2 += delta * (value - self._mean)
+        if self.sketch is not None:
+            self.sketch.add(value)
+
+    def merge(self, other: "Aggregate") -> None:
+        r"""
+        Merges another aggregate into this one.
+
+        Parameters
+        ----------
+        other : Aggregate
+            The aggregate to merge.
+        """
+        if other.count == 0:
+            return
+        if other.sketch is not None:
+            if self.sketch is None:
+                self.sketch = other.sketch.copy()
+            else:
+                self.sketch.merge(other.sketch)
+        if self.count == 0:
+            self.count, self.total, self.minimum, self.maximum, self._mean, self._m2 = other.count, other.total, other.minimum, other.maximum, other._mean, other._m2
+            return
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def copy(self) -> "Aggregate":
+        r"""
+        Returns a copy of the aggregate, with a copy of its sketch (even if the aggregate is empty).
+        """
+        aggregate = Aggregate.__new__(Aggregate)
+        aggregate.sketch = None if self.sketch is None else self.sketch.copy()
+        aggregate.count, aggregate.total, aggregate.minimum, aggregate.maximum, aggregate._mean, aggregate._m2 = self.count, self.total, self.minimum, self.maximum, self._mean, self._m2
+        return aggregate
+
+    def quantile(self, q: float) -> Optional[float]:
+        r"""
+        Estimates the quantile ``q`` of the values (see :meth:`pydecorium.decorators.QuantileSketch.quantile`).
+
+        Parameters
+        ----------
+        q : float
+            The quantile to estimate, in [0, 1] (0.99 for the 99th percentile).
+
+        Returns
+        -------
+        Optional[float]
+            The estimated quantile (None if no value).
+
+        Raises
+        ------
+        ValueError
+            If the aggregate has no sketch.
+        """
+        if self.sketch is None:
+            raise ValueError("The quantiles are not tracked by this aggregate.")
+        return self.sketch.quantile(q)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._mean if self.count else None
+
+    @property
+    def variance(self) -> Optional[float]:
+        return self._m2 / self.count if self.count else None
+
+    @property
+    def std(self) -> Optional[float]:
+        return math.sqrt(self.variance) if self.count else None
+
+    def __repr__(self) -> str:
+        return f"Aggregate(count={self.count}, total={self.total}, minimum={self.minimum}, maximum={self.maximum}, mean={self.mean}, variance={self.variance})"
@@ -0,0 +1,323 @@
+from .profiler_utils import ProfilerUtils
+from .memory import format_memory
+import os
+import threading
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+class Allocations(ProfilerUtils):
+    """
+    ``Allocations`` class is a decorator that measures the memory allocated by a function with the ``tracemalloc`` module.
+
+    The ``Allocations`` class is a sub-class of the :class:`pydecorium.decorators.ProfilerUtils` base class.
+
+    The ``data_name`` attribute is set to "allocations" and the result has three fields (see ``data_fields``):
+
+    - "peak memory": The peak of the traced memory reached during the call, above the traced memory at the start of the call.
+    - "net memory": The traced memory allocated by the call and not released at its end (negative if the call released more memory than it allocated).
+    - "allocated blocks": The number of memory blocks allocated by the call and not released at its end (only if ``count_allocations`` is True or ``top_sites`` is positive, None otherwise).
+
+    Unlike the resident set size measured by :class:`pydecorium.decorators.Memory`, the traced memory is not hidden by the reuse of the memory pages by the allocator, and the peak reached inside the call is measured.
+
+    The tracing of ``tracemalloc`` is started at the instantiation if it is not already started. It slows down all the memory allocations of the process.
+
+    The nested calls of profiled functions are handled: the peak of a call includes the peaks of the calls nested in it.
+    The peak of ``tracemalloc`` is global to the process, so the peaks of the calls running concurrently in other threads are mixed.
+
+    If ``top_sites`` is positive, the allocation sites (file and line) of each call are also compared to the ones at the start of the call, and the memory allocated by each site is accumulated per function (see :meth:`top_allocation_sites`).
+    The number of blocks and the allocation sites require a snapshot of the traces at the start and at the end of each call, which is costly.
+
+    .. note::
+
+        The memory handle result is a tuple of the peak memory and the net memory in bytes and the number of allocated blocks. The string_value method converts the sizes in bytes, kilobytes, megabytes.
+
+    .. warning::
+
+        The peak memory requires ``tracemalloc.reset_peak`` (Python 3.9 or later), it is None on Python 3.8.
+
+    Parameters
+    ----------
+    count_allocations : bool
+        If True, the number of allocated blocks is counted.
+        Default is False.
+    top_sites : int
+        The number of allocation sites kept per function by :meth:`top_allocation_sites`. 0 to disable the tracking of the allocation sites.
+        Default is 0.
+    traceback_limit : int
+        The number of frames stored by ``tracemalloc`` for each allocation if the tracing is started by the instantiation.
+        Default is 1.
+    """
+    data_name: str = "allocations"
+    data_typecode: str = "q"
+    data_fields: Tuple[str, ...] = ("peak memory", "net memory", "allocated blocks")
+
+    def __init__(self, *args, count_allocations: bool = False, top_sites: int = 0, traceback_limit: int = 1, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not isinstance(count_allocations, bool):
+            raise TypeError("The count_allocations must be a booleen.")
+        if not isinstance(top_sites, int):
+            raise TypeError("The top_sites must be an integer.")
+        if top_sites < 0:
+            raise ValueError("The top_sites must be positive.")
+        if not isinstance(traceback_limit, int):
+            raise TypeError("The traceback_limit must be an integer.")
+        if traceback_limit <= 0:
+            raise ValueError("The traceback_limit must be strictly positive.")
+        self._count_allocations = count_allocations
+        self._top_sites = top_sites
+        self._take_snapshots = count_allocations or top_sites > 0
+        self._frames = threading.local()
+        self._allocation_sites = {}
+        self._lock = threading.Lock()
+        # The allocations of tracemalloc and of the profilers are not reported
+        self._snapshot_filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, os.path.join(os.path.dirname(os.path.abspath(__file__)), "*")),
+        ]
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(traceback_limit)
+
+    @property
+    def count_allocations(self) -> bool:
+        return self._count_allocations
+
+    @property
+    def top_sites(self) -> int:
+        return self._top_sites
+
+    def _get_active_frames(self) -> List[List]:
+        """
+        Returns the stack of the frames of the calls being measured in the current thread.
+        """
+        try:
+            return self._frames.stack
+        except AttributeError:
+            stack = self._frames.stack = []
+            return stack
+
+    def pre_execute(self, func, *args, **kwargs) -> List:
+        """
+        Starts the measure of the traced memory before the function execution.
+
+        Returns
+        -------
+        List
+            The frame of the call: the traced memory at the start of the call, the peak reached by the call, and the snapshot of the traces if needed.
+        """
+        stack = self._get_active_frames()
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # The peak reached by the enclosing call before this call
+            parent_frame = stack[-1]
+            if peak > parent_frame[1]:
+                parent_frame[1] = peak
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        frame = [current, current, None]
+        stack.append(frame)
+        if self._take_snapshots:
+            frame[2] = self._take_snapshot()
+        return frame
+
+    def post_execute(self, token: List, func, *args, **kwargs) -> Tuple[Optional[int], int, Optional[int]]:
+        """
+        Computes the peak memory, the net memory and the allocated blocks after the function execution.
+
+        Parameters
+        ----------
+        token : List
+            The frame of the call returned by :meth:`pre_execute`.
+
+        Returns
+        -------
+        Tuple[Optional[int], int, Optional[int]]
+            The peak memory and the net memory in bytes, and the number of allocated blocks (None if not counted).
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        start, _, snapshot = token
+        frame_peak = self._pop_frame(token, peak)
+        peak_memory = frame_peak - start if hasattr(tracemalloc, "reset_peak") else None
+        allocated_blocks = None
+        if snapshot is not None:
+            statistics = self._take_snapshot().compare_to(snapshot, "lineno")
+            if self._count_allocations:
+                allocated_blocks = sum(statistic.count_diff for statistic in statistics)
+            if self._top_sites > 0:
+                self._add_allocation_sites(func, statistics)
+        return peak_memory, current - start, allocated_blocks
+
+    def abort_execute(self, token: List, func, *args, **kwargs) -> None:
+        """
+        Removes the frame of a call which raised an exception from the stack of the current thread, so the stack and the snapshot of the call are released.
+        The peak reached by the call is still included in the peak of the enclosing call.
+
+        Parameters
+        ----------
+        token : List
+            The frame of the call returned by :meth:`pre_execute`.
+        """
+        _, peak = tracemalloc.get_traced_memory()
+        self._pop_frame(token, peak)
+
+    def _pop_frame(self, token: List, peak: int) -> int:
+        """
+        Removes the frame of a finished call from the stack of the current thread and returns the peak reached by the call.
+        The peak of the enclosing call is updated with the peak of the call.
+        """
+        frame_peak = token[1]
+        if peak > frame_peak:
+            frame_peak = peak
+        stack = self._get_active_frames()
+        if stack and stack[-1] is token:
+            stack.pop()
+        elif token in stack: # The calls are not nested (interleaved generators or tasks)
+            stack.remove(token)
+        if stack:
+            # The peak of the enclosing call includes the peak of this call
+            parent_frame = stack[-1]
+            if frame_peak > parent_frame[1]:
+                parent_frame[1] = frame_peak
+        return frame_peak
+
+    def handle_result(self, token: Tuple[Optional[int], int, Optional[int]]) -> Tuple[Optional[int], int, Optional[int]]:
+        """
+        Returns the peak memory, the net memory and the allocated blocks.
+
+        Parameters
+        ----------
+        token : Tuple[Optional[int], int, Optional[int]]
+            The result returned by :meth:`post_execute`.
+
+        Returns
+        -------
+        Tuple[Optional[int], int, Optional[int]]
+            The peak memory and the net memory in bytes, and the number of allocated blocks (None if not counted).
+        """
+        return token
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        """
+        Takes a snapshot of the traces without the allocations of the ``tracemalloc`` module and of the profilers.
+        """
+        return tracemalloc.take_snapshot().filter_traces(self._snapshot_filters)
+
+    def _add_allocation_sites(self, func, statistics: List[tracemalloc.StatisticDiff]) -> None:
+        """
+        Accumulates the memory allocated by each site during a call of ``func``.
+        """
+        with self._lock:
+            sites = self._allocation_sites.setdefault(func, {})
+            for statistic in statistics:
+                if statistic.size_diff <= 0:
+                    continue
+                frame = statistic.traceback[0]
+                site = f"{frame.filename}:{frame.lineno}"
+                site_allocations = sites.get(site)
+                if site_allocations is None:
+                    sites[site] = [statistic.size_diff, statistic.count_diff]
+                else:
+                    site_allocations[0] += statistic.size_diff
+                    site_allocations[1] += statistic.count_diff
+
+    def top_allocation_sites(self, func=None, n: Optional[int] = None) -> Union[List[Tuple[str, int, int]], Dict[Any, List[Tuple[str, int, int]]]]:
+        """
+        Returns the sites which allocated the most memory during the calls of a function.
+
+        The sites are accumulated only if ``top_sites`` is positive.
+
+        Parameters
+        ----------
+        func : Callable
+            The profiled function (or the decorated function). If None, the top sites of every profiled function are returned in a dictionary keyed by the function.
+            Default is None.
+        n : int
+            The number of sites to return.
+            Default is None (``top_sites``).
+
+        Returns
+        -------
+        Union[List[Tuple[str, int, int]], Dict[Any, List[Tuple[str, int, int]]]]
+            The sites ("filename:lineno"), the memory they allocated in bytes and their number of allocated blocks, by decreasing memory.
+        """
+        if n is None:
+            n = self._top_sites
+        if func is None:
+            return {function: self.top_allocation_sites(function, n) for function in list(self._allocation_sites)}
+        # The decorated function wraps the profiled function
+        while func not in self._allocation_sites and hasattr(func, "__wrapped__"):
+            func = func.__wrapped__
+        with self._lock:
+            sites = [(site, size, count) for site, (size, count) in self._allocation_sites.get(func, {}).items()]
+        sites.sort(key=lambda site: site[1], reverse=True)
+        return sites[:n]
+
+    def generate_sites_report(self, n: Optional[int] = None) -> str:
+        """
+        Generates the report of the sites which allocated the most memory for each profiled function.
+
+        .. code-block:: console
+
+            [function_name]
+                path/to/module.py:12 - 1MB 0KB 0B - 1024 blocks
+                path/to/module.py:15 - 0MB 64KB 0B - 16 blocks
+
+        Parameters
+        ----------
+        n : int
+            The number of sites reported per function.
+            Default is None (``top_sites``).
+
+        Returns
+        -------
+        str
+            The report of the allocation sites.
+        """
+        report = ""
+        for func, sites in self.top_allocation_sites(n=n).items():
+            report += f"[{self.get_signature_name(func)}]\n"
+            for site, size, count in sites:
+                report += f"\t{site} - {format_memory(size)} - {count} blocks\n"
+        return report
+
+    def clear_allocation_sites(self) -> None:
+        """
+        Removes the accumulated allocation sites.
+        """
+        with self._lock:
+            self._allocation_sites = {}
+
+    def string_field_value(self, field_index: int, result) -> str:
+        """
+        Converts the value of a field: the sizes in bytes, kilobytes, megabytes and the number of blocks as an integer.
+        """
+        if field_index == 2:
+            return f"{int(round(result))} blocks"
+        return format_memory(result)
+
+    def string_value(self, result: Union[int, float, Tuple]) -> str:
+        """
+        Converts the sizes in bytes, kilobytes, megabytes in the format "{megabytes}MB {kilobytes}KB {bytes}B".
+
+        A tuple of results is converted in the format "peak memory {size} - net memory {size} - allocated blocks {count} blocks" (the missing fields are omitted).
+
+        Parameters
+        ----------
+        result : Union[int, float, Tuple]
+            The size in bytes or the tuple of the results.
+
+        Returns
+        -------
+        str
+            The results in a string format.
+
+        Raises
+        ------
+        TypeError
+            If `result` is not a numeric or a tuple.
+        """
+        # Parameter check
+        if isinstance(result, tuple):
+            return " - ".join(f"{field} {self.string_field_value(field_index, value)}" for field_index, (field, value) in enumerate(zip(self.data_fields, result)) if value is not None)
+        if not isinstance(result, (int, float)):
+            raise TypeError("The parameter `result` must be numeric.")
+        return format_memory(result)
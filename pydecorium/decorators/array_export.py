@@ -0,0 +1,213 @@
+from .record_store import RecordStore
+
+from typing import Any, Dict, List, Optional, Sequence
+
+def _import_numpy():
+    r"""
+    Imports ``numpy`` when an array is exported, it is an optional dependency.
+    """
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError("The numpy package is required to export the profiled data as arrays.") from error
+    return numpy
+
+
+def _import_pandas():
+    r"""
+    Imports ``pandas`` when a data frame is exported, it is an optional dependency.
+    """
+    try:
+        import pandas
+    except ImportError as error:
+        raise ImportError("The pandas package is required to export the profiled data as a data frame.") from error
+    return pandas
+
+
+def _column_array(numpy, column, typecode: Optional[str]):
+    r"""
+    Returns a column of a store as a ``numpy`` array: the typed columns share the buffer of their ``array.array``, the columns of Python objects are converted in object arrays.
+    """
+    if typecode is None:
+        array = numpy.empty(len(column), dtype=object)
+        array[:] = column
+        return array
+    return numpy.frombuffer(column, dtype=typecode) if len(column) else numpy.empty(0, dtype=typecode)
+
+
+def records_to_numpy(record_stores: List[RecordStore], data_names: List[str], typecodes: List[Optional[str]]):
+    r"""
+    Returns the records of several stores as a ``numpy`` structured array sorted by timestamp.
+
+    The columns of each store are read through their buffer and concatenated, then the rows are sorted with a stable sort on the timestamps, so no Python object is created per record (except for the columns of Python objects).
+
+    Parameters
+    ----------
+    record_stores : List[RecordStore]
+        The stores of the records.
+    data_names : List[str]
+        The names of the data columns.
+    typecodes : List[Optional[str]]
+        The typecodes of the data columns, None for a column of Python objects.
+
+    Returns
+    -------
+    numpy.ndarray
+        The structured array with the fields "timestamp" (int64 nanoseconds since the epoch), "function_index" (int32) and one field per data column.
+        The missing values are the sentinels of the :class:`pydecorium.decorators.RecordStore` (NaN, the minimum integer or None).
+
+    Raises
+    ------
+    ImportError
+        If ``numpy`` is not installed.
+    """
+    numpy = _import_numpy()
+    dtypes = ["q", "i"] + [object if typecode is None else typecode for typecode in typecodes]
+    columns = [[] for _ in dtypes]
+    for record_store in record_stores:
+        if len(record_store) == 0:
+            continue
+        store_columns = [record_store.timestamps, record_store.function_indices] + record_store.columns
+        for column_index, (column, typecode) in enumerate(zip(store_columns, ["q", "i"] + list(typecodes))):
+            columns[column_index].append(_column_array(numpy, column, typecode))
+    columns = [numpy.concatenate(arrays).astype(dtype, copy=False) if arrays else numpy.empty(0, dtype=dtype) for arrays, dtype in zip(columns, dtypes)]
+    order = numpy.argsort(columns[0], kind="stable")
+    records = numpy.empty(len(order), dtype=numpy.dtype(list(zip(["timestamp", "function_index"] + list(data_names), dtypes))))
+    for name, column in zip(records.dtype.names, columns):
+        records[name] = column[order]
+    return records
+
+
+def records_to_dataframe(records, signature_names: List[str], missing_values: Sequence[Any]):
+    r"""
+    Converts a structured array of records (see :func:`records_to_numpy`) into a ``pandas.DataFrame``.
+
+    The columns of the data frame are:
+
+    - "timestamp": the time of the call as a ``datetime64[ns, UTC]``.
+    - "function_index": the index of the profiled function.
+    - "function": the signature name of the function, as a categorical sharing the codes of "function_index".
+    - one column per data column. The missing values of the integer columns are masked with the nullable integer types of ``pandas``, the ones of the float columns are NaN.
+
+    Parameters
+    ----------
+    records : numpy.ndarray
+        The structured array of the records.
+    signature_names : List[str]
+        The signature names of the functions, in the order of their indices.
+    missing_values : Sequence[Any]
+        The sentinels of the missing values of the data columns.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The data frame of the records.
+
+    Raises
+    ------
+    ImportError
+        If ``pandas`` is not installed.
+    """
+    pandas = _import_pandas()
+    numpy = _import_numpy()
+    data = {
+        "timestamp": pandas.to_datetime(records["timestamp"], unit="ns", utc=True),
+        "function_index": records["function_index"],
+        "function": pandas.Categorical.from_codes(records["function_index"], categories=_unique_names(signature_names)),
+    }
+    for name, missing_value in zip(records.dtype.names[2:], missing_values):
+        column = records[name]
+        if column.dtype.kind in "iu":
+            column = pandas.arrays.IntegerArray(column.copy(), column == missing_value)
+        elif column.dtype == object:
+            column = pandas.array(column, dtype=object)
+        else:
+            column = numpy.asarray(column)
+        data[name] = column
+    return pandas.DataFrame(data)
+
+
+def _unique_names(signature_names: List[str]) -> List[str]:
+    r"""
+    Makes the signature names unique to use them as categories: a repeated name is suffixed with the index of its function.
+    """
+    seen = set()
+    names = []
+    for function_index, signature_name in enumerate(signature_names):
+        if signature_name in seen:
+            signature_name = f"{signature_name} [{function_index}]"
+        seen.add(signature_name)
+        names.append(signature_name)
+    return names
+
+
+def summarize_records(records, signature_names: List[str], missing_values: Sequence[Any], quantiles: Sequence[float] = (0.5, 0.9, 0.99)) -> Dict[str, Dict[str, Any]]:
+    r"""
+    Summarizes the numeric data columns of a structured array of records (see :func:`records_to_numpy`) by function.
+
+    The records are grouped with a stable sort on the function indices and the sums, minimums and maximums of the groups are computed with ``numpy.ufunc.reduceat``.
+    Only the quantiles are computed group by group.
+
+    Parameters
+    ----------
+    records : numpy.ndarray
+        The structured array of the records.
+    signature_names : List[str]
+        The signature names of the functions, in the order of their indices.
+    missing_values : Sequence[Any]
+        The sentinels of the missing values of the data columns.
+    quantiles : Sequence[float]
+        The quantiles to compute, between 0 and 1.
+        Default is (0.5, 0.9, 0.99).
+
+    Returns
+    -------
+    Dict[str, Dict[str, Any]]
+        For each signature name (suffixed with the function index if it is repeated), the number of records ("calls") and for each numeric data column, the number of present values ("count"), "sum", "mean", "std", "min", "max" and the quantiles ("p50", "p90"...).
+        The statistics of a data column without present value are None.
+    """
+    numpy = _import_numpy()
+    signature_names = _unique_names(signature_names)
+    order = numpy.argsort(records["function_index"], kind="stable")
+    function_indices = records["function_index"][order]
+    group_indices, starts, calls = numpy.unique(function_indices, return_index=True, return_counts=True)
+    summary = {}
+    for function_index, function_calls in zip(group_indices.tolist(), calls.tolist()):
+        summary[signature_names[function_index]] = {"calls": function_calls}
+    if len(order) == 0:
+        return summary
+    ends = numpy.append(starts[1:], len(order))
+    for name, missing_value in zip(records.dtype.names[2:], missing_values):
+        column = records[name][order]
+        if column.dtype.kind not in "iuf":
+            continue
+        present = ~numpy.isnan(column) if column.dtype.kind == "f" else column != missing_value
+        values = column.astype(numpy.float64)
+        counts = numpy.add.reduceat(present.astype(numpy.int64), starts)
+        sums = numpy.add.reduceat(numpy.where(present, values, 0.0), starts)
+        minimums = numpy.minimum.reduceat(numpy.where(present, values, numpy.inf), starts)
+        maximums = numpy.maximum.reduceat(numpy.where(present, values, -numpy.inf), starts)
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            means = sums / counts
+            # Second pass on the deviations from the mean of the group, as the squares of the nanoseconds lose the precision of the variance
+            deviations = numpy.where(present, values - numpy.repeat(means, calls), 0.0)
+            variances = numpy.add.reduceat(deviations * deviations, starts) / counts
+        for group, function_index in enumerate(group_indices.tolist()):
+            count = int(counts[group])
+            statistics = {"count": count}
+            if count == 0:
+                statistics.update(dict.fromkeys(["sum", "mean", "std", "min", "max"] + [f"p{_quantile_name(quantile)}" for quantile in quantiles]))
+            else:
+                statistics.update({"sum": float(sums[group]), "mean": float(means[group]), "std": float(numpy.sqrt(variances[group])), "min": float(minimums[group]), "max": float(maximums[group])})
+                group_values = values[starts[group]:ends[group]][present[starts[group]:ends[group]]]
+                for quantile, quantile_value in zip(quantiles, numpy.quantile(group_values, list(quantiles)).tolist() if len(quantiles) else []):
+                    statistics[f"p{_quantile_name(quantile)}"] = quantile_value
+            summary[signature_names[function_index]][name] = statistics
+    return summary
+
+
+def _quantile_name(quantile: float) -> str:
+    r"""
+    Returns the name of a quantile as in the "percentiles" report: 0.5 is "50", 0.999 is "999".
+    """
+    return f"{quantile * 100:g}".replace(".", "")
@@ -0,0 +1,143 @@
+from .profiler_utils import ProfilerUtils
+from .timer import format_runtime
+import time
+from typing import Optional, Tuple, Union
+
+class CPUTimer(ProfilerUtils):
+    """
+    ``CPUTimer`` class is a decorator that measures together the wall time and the CPU times of a function, to know if a slow call was waiting or computing.
+
+    The ``CPUTimer`` class is a sub-class of the :class:`pydecorium.decorators.ProfilerUtils` base class.
+
+    The ``data_name`` attribute is set to "cpu time" and the result has three fields (see ``data_fields``):
+
+    - "wall time": The elapsed time measured with ``time.perf_counter_ns``.
+    - "process time": The CPU time of the process measured with ``time.process_time_ns``. It includes the CPU time of the other threads of the process.
+    - "thread time": The CPU time of the current thread measured with ``time.thread_time_ns``.
+
+    The reports of the :class:`pydecorium.decorators.FunctionProfiler` show each field and the CPU utilization: the thread time divided by the wall time.
+    A utilization close to 100% means that the call was computing, a utilization close to 0% means that the call was waiting (I/O, lock, sleep).
+
+    .. note::
+
+        The handle result is a tuple of the three runtimes in nanoseconds. The string_value method converts the runtimes in hours, minutes and seconds.
+
+    .. warning::
+
+        For a coroutine function, the thread time includes the execution of the other tasks running while the coroutine is suspended.
+    """
+    data_name: str = "cpu time"
+    data_typecode: str = "q"
+    data_fields: Tuple[str, ...] = ("wall time", "process time", "thread time")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def pre_execute(self, func, *args, **kwargs) -> Tuple[int, int, int]:
+        """
+        Initializes the clocks before the function execution.
+
+        Returns
+        -------
+        Tuple[int, int, int]
+            The start wall time, process time and thread time in nanoseconds.
+        """
+        return time.perf_counter_ns(), time.process_time_ns(), time.thread_time_ns()
+
+    def post_execute(self, token: Tuple[int, int, int], func, *args, **kwargs) -> Tuple[int, int, int]:
+        """
+        Computes the runtimes after the function execution.
+
+        Parameters
+        ----------
+        token : Tuple[int, int, int]
+            The start times in nanoseconds returned by :meth:`pre_execute`.
+
+        Returns
+        -------
+        Tuple[int, int, int]
+            The wall time, process time and thread time of the function in nanoseconds.
+        """
+        thread_time = time.thread_time_ns()
+        process_time = time.process_time_ns()
+        wall_time = time.perf_counter_ns()
+        return wall_time - token[0], process_time - token[1], thread_time - token[2]
+
+    def handle_result(self, token: Tuple[int, int, int]) -> Tuple[int, int, int]:
+        """
+        Returns the runtimes.
+
+        Parameters
+        ----------
+        token : Tuple[int, int, int]
+            The runtimes in nanoseconds returned by :meth:`post_execute`.
+
+        Returns
+        -------
+        Tuple[int, int, int]
+            The wall time, process time and thread time in nanoseconds.
+        """
+        return token
+
+    def string_value(self, result: Union[int, float, Tuple]) -> str:
+        """
+        Converts the runtimes in hours, minutes and seconds.
+
+        A single runtime (the value of a field) is converted in the format "{hours}h {minutes}m {seconds}s".
+        A tuple of runtimes is converted in the format "wall time {runtime} - process time {runtime} - thread time {runtime} - cpu utilization {utilization}%".
+
+        Parameters
+        ----------
+        result : Union[int, float, Tuple]
+            The runtime in nanoseconds or the tuple of the runtimes.
+
+        Returns
+        -------
+        str
+            The runtimes in a string format.
+
+        Raises
+        ------
+        TypeError
+            If `result` is not a numeric or a tuple of numerics.
+        """
+        # Parameter check
+        if isinstance(result, tuple):
+            if len(result) != len(self.data_fields) or not all(isinstance(value, (int, float)) for value in result):
+                raise TypeError("The parameter `result` must be a tuple of numerics.")
+            parts = [f"{field} {format_runtime(value)}" for field, value in zip(self.data_fields, result)]
+            utilization = self._utilization(result)
+            if utilization is not None:
+                parts.append(f"cpu utilization {utilization:.1f}%")
+            return " - ".join(parts)
+        if not isinstance(result, (int, float)):
+            raise TypeError("The parameter `result` must be numeric.")
+        return format_runtime(result)
+
+    def string_summary(self, values: Tuple) -> Optional[str]:
+        """
+        Returns the CPU utilization in the format "cpu utilization : {utilization}%".
+
+        Parameters
+        ----------
+        values : Tuple
+            The wall time, process time and thread time of a record or their totals.
+
+        Returns
+        -------
+        Optional[str]
+            The CPU utilization in a string format, None if the wall time is null.
+        """
+        utilization = self._utilization(values)
+        if utilization is None:
+            return None
+        return f"cpu utilization : {utilization:.1f}%"
+
+    def _utilization(self, values: Tuple) -> Optional[float]:
+        """
+        Computes the CPU utilization in percent: the thread time divided by the wall time.
+        """
+        wall_time, _, thread_time = values
+        if not wall_time:
+            return None
+        return 100 * thread_time / wall_time
@@ -1,10 +1,32 @@
 from ..decorator import Decorator
-from .profiler_utils import ProfilerUtils
+from .profiler_utils import ProfilerUtils, DataField
 from .timer import Timer
 from .memory import Memory
-
-from typing import List, Union, Type, Callable, Dict
-import datetime
+from .record_store import RecordStore, ProfiledDataView, merge_records, merge_columns, missing_mask, format_timestamps, count_recent_records
+from .aggregate import Aggregate
+from .generator_data import GeneratorData
+from .sampling import Sampling
+from .text_output import open_text_output
+from .trace_export import iter_collapsed_stacks, iter_chrome_trace
+from .openmetrics import MetricsServer, render_openmetrics
+from .array_export import records_to_numpy, records_to_dataframe, summarize_records
+from .profile_file import ProfileWriter, ProfileWriterQueue
+from .sinks import Sink, SinkQueue
+from .process_spool import SPOOL_DIRECTORY_VARIABLE, SPOOL_VERSION, write_collection_config, read_collection_config, write_spool_file, iter_spool_files
+
+from typing import List, Union, Type, Callable, Dict, Optional, IO, Tuple
+import array
+import contextvars
+import functools
+import inspect
+import multiprocessing.util
+import os
+import shutil
+import tempfile
+import statistics
+import threading
+import time
+import weakref
 
 class FunctionProfiler(Decorator):
     r"""
@@ -15,20 +37,68 @@ class FunctionProfiler(Decorator):
     For example, the :class:`pydecorium.decorators.Timer` is used to collect the execution time of the function and the :class:`pydecorium.decorators.Memory` is used to collect the memory usage of the function.
 
     The various functions and methods decorated with the ``FunctionProfiler`` are identified by their func pointer.
+    Each function is registered once, when it is decorated, and the decorated function keeps its index in the registry so that the profiling overhead per call does not depend on the number of profiled functions.
     When the report of the profiled data is generated, the function signature name is used to help the user to identify the profiled data.
     The `signature_name_format` attribute of this decorator can be used to customize the function signature name (see :class:`pydecorium.Decorator`).
 
-    The report of the profiled data can be formatted in three different ways: "datetime", "function", "cumulative".
+    The report of the profiled data can be formatted in seven different ways: "datetime", "function", "cumulative", "statistics", "percentiles", "tree", "process".
+
+    By default, every record is kept until :meth:`initialize` is called.
+    For long-running processes, a retention policy can be set to bound the memory used by the records (see :meth:`set_retention`).
+    The number of calls and the aggregates (sum, minimum, maximum, mean, variance) of each function are updated at each call, so they stay exact for the evicted records.
+    If only the aggregates are needed, the ``aggregate_only`` mode does not store the records at all.
+    The aggregates also contain a mergeable :class:`pydecorium.decorators.QuantileSketch` to report the percentiles of the numeric data with a bounded memory.
+
+    The ``FunctionProfiler`` is thread-safe and reentrant: the state of each call is kept in the tokens returned by the profiler utils (see :class:`pydecorium.decorators.ProfilerUtils`), and each thread stores its records and aggregates in its own shard without taking any lock.
+    The shards of the threads are merged when the profiled data are read, and the shards of the finished threads are folded into a single shard.
+
+    The coroutine functions (``async def``) are profiled until the end of their execution: the coroutine is awaited between the pre-execution and the post-execution of the profiler utils.
+
+    To bound the overhead on the functions called very often, a sampling policy (see :class:`pydecorium.decorators.Sampling`) can select the profiled calls.
+    The calls which are not selected only increment a counter of the function, the profiler utils are not executed.
+    The reports show the sampling rate of each function and the "cumulative" report estimates the totals of all the calls from the profiled ones (see :meth:`set_report_format`).
+    A sampling policy can also be given to a single profiler utils (see :class:`pydecorium.decorators.ProfilerUtils`): its data are then missing for the calls it doesn't measure.
+
+    The flat records don't show which profiled function called which one, so the runtime of a function calling other profiled functions is counted in their runtimes too.
+    With the ``track_call_tree`` option, the stack of the active profiled calls is tracked per thread and per asynchronous task, and the data of each call are aggregated in a call tree with their inclusive and exclusive values (see :meth:`_profile_tree`).
+
+    For the long runs, the records can be moved from the memory to a binary profile file while profiling (see :meth:`open_profile_file`), and read back later with a :class:`pydecorium.decorators.ProfileReader`.
+
+    Each process has its own copy of the ``FunctionProfiler``. To profile the worker processes (``multiprocessing``, ``concurrent.futures.ProcessPoolExecutor``), the workers can ship their data back to the parent process through spool files, where they are merged with the process identifier kept in the reports (see :meth:`start_process_collection`).
 
     Parameters
     ----------
-    profiler_utils : Union[Type, List[Type]]
-        The list of sub-classes of the ``ProfilerUtils`` class to connect to the ``FunctionProfiler``.
+    profiler_utils : Union[Type, ProfilerUtils, List[Union[Type, ProfilerUtils]]]
+        The list of sub-classes of the ``ProfilerUtils`` class (or of their configured instances) to connect to the ``FunctionProfiler``.
         Default is None.
     report_format : str
         The format of the string to report the profiled data. (see :meth:`pydecorium.decorators.FunctionProfiler.set_report_format`).
-        The valid values are: "datetime", "function", "cumulative".
+        The valid values are: "datetime", "function", "cumulative", "statistics", "percentiles", "tree", "process".
         Default is "datetime". 
+    aggregate_only : bool
+        If True, the records are not stored, only the aggregates of each function are updated. The "datetime" and "function" report formats are not available in this mode.
+        Default is False.
+    track_quantiles : bool
+        If True, the aggregates contain a quantile sketch of the numeric data to report their percentiles. The "percentiles" report format is not available otherwise.
+        Default is True.
+    profile_generators : bool
+        If True, the generator functions and the asynchronous generator functions decorated by the ``FunctionProfiler`` are profiled during the whole iteration of the generators they return, instead of their creation. (see :meth:`_profile_generator`)
+        Default is False.
+    max_records : int
+        The maximum number of records kept by the ``FunctionProfiler``, the oldest records are evicted first. (see :meth:`set_retention`)
+        Default is None (no limit).
+    max_records_per_function : int
+        The maximum number of records kept for each profiled function, the oldest records are evicted first. (see :meth:`set_retention`)
+        Default is None (no limit).
+    max_age : float
+        The maximum age in seconds of the records kept by the ``FunctionProfiler``. (see :meth:`set_retention`)
+        Default is None (no limit).
+    sampling : Sampling
+        The sampling policy selecting the profiled calls.
+        Default is None (every call is profiled).
+    track_call_tree : bool
+        If True, the calls are aggregated in a call tree with their inclusive and exclusive data. The "tree" report format is not available otherwise.
+        Default is False.
 
     Attributes
     ----------
@@ -36,28 +106,135 @@ class FunctionProfiler(Decorator):
         The format of the string to report the profiled data. (see :meth:`pydecorium.decorators.FunctionProfiler.set_report_format`).
 
     profiled_functions : List[Callable]
-        The list containing the functions/methods actually profiled by the ``FunctionProfiler``.
+        The list containing the functions/methods decorated by the ``FunctionProfiler``.
 
     profiled_functions_signature_name : List[str]
-        The list containing the signature name of the functions/methods actually profiled by the ``FunctionProfiler``.
+        The list containing the signature name of the functions/methods decorated by the ``FunctionProfiler``.
 
     connected_profiler_utils : List[ProfilerUtils]
         The list of the connected ``ProfilerUtils`` to the ``FunctionProfiler``.
 
+    data_columns : List[Union[ProfilerUtils, DataField]]
+        The list of the columns of the records and of the aggregates: the connected ``ProfilerUtils`` with a single-valued result, or a :class:`pydecorium.decorators.profiler_utils.DataField` for each field of the multi-valued ones.
+
     profiled_data : List[List]
         The list of the profiled data containing the datetime, the index of the function and the data collected by the connected ``ProfilerUtils``. The data are a dictionary with the index of the connected ``ProfilerUtils`` as key and the data collected as value.
+        If a connected ``ProfilerUtils`` has multi-valued results (see ``data_fields`` in :class:`pydecorium.decorators.ProfilerUtils`), each field has its own column and the keys are the indices of the columns (see ``data_columns``).
+        The records are stored in a columnar :class:`pydecorium.decorators.RecordStore` and this list is a view materialized lazily.
+
+    record_stores : List[RecordStore]
+        The list of the stores containing the records of all the threads, within the limits of the retention policy. Each thread has one store per function if ``max_records_per_function`` is set, otherwise a single store.
+
+    cumulative_data : Dict[int, List]
+        The number of calls and the cumulative data of each called function. (see :meth:`extract_cumulative_data`)
+
+    aggregates : Dict[int, List]
+        The number of calls and the aggregates of the data of each called function. (see :meth:`extract_aggregates`)
+
+    aggregate_only : bool
+        If the records are not stored.
+
+    track_quantiles : bool
+        If the aggregates contain a quantile sketch of the numeric data.
+
+    profile_generators : bool
+        If the generators returned by the decorated functions are profiled during their iteration.
+
+    generator_aggregates : Dict[int, List]
+        The number of iterations and the aggregates of the number of items and of the throughput of each profiled generator function. (see :meth:`_profile_generator`)
+
+    sampling : Sampling
+        The sampling policy selecting the profiled calls (None if every call is profiled).
+
+    unsampled_calls : Dict[int, int]
+        The number of calls which were not profiled of each function, because of the sampling policy.
+
+    sampling_rates : Dict[int, float]
+        The fraction of the calls profiled of each called function. (see :meth:`extract_sampling_rates`)
+
+    track_call_tree : bool
+        If the calls are aggregated in a call tree.
+
+    call_tree : Dict[Tuple[int, ...], List]
+        The number of calls and the inclusive and exclusive aggregates of each path of the call tree. (see :meth:`extract_call_tree`)
+
+    profile_file : Optional[str]
+        The path of the open profile file where the records are written (see :meth:`open_profile_file`), None if no profile file is open.
+
+    spool_directory : Optional[str]
+        The spool directory where the worker processes write their data (see :meth:`start_process_collection`), None if the processes are not collected.
+
+    process_ids : List[int]
+        The identifiers of the processes which profiled the data, the current process first.
 
     report : str
         The string reporting the profiled data according to the selected ``report_format``.
     """
-    correct_report_format = ["datetime", "function", "cumulative"]
-
-    def __init__(self, profiler_utils: Union[Type, List[Type]] = None,
-                 report_format: str = "datetime", *args, **kwargs) -> None:
+    correct_report_format = ["datetime", "function", "cumulative", "statistics", "percentiles", "tree", "process"]
+    generator_data = [GeneratorData("items"), GeneratorData("throughput", " items/s", summable=False)]
+    reported_quantiles = [0.5, 0.9, 0.99, 0.999]
+    diff_quantile = 0.99
+    metrics_buckets = [10 ** exponent for exponent in range(13)] # From 1 ns or 1 byte to 1000 s or 1 TB
+    report_chunk_size = 10000
+
+    def __init__(self, profiler_utils: Union[Type, ProfilerUtils, List[Union[Type, ProfilerUtils]]] = None,
+                 report_format: str = "datetime", *args, 
+                 aggregate_only: bool = False,
+                 track_quantiles: bool = True,
+                 profile_generators: bool = False,
+                 max_records: Optional[int] = None,
+                 max_records_per_function: Optional[int] = None,
+                 max_age: Optional[float] = None,
+                 sampling: Optional[Sampling] = None,
+                 track_call_tree: bool = False,
+                 **kwargs) -> None:
         super().__init__(*args, **kwargs)
+        if not isinstance(aggregate_only, bool):
+            raise TypeError("The aggregate_only must be a booleen.")
+        self._aggregate_only = aggregate_only
+        if not isinstance(track_quantiles, bool):
+            raise TypeError("The track_quantiles must be a booleen.")
+        self._track_quantiles = track_quantiles
+        if not isinstance(profile_generators, bool):
+            raise TypeError("The profile_generators must be a booleen.")
+        self._profile_generators = profile_generators
+        if sampling is not None and not isinstance(sampling, Sampling):
+            raise TypeError("The sampling must be an instance of Sampling.")
+        self._sampling = sampling
+        if not isinstance(track_call_tree, bool):
+            raise TypeError("The track_call_tree must be a booleen.")
+        self._track_call_tree = track_call_tree
+        # The active profiled call of each thread and asynchronous task
+        self._call_frame = contextvars.ContextVar(f"pydecorium_call_frame_{id(self)}", default=None)
+        self._profiled_functions = []
+        self._function_registry = {}
+        # The cached signature names and their format, replaced as a whole (see _get_signature_names)
+        self._signature_names = (None, [])
+        self._signature_names_lock = threading.Lock()
+        self._connected_profiler_utils = []
+        self._data_columns = []
+        self._has_data_fields = False
+        self._lock = threading.Lock()
+        self._profile_queue = None
+        self._profile_flush_records = None
+        self._spool_directory = None
+        self._collection_pid = None
+        self._collect_records = True
+        self._owns_spool_directory = False
+        self._sink_queue = None
+        self._max_records = self._max_records_per_function = self._max_age = None
+        self.initialize()
+        self.set_retention(max_records=max_records, max_records_per_function=max_records_per_function, max_age=max_age)
         self.disconnect_all()
         self.connect_profiler_utils(profiler_utils)
         self.report_format = report_format
+        # A worker process created by spawn or forkserver inherits the spool directory of the collection
+        spool_directory = os.environ.get(SPOOL_DIRECTORY_VARIABLE)
+        if spool_directory:
+            config = read_collection_config(spool_directory)
+            if config is not None and config["pid"] != os.getpid():
+                self._spool_directory, self._collection_pid, self._collect_records = spool_directory, config["pid"], config["records"]
+                self._start_worker_collection()
 
     # Properties getters and setters
     @property
@@ -73,20 +250,195 @@ class FunctionProfiler(Decorator):
         self._report_format = report_format
 
     @property
-    def profiled_functions():
+    def profiled_functions(self) -> List[Callable]:
         return self._profiled_functions
 
     @property
-    def profiled_functions_signature_name():
-        return [self.get_signature_name(func) for func in self._profiled_functions]
+    def profiled_functions_signature_name(self) -> List[str]:
+        return list(self._get_signature_names())
 
     @property
-    def connected_profiler_utils():
+    def connected_profiler_utils(self) -> List[ProfilerUtils]:
         return self._connected_profiler_utils
 
     @property
-    def profiled_data():
-        return self._profiled_data
+    def data_columns(self) -> List[Union[ProfilerUtils, DataField]]:
+        return self._data_columns
+
+    @property
+    def profiled_data(self) -> ProfiledDataView:
+        return ProfiledDataView(self.record_stores)
+
+    @property
+    def record_stores(self) -> List[RecordStore]:
+        return [record_store for shard_record_stores in self._shards_record_stores(list(self._shards)) for record_store in shard_record_stores]
+
+    @property
+    def cumulative_data(self) -> Dict[int, List]:
+        cumulative_data = {}
+        for function_index, (calls, utils_aggregates) in self._iter_calls_aggregates(self.aggregates, self.unsampled_calls):
+            cumulative_data[function_index] = [calls, [self._estimate_total(aggregate, calls) for aggregate in utils_aggregates]]
+        return cumulative_data
+
+    @property
+    def aggregates(self) -> Dict[int, List]:
+        return self._merge_shards_aggregates([shard[1] for shard in list(self._shards)])
+
+    @property
+    def generator_aggregates(self) -> Dict[int, List]:
+        return self._merge_shards_aggregates([shard[2] for shard in list(self._shards)])
+
+    @property
+    def unsampled_calls(self) -> Dict[int, int]:
+        return self._merge_shards_unsampled_calls([shard[3] for shard in list(self._shards)])
+
+    @property
+    def call_tree(self) -> Dict[Tuple[int, ...], List]:
+        return self._merge_shards_call_trees([shard[4] for shard in list(self._shards)])
+
+    @staticmethod
+    def _merge_shards_call_trees(shards_call_trees: List[Dict[Tuple[int, ...], List]]) -> Dict[Tuple[int, ...], List]:
+        r"""
+        Merges the call trees ``{path: [calls, inclusive_aggregates, exclusive_aggregates]}`` of the shards of the threads.
+        """
+        if len(shards_call_trees) == 1: # Single thread: no merge needed
+            return shards_call_trees[0]
+        merged_call_tree = {}
+        for shard_call_tree in shards_call_trees:
+            for path, (calls, inclusive_aggregates, exclusive_aggregates) in list(shard_call_tree.items()):
+                merged = merged_call_tree.get(path)
+                if merged is None:
+                    merged_call_tree[path] = [calls, [aggregate.copy() for aggregate in inclusive_aggregates], [aggregate.copy() for aggregate in exclusive_aggregates]]
+                    continue
+                merged[0] += calls
+                for merged_aggregates, aggregates in ((merged[1], inclusive_aggregates), (merged[2], exclusive_aggregates)):
+                    for column_index, aggregate in enumerate(aggregates):
+                        if column_index < len(merged_aggregates):
+                            merged_aggregates[column_index].merge(aggregate)
+                        else:
+                            merged_aggregates.append(aggregate.copy())
+        return merged_call_tree
+
+    @property
+    def sampling_rates(self) -> Dict[int, float]:
+        aggregates = self.aggregates
+        sampling_rates = {}
+        for function_index, (calls, _) in self._iter_calls_aggregates(aggregates, self.unsampled_calls):
+            sampled_calls = aggregates[function_index][0] if function_index in aggregates else 0
+            sampling_rates[function_index] = sampled_calls / calls
+        return sampling_rates
+
+    @staticmethod
+    def _iter_calls_aggregates(aggregates: Dict[int, List], unsampled_calls: Dict[int, int]):
+        r"""
+        Iterates over the number of calls (profiled or not) and the aggregates of each called function, in the order of the first profiled call.
+        The functions without any profiled call come last, without aggregates.
+        """
+        for function_index, (calls, utils_aggregates) in list(aggregates.items()):
+            yield function_index, (calls + unsampled_calls.get(function_index, 0), utils_aggregates)
+        for function_index, calls in list(unsampled_calls.items()):
+            if function_index not in aggregates:
+                yield function_index, (calls, [])
+
+    @staticmethod
+    def _estimate_total(aggregate: Aggregate, calls: int) -> Optional[Union[int, float]]:
+        r"""
+        Estimates the total of a data over ``calls`` calls from its aggregate: the total of the values is scaled if some calls were not measured (sampling).
+        """
+        total = aggregate.total
+        if aggregate.count == 0 or aggregate.count >= calls:
+            return total
+        estimate = total * calls / aggregate.count
+        return int(round(estimate)) if isinstance(total, int) else estimate
+
+    @staticmethod
+    def _merge_shards_unsampled_calls(shards_unsampled_calls: List[Dict[int, int]]) -> Dict[int, int]:
+        r"""
+        Merges the numbers of unsampled calls ``{function_index: calls}`` of the shards of the threads.
+        """
+        if len(shards_unsampled_calls) == 1: # Single thread: no merge needed
+            return shards_unsampled_calls[0]
+        unsampled_calls = {}
+        for shard_unsampled_calls in shards_unsampled_calls:
+            for function_index, calls in list(shard_unsampled_calls.items()):
+                unsampled_calls[function_index] = unsampled_calls.get(function_index, 0) + calls
+        return unsampled_calls
+
+    @staticmethod
+    def _merge_shards_aggregates(shards_aggregates: List[Dict[int, List]]) -> Dict[int, List]:
+        r"""
+        Merges the aggregates ``{function_index: [count, [aggregate_0, aggregate_1, ...]]}`` of the shards of the threads.
+        """
+        if len(shards_aggregates) == 1: # Single thread: no merge needed
+            return shards_aggregates[0]
+        merged_aggregates = {}
+        for shard_aggregates in shards_aggregates:
+            for function_index, (calls, utils_aggregates) in list(shard_aggregates.items()):
+                merged = merged_aggregates.get(function_index)
+                if merged is None:
+                    merged_aggregates[function_index] = [calls, [aggregate.copy() for aggregate in utils_aggregates]]
+                    continue
+                merged[0] += calls
+                for utils_index, aggregate in enumerate(utils_aggregates):
+                    if utils_index < len(merged[1]):
+                        merged[1][utils_index].merge(aggregate)
+                    else:
+                        merged[1].append(aggregate.copy())
+        return merged_aggregates
+
+    @property
+    def aggregate_only(self) -> bool:
+        return self._aggregate_only
+
+    @property
+    def profile_generators(self) -> bool:
+        return self._profile_generators
+
+    @property
+    def track_quantiles(self) -> bool:
+        return self._track_quantiles
+
+    @property
+    def max_records(self) -> Optional[int]:
+        return self._max_records
+
+    @property
+    def max_records_per_function(self) -> Optional[int]:
+        return self._max_records_per_function
+
+    @property
+    def max_age(self) -> Optional[float]:
+        return self._max_age
+
+    @property
+    def sampling(self) -> Optional[Sampling]:
+        return self._sampling
+
+    @property
+    def track_call_tree(self) -> bool:
+        return self._track_call_tree
+
+    @property
+    def profile_file(self) -> Optional[str]:
+        return None if self._profile_queue is None else self._profile_queue.file_path
+
+    @property
+    def sinks(self) -> List[Sink]:
+        return [] if self._sink_queue is None else list(self._sink_queue.sinks)
+
+    @property
+    def sink_statistics(self) -> Dict[str, int]:
+        if self._sink_queue is None:
+            return {"pending": 0, "written": 0, "dropped": 0, "errors": 0}
+        return {"pending": self._sink_queue.pending, "written": self._sink_queue.written, "dropped": self._sink_queue.dropped, "errors": self._sink_queue.errors}
+
+    @property
+    def spool_directory(self) -> Optional[str]:
+        return self._spool_directory
+
+    @property
+    def process_ids(self) -> List[int]:
+        return list(dict.fromkeys([os.getpid()] + [shard[5][0] for shard in list(self._shards)]))
 
     # Decorator log format (other way around)
     def set_report_format(self, report_format: str) -> None:
@@ -100,7 +452,7 @@ class FunctionProfiler(Decorator):
 
         .. important::
 
-            The correct format are: "datetime", "function", "cumulative". (see below)
+            The correct format are: "datetime", "function", "cumulative", "statistics", "percentiles", "tree", "process". (see below)
 
             If the ``report_format`` is set to "datetime", the reported string will be formatted as follows:
 
@@ -128,8 +480,60 @@ class FunctionProfiler(Decorator):
                 [function_signature_name] - N calls - data_name : cumulative_data - other_data_name : cumulative_other_date
                 [other_function_signature_name] - N calls - data_name : cumulative_data - other_data_name : cumulative_other_date
 
+            If some calls were not measured (see the ``sampling`` option), the cumulative data are estimated by scaling the totals of the measured calls to all the calls, and the number of measured calls is reported:
+
+            .. code-block:: console
+
+                [function_signature_name] - N calls - sampling rate : 10.00% - data_name : cumulative_data (estimated from M calls)
+
+            If the ``report_format`` is set to "statistics", the reported string will be formatted as follows:
+
+            .. code-block:: console
+
+                [function_signature_name] - N calls - data_name : mean mean_data - std std_data - min min_data - max max_data
+                [other_function_signature_name] - N calls - data_name : mean mean_data - std std_data - min min_data - max max_data
+
+            If the ``report_format`` is set to "percentiles", the reported string will be formatted as follows:
+
+            .. code-block:: console
+
+                [function_signature_name] - N calls - data_name : p50 data - p90 data - p99 data - p999 data
+                [other_function_signature_name] - N calls - data_name : p50 data - p90 data - p99 data - p999 data
+
+            The percentiles are estimated by the quantile sketch of the aggregates with a relative error lower than 1%. This format requires ``track_quantiles``.
+
+            If the ``report_format`` is set to "tree", the reported string will be formatted as follows:
+
+            .. code-block:: console
+
+                [function_signature_name] - N calls - data_name : inclusive_data (self exclusive_data)
+                    [called_function_signature_name] - N calls - data_name : inclusive_data (self exclusive_data)
+                        [other_called_function_signature_name] - N calls - data_name : inclusive_data (self exclusive_data)
+                [other_function_signature_name] - N calls - data_name : inclusive_data (self exclusive_data)
+
+            Each line is a path of the call tree: the calls of a function from a given chain of profiled callers. The inclusive data are the cumulative data of the calls, the exclusive data (self) don't include the data of the profiled calls they made. This format requires ``track_call_tree``.
+
+            If the ``report_format`` is set to "process", the reported string will be formatted as follows:
+
+            .. code-block:: console
+
+                [process PID]
+                    [function_signature_name] - N calls - data_name : cumulative_data - other_data_name : cumulative_other_date
+                [process OTHER_PID]
+                    [function_signature_name] - N calls - data_name : cumulative_data - other_data_name : cumulative_other_date
+
+            Each process reports the cumulative data of the calls it profiled. The data of the worker processes are collected with :meth:`start_process_collection`.
+
             .. warning::
-                The `cumulative` reported format can't be use if the linked ``FunctionProfiler`` returns non-numeric data.
+                The `cumulative`, `statistics` and `percentiles` reported formats ignore the non-numeric data returned by the connected ``ProfilerUtils``.
+
+            .. note::
+                The `cumulative`, `statistics`, `percentiles` and `process` reports are generated from the aggregates updated at each call, their cost depends on the number of functions and not on the number of calls.
+                They are the only formats available in the ``aggregate_only`` mode.
+
+            .. note::
+                With a ``sampling`` policy, the number of calls includes the calls which were not profiled and the `sampling rate` of the function is reported after it.
+                The `statistics` and `percentiles` are computed on the profiled calls.
 
         Parameters
         ----------
@@ -162,8 +566,8 @@ class FunctionProfiler(Decorator):
 
     def extract_loggeg_functions(self) -> List[Callable]:
         r"""
-        Extracts the list containing the functions/methods actually profiled by the ``FunctionProfiler``.
-        The list is sorted by the order of the function calls.
+        Extracts the list containing the functions/methods decorated by the ``FunctionProfiler``.
+        The list is sorted by the order of the function decorations and the index of a function in this list is the ``function_index`` used in the profiled data.
 
         .. note::
 
@@ -172,14 +576,14 @@ class FunctionProfiler(Decorator):
         Returns
         -------
         List[Callable]
-            The list containing the functions/methods actually profiled by the ``FunctionProfiler``.
+            The list containing the functions/methods decorated by the ``FunctionProfiler``.
         """
         return self.profiled_functions
 
     def extract_loggeg_functions_signature_name(self) -> List[str]:
         r"""
-        Extracts the list containing the signature name of the functions/methods actually profiled by the ``FunctionProfiler``.
-        The list is sorted by the order of the function calls.
+        Extracts the list containing the signature name of the functions/methods decorated by the ``FunctionProfiler``.
+        The list is sorted by the order of the function decorations.
 
         .. note::
 
@@ -188,7 +592,7 @@ class FunctionProfiler(Decorator):
         Returns
         -------
         List[str]
-            The list containing the signature name of the functions/methods actually profiled by the ``FunctionProfiler``.
+            The list containing the signature name of the functions/methods decorated by the ``FunctionProfiler``.
         """
         return self.profiled_functions_signature_name
 
@@ -217,6 +621,11 @@ class FunctionProfiler(Decorator):
 
             The list can also be get using the 'profiled_data' attribute.
 
+        .. note::
+
+            The profiled data are stored in compact typed columns (see :class:`pydecorium.decorators.RecordStore`).
+            The returned object is a read-only sequence which materializes the records when they are accessed.
+
         The structure of the list is as follows:
 
         .. code-block:: python
@@ -256,22 +665,288 @@ class FunctionProfiler(Decorator):
             The profiled data reorganized by function.
         """
         reorganized_data = {}
-        for log in self._profiled_data:
+        for log in self.profiled_data:
             function_index = log[1]
             if function_index not in reorganized_data.keys():
                 reorganized_data[function_index] = []
             reorganized_data[function_index].append([log[0], log[2]])
         return reorganized_data
 
+    def extract_cumulative_data(self) -> Dict[int, List]:
+        r"""
+        Extracts the number of calls and the cumulative data of each called function.
+        The dictionary is sorted by the order of the first call of the functions.
+
+        The cumulative data are updated at each call, so they include the records evicted by the retention policy.
+        Only the numeric data are summed, the cumulative value of a non-numeric data is None.
+        The number of calls includes the calls which were not profiled because of the ``sampling`` policy, and the cumulative data of all the calls are estimated from the profiled ones.
+
+        .. note::
+
+            The dictionary can also be get using the 'cumulative_data' attribute.
+
+        The structure of the dictionary is as follows:
+
+        .. code-block:: python
+
+            cumulative_data = {function_index: [calls, [cumulative_data_utils_0, cumulative_data_utils_1, ...]], ...}
+
+        Returns
+        -------
+        Dict[int, List]
+            The number of calls and the cumulative data of each called function.
+        """
+        return self.cumulative_data
+
+    def extract_aggregates(self) -> Dict[int, List]:
+        r"""
+        Extracts the number of calls and the aggregates of the data of each called function.
+        The dictionary is sorted by the order of the first call of the functions.
+
+        Each aggregate is a :class:`pydecorium.decorators.Aggregate` containing the count, the sum, the minimum, the maximum, the mean and the variance of the numeric data collected by a connected ``ProfilerUtils``.
+        The aggregates are updated at each call in O(1), so they include the records evicted by the retention policy and they are available in the ``aggregate_only`` mode.
+        If several threads profiled calls, the aggregates of the threads are merged into a new dictionary.
+
+        .. note::
+
+            The dictionary can also be get using the 'aggregates' attribute.
+
+        The structure of the dictionary is as follows:
+
+        .. code-block:: python
+
+            aggregates = {function_index: [calls, [aggregate_utils_0, aggregate_utils_1, ...]], ...}
+
+        Returns
+        -------
+        Dict[int, List]
+            The number of calls and the aggregates of the data of each called function.
+        """
+        return self.aggregates
+
+    def extract_sampling_rates(self) -> Dict[int, float]:
+        r"""
+        Extracts the fraction of the calls profiled of each called function: the number of profiled calls divided by the number of calls.
+        The rate is 1 for every function if no ``sampling`` policy is set.
+
+        .. note::
+
+            The dictionary can also be get using the 'sampling_rates' attribute.
+
+        Returns
+        -------
+        Dict[int, float]
+            The sampling rate of each called function.
+        """
+        return self.sampling_rates
+
+    def extract_call_tree(self) -> Dict[Tuple[int, ...], List]:
+        r"""
+        Extracts the call tree of the profiled calls (requires ``track_call_tree``).
+
+        Each key is a path of the tree: the tuple of the indices of the profiled functions from the outermost profiled call to the called function.
+        The parent-child edges of the tree are the paths and their prefixes: the path ``(i, j)`` contains the calls of the function ``j`` made by the calls of the function ``i`` at the root of the tree.
+        Each path has the number of calls, the aggregates of the inclusive data and the aggregates of the exclusive data of its calls.
+        The exclusive value of a call is its value minus the sum of the values of the profiled calls it made.
+        It is meaningful for the additive data (runtime, CPU time, memory usage). The exclusive value of a call running several child tasks concurrently can be negative.
+        If several threads profiled calls, the call trees of the threads are merged into a new dictionary.
+
+        .. note::
+
+            The dictionary can also be get using the 'call_tree' attribute.
+
+        The structure of the dictionary is as follows:
+
+        .. code-block:: python
+
+            call_tree = {(function_index, ...): [calls, [inclusive_aggregate_utils_0, ...], [exclusive_aggregate_utils_0, ...]], ...}
+
+        Returns
+        -------
+        Dict[Tuple[int, ...], List]
+            The number of calls and the inclusive and exclusive aggregates of each path of the call tree.
+        """
+        return self.call_tree
+
     # FunctionProfiler methods
+    def set_retention(self, max_records: Optional[int] = None, max_records_per_function: Optional[int] = None, max_age: Optional[float] = None) -> None:
+        r"""
+        Sets the retention policy of the records of the ``FunctionProfiler``.
+
+        - ``max_records``: the records are kept in a ring buffer of ``max_records`` records shared by all the functions.
+        - ``max_records_per_function``: each function has its own ring buffer of ``max_records_per_function`` records.
+        - ``max_age``: the records older than ``max_age`` seconds are evicted. It can be combined with one of the previous options.
+
+        The records already stored are moved to the new stores according to the new policy.
+        The limits apply to the records of all the threads together: each thread keeps at most the limits in its own ring buffers, the records of the finished threads are folded into a single shard kept within the limits, and only the most recent records within the limits are read.
+        The cumulative data (see :meth:`extract_cumulative_data`) are not affected by the eviction of the records, so the "cumulative" report stays exact while the memory used by the records stays bounded.
+
+        Parameters
+        ----------
+        max_records : int
+            The maximum number of records kept by the ``FunctionProfiler``.
+            Default is None (no limit).
+        max_records_per_function : int
+            The maximum number of records kept for each profiled function.
+            Default is None (no limit).
+        max_age : float
+            The maximum age in seconds of the records.
+            Default is None (no limit).
+
+        Raises
+        ------
+        TypeError
+            If ``max_records`` or ``max_records_per_function`` is not an integer or ``max_age`` is not a numeric.
+        ValueError
+            If a limit is not strictly positive or if both ``max_records`` and ``max_records_per_function`` are set.
+        """
+        # The parameters are checked before any change, so a rejected policy leaves the current one in place
+        for name, limit in (("max_records", max_records), ("max_records_per_function", max_records_per_function)):
+            if limit is None:
+                continue
+            if not isinstance(limit, int):
+                raise TypeError(f"The {name} must be an integer.")
+            if limit <= 0:
+                raise ValueError(f"The {name} must be strictly positive.")
+        if max_age is not None:
+            if not isinstance(max_age, (int, float)):
+                raise TypeError("The max_age must be a numeric.")
+            if max_age <= 0:
+                raise ValueError("The max_age must be strictly positive.")
+        if max_records is not None and max_records_per_function is not None:
+            raise ValueError("The max_records and max_records_per_function can't be set together.")
+        previous_records = list(merge_records(self.record_stores))
+        self._max_records = max_records
+        self._max_records_per_function = max_records_per_function
+        self._max_age = max_age
+        for shard_record_stores, *_ in list(self._shards):
+            shard_record_stores.clear()
+        # The previous records are moved to the stores of the current thread
+        record_stores, *_ = self._get_shard()
+        missing_values = self._missing_values()
+        for timestamp, function_index, data in previous_records:
+            values = [data.get(utils_index, missing_value) for utils_index, missing_value in enumerate(missing_values)]
+            self._get_record_store(record_stores, function_index).append(timestamp, function_index, values)
+
+    def _new_record_store(self) -> RecordStore:
+        r"""
+        Creates an empty store according to the connected profiler utils and the retention policy.
+        """
+        capacity = self._max_records if self._max_records_per_function is None else self._max_records_per_function
+        return RecordStore([column.data_typecode for column in self._data_columns], capacity=capacity, max_age=self._max_age)
+
+    def _get_record_store(self, record_stores: Dict[Optional[int], RecordStore], function_index: int) -> RecordStore:
+        r"""
+        Returns the store of the records of the function registered at ``function_index`` among the ``record_stores`` of a thread.
+        """
+        key = None if self._max_records_per_function is None else function_index
+        record_store = record_stores.get(key)
+        if record_store is None:
+            record_store = record_stores[key] = self._new_record_store()
+        return record_store
+
+    def _get_shard(self) -> Tuple[Dict[Optional[int], RecordStore], Dict[int, List], Dict[int, List], Dict[int, int], Dict[Tuple[int, ...], List], Tuple[int, Optional[int], str]]:
+        r"""
+        Returns the record stores, the aggregates, the generator aggregates, the numbers of unsampled calls, the call tree and the process identifier, the thread identifier and the thread name of the current thread.
+
+        Each thread profiles its calls in its own shard, so the threads never write in the same store or aggregate and no lock is taken per call.
+        While a profile file is open, the records are appended under the store lock of the thread, so another thread can move them to the file (see :meth:`flush_profile_file`).
+        The shards are merged when the profiled data are read.
+        When a thread profiles its first call, the shards of the finished threads are folded into the retired shard (see :meth:`_reclaim_shards`).
+        """
+        try:
+            return self._local.shard
+        except AttributeError:
+            pass
+        thread = threading.current_thread()
+        shard = ({}, {}, {}, {}, {}, (os.getpid(), thread.ident, thread.name))
+        store_lock = threading.Lock()
+        with self._lock:
+            self._reclaim_shards()
+            self._shards.append(shard)
+            self._thread_shards.append((shard, thread, store_lock))
+        self._local.store_lock = store_lock
+        self._local.shard = shard
+        return shard
+
+    def _reclaim_shards(self) -> None:
+        r"""
+        Folds the shards of the finished threads into the retired shard and removes them, so the number of shards is bounded by the number of live threads when the threads are created and finished continuously.
+
+        The aggregates, the numbers of unsampled calls and the call trees are merged and the records are kept within the retention limits (see :meth:`_shards_record_stores`).
+        The retired shard is replaced as a whole, so the readers never see a partly folded shard.
+        The lock must be held by the caller.
+        """
+        finished_shards = [shard for shard, thread, _ in self._thread_shards if not thread.is_alive()]
+        if not finished_shards:
+            return
+        folded_shards = finished_shards if self._retired_shard is None else [self._retired_shard] + finished_shards
+        record_stores = [record_store for shard_record_stores in self._shards_record_stores(folded_shards) for record_store in shard_record_stores if len(record_store)]
+        retired_shard = (
+            dict(enumerate(record_stores)),
+            self._merge_shards_aggregates([shard[1] for shard in folded_shards]),
+            self._merge_shards_aggregates([shard[2] for shard in folded_shards]),
+            self._merge_shards_unsampled_calls([shard[3] for shard in folded_shards]),
+            self._merge_shards_call_trees([shard[4] for shard in folded_shards]),
+            (os.getpid(), None, "finished threads"),
+        )
+        folded_ids = {id(shard) for shard in folded_shards}
+        self._thread_shards = [thread_shard for thread_shard in self._thread_shards if id(thread_shard[0]) not in folded_ids]
+        self._shards = [retired_shard] + [shard for shard in self._shards if id(shard) not in folded_ids]
+        self._retired_shard = retired_shard
+
+    def _shards_record_stores(self, shards: List[Tuple]) -> List[List[RecordStore]]:
+        r"""
+        Returns the record stores of each shard, with the retention limits applied to all the shards together.
+
+        Each thread appends its records to its own ring buffers without lock, so the shards can hold more than ``max_records`` records together (or more than ``max_records_per_function`` records of a function).
+        Only the most recent records within the limits are returned: a store holding older records is replaced by a copy of its most recent records (see :func:`count_recent_records`), so the stores of the other threads are never modified.
+        """
+        shards_record_stores = [list(shard[0].values()) for shard in shards]
+        for record_stores in shards_record_stores:
+            for record_store in record_stores:
+                record_store.expire()
+        limit = self._max_records if self._max_records_per_function is None else self._max_records_per_function
+        if limit is None:
+            return shards_record_stores
+        # The stores limited together: all the stores, or the stores of each function
+        groups = {}
+        for shard_index, record_stores in enumerate(shards_record_stores):
+            for store_index, record_store in enumerate(record_stores):
+                if len(record_store):
+                    key = None if self._max_records_per_function is None else record_store.get_record(0)[1]
+                    groups.setdefault(key, []).append((shard_index, store_index))
+        for positions in groups.values():
+            record_stores = [shards_record_stores[shard_index][store_index] for shard_index, store_index in positions]
+            if sum(map(len, record_stores)) <= limit:
+                continue
+            for (shard_index, store_index), record_store, count in zip(positions, record_stores, count_recent_records(record_stores, limit)):
+                if count < len(record_store):
+                    shards_record_stores[shard_index][store_index] = record_store.tail(count)
+        return shards_record_stores
+
     def initialize(self) -> None:
         r"""
         Initializes the ``FunctionProfiler`` by removing all the profiled data.
 
         The connected profiler utils are not removed.
+        The registered functions are not removed either, because the decorated functions keep their index in the registry.
         """
-        self._profiled_data = []
-        self._profiled_functions = []
+        self._shards = []
+        self._thread_shards = [] # The shards of the threads of the process, with their thread and their store lock
+        self._retired_shard = None # The data of the finished threads
+        self._local = threading.local()
+        if self._sink_queue is not None:
+            self._sink_queue.clear_signature_names()
+
+    def _set_compiled_signature_name_format(self, signature_name_format: str) -> None:
+        r"""
+        Sets the signature name format and invalidates the signature names cached by the sinks (see :meth:`connect_sinks`).
+        """
+        super()._set_compiled_signature_name_format(signature_name_format)
+        sink_queue = getattr(self, "_sink_queue", None) # Not set yet when called by the constructor of the Decorator
+        if sink_queue is not None:
+            sink_queue.clear_signature_names()
 
     def disconnect_all(self) -> None:
         r"""
@@ -280,24 +955,37 @@ class FunctionProfiler(Decorator):
         .. note::
 
             The profiled data are removed.
+
+        Raises
+        ------
+        ValueError
+            If a profile file is open.
         """
+        self._check_profile_file_closed()
         self._connected_profiler_utils = []
+        self._data_columns = []
+        self._has_data_fields = False
         self.initialize()
     
-    def connect_profiler_utils(self, profiler_utils: Union[Type, List[Type]] = None) -> None:
+    def connect_profiler_utils(self, profiler_utils: Union[Type, ProfilerUtils, List[Union[Type, ProfilerUtils]]] = None) -> None:
         r"""
         Connects a sub-class of the ``ProfilerUtils`` class to the ``FunctionProfiler``.
         If a logger utils is None, it will be ignored.
 
+        An instance of a sub-class of ``ProfilerUtils`` can also be connected to use a configured profiler utils, for example ``Timer(clock="process_time_ns")``.
+        A profiler utils is not connected if a profiler utils of the same class is already connected.
+
         Parameters
         ----------
-        profiler_utils : Union[Type, List[Type]]
-            The sub-class of the ``ProfilerUtils`` class to connect to the ``FunctionProfiler``.
+        profiler_utils : Union[Type, ProfilerUtils, List[Union[Type, ProfilerUtils]]]
+            The sub-class of the ``ProfilerUtils`` class (or its instance) to connect to the ``FunctionProfiler``.
 
         Raises
         ------
         TypeError
-            If the logger is not an instance of ``ProfilerUtils`` or a list of ``FunctionProfiler``.
+            If the logger is not a sub-class or an instance of ``ProfilerUtils`` or a list of them.
+        ValueError
+            If a profile file is open, because the columns of the profile file can't change.
         """
         # Recursively connect the logger
         if isinstance(profiler_utils, list):
@@ -306,177 +994,2134 @@ class FunctionProfiler(Decorator):
         else:
             if profiler_utils is None:
                 return
-            if not issubclass(profiler_utils, ProfilerUtils):
-                raise TypeError("The profiler utils must be a sub-class of ProfilerUtils.")
+            if isinstance(profiler_utils, ProfilerUtils):
+                utils = profiler_utils
+            elif isinstance(profiler_utils, type) and issubclass(profiler_utils, ProfilerUtils):
+                utils = None
+            else:
+                raise TypeError("The profiler utils must be a sub-class or an instance of ProfilerUtils.")
             # Testing if the profiler utils is already connected
-            if any(isinstance(utils, profiler_utils) for utils in self._connected_profiler_utils):
+            utils_class = profiler_utils if utils is None else type(utils)
+            if any(isinstance(connected_utils, utils_class) for connected_utils in self._connected_profiler_utils):
                 return
-            self._connected_profiler_utils.append(profiler_utils()) # Add an instance of the profiler utils. It will be used to collect the data.
+            self._check_profile_file_closed()
+            if utils is None:
+                utils = profiler_utils() # Add an instance of the profiler utils. It will be used to collect the data.
+            self._connected_profiler_utils.append(utils)
+            if utils.data_fields is None:
+                columns = [utils]
+            else:
+                columns = [DataField(utils, field_index) for field_index in range(len(utils.data_fields))]
+                self._has_data_fields = True
+            self._data_columns.extend(columns)
+            for record_store in self.record_stores:
+                for column in columns:
+                    record_store.add_column(column.data_typecode)
     
-    # Wrapper method
-    def _wrapper(self, func, *args, **kwargs):
+    def calibrate(self, number: int = 10000) -> Dict[int, int]:
         r"""
-        Compute the profiled data of the function execution.
-        """
-        date = datetime.datetime.now()
-        data = {}
-        # Test if the function is already profiled
-        function_index = 0
-        while (function_index < len(self._profiled_functions)) and (self._profiled_functions[function_index] is not func):
-            function_index += 1
-        if function_index == len(self._profiled_functions):
-            self._profiled_functions.append(func)
-        # Pre-execute
-        for utils_index, utils in enumerate(self._connected_profiler_utils):
-            utils.pre_execute(func, *args, **kwargs)
-        # Execute the function
-        outputs = func(*args, **kwargs)
-        # Post-execute
-        for utils_index, utils in enumerate(self._connected_profiler_utils):
-            utils.post_execute(func, *args, **kwargs)
-        # Handle the logged data
-        for utils_index, utils in enumerate(self._connected_profiler_utils):
-            data[utils_index] = utils.handle_result()
-        # Append the logged data
-        self._profiled_data.append([date, function_index, data])        
-        return outputs
+        Measures the overhead of the connected timers through the whole profiling: the median runtime measured for an empty function.
 
-    # Report methods
-    def generate_report_datetime(self) -> str:
-        r"""
-        Generates the report of the ``FunctionProfiler`` in the "datetime" format.
+        The runtime measured by a :class:`pydecorium.decorators.Timer` includes the execution of the profiler utils connected after it and the profiling code of the ``FunctionProfiler``.
+        The measured overhead is stored in the ``overhead`` attribute of each connected ``Timer`` and subtracted from the next runtimes if its ``subtract_overhead`` is True.
+        The calibration doesn't add any record or aggregate.
 
-        .. seealso::
+        .. code-block:: python
 
-            :func:`pydecorium.decorators.FunctionProfiler.set_report_format()`
+            profiler = FunctionProfiler([Timer(subtract_overhead=True), Memory])
+            profiler.calibrate()
+
+        Parameters
+        ----------
+        number : int
+            The number of measures.
+            Default is 10000.
 
         Returns
         -------
-        str
-            The report of the ``FunctionProfiler`` in the "datetime" format.
+        Dict[int, int]
+            The overhead in nanoseconds of each connected ``Timer``, keyed by its index in ``connected_profiler_utils``.
 
+        Raises
+        ------
+        TypeError
+            If `number` is not an integer.
+        ValueError
+            If `number` is not strictly positive.
         """
-        report = ""
-        for log in self._profiled_data:
-            # Extract the data
-            date = log[0]
-            function_index = log[1]
-            data = log[2]
-            # Extract the function signature name
-            function_signature_name = self.get_signature_name(self._profiled_functions[function_index])
-            report += f"[{date}] - [{function_signature_name}]"
-            # Writting the data
-            for utils_index, data_value in data.items():
-                utils = self._connected_profiler_utils[utils_index]
-                report += f" - {utils.string_result(data_value)}"
-            report += "\n"
-        return report
-
-    def generate_report_function(self) -> str:
+        # Parameter check
+        if not isinstance(number, int):
+            raise TypeError("The parameter `number` must be an integer.")
+        if number <= 0:
+            raise ValueError("The parameter `number` must be strictly positive.")
+        timers = {index: utils for index, utils in enumerate(self._connected_profiler_utils) if isinstance(utils, Timer)}
+        subtract_overhead = {index: timer.subtract_overhead for index, timer in timers.items()}
+        for timer in timers.values():
+            timer.subtract_overhead = False
+        def empty_function():
+            pass
+        runtimes = {index: [] for index in timers}
+        try:
+            for _ in range(number):
+                # Same sequence as the profiling of a call
+                tokens = [utils.pre_execute(empty_function) for utils in self._connected_profiler_utils]
+                empty_function()
+                tokens = [utils.post_execute(token, empty_function) for utils, token in zip(self._connected_profiler_utils, tokens)]
+                values = [utils.handle_result(token) for utils, token in zip(self._connected_profiler_utils, tokens)]
+                for index in timers:
+                    if values[index] is not None: # Call not measured by a sampled timer
+                        runtimes[index].append(values[index])
+        finally:
+            for index, timer in timers.items():
+                timer.subtract_overhead = subtract_overhead[index]
+        for index, timer in timers.items():
+            if runtimes[index]: # A sampled timer can measure no call, its overhead is then kept
+                timer.overhead = int(statistics.median(runtimes[index]))
+        return {index: timer.overhead for index, timer in timers.items()}
+
+    # Functions registry
+    def _register_function(self, func) -> int:
         r"""
-        Generates the report of the ``FunctionProfiler`` in the "function" format.
+        Registers a function in the ``FunctionProfiler`` and returns its index.
 
-        .. seealso::
+        The registry is keyed by the identity of the function, so registering the same function twice returns the same index.
+        The registered functions are kept in ``profiled_functions``, so their identity can't be reused by another object.
 
-            :func:`pydecorium.decorators.FunctionProfiler.set_report_format()`
+        Parameters
+        ----------
+        func : Callable
+            The function to register.
 
         Returns
         -------
-        str
-            The report of the ``FunctionProfiler`` in the "function" format.
+        int
+            The index of the function in ``profiled_functions``.
         """
-        report = ""
-        # Reorganize the data by function
-        reorganized_data = self.extract_profiled_data_reorganized_by_function()
-        # Write the report
-        for function_index, logs in reorganized_data.items():
-            # Extract the function signature name
-            function_signature_name = self.get_signature_name(self._profiled_functions[function_index])
-            report += f"[{function_signature_name}]\n"
-            # Read the data
-            for log in logs:
-                date = log[0]
-                data = log[1]
-                report += f"\t[{date}]"
-                # Writting the data
-                for utils_index, data_value in data.items():
-                    utils = self._connected_profiler_utils[utils_index]
-                    report += f" - {utils.string_result(data_value)}"
-                report += "\n"
-        return report
+        function_index = self._function_registry.get(id(func))
+        if function_index is not None:
+            return function_index
+        with self._lock:
+            function_index = self._function_registry.get(id(func))
+            if function_index is None:
+                function_index = len(self._profiled_functions)
+                self._profiled_functions.append(func)
+                self._function_registry[id(func)] = function_index
+        return function_index
 
-    def generate_report_cumulative(self) -> str:
+    # Wrapper method
+    def _bind_wrapper(self, func):
         r"""
-        Generates the report of the ``FunctionProfiler`` in the "cumulative" format.
-
-        .. seealso::
-
-            :func:`pydecorium.decorators.FunctionProfiler.set_report_format()`
+        Registers the function at decoration time and binds its index to the profiling wrapper.
+        If ``profile_generators`` is True, the (asynchronous) generator functions are bound to the wrapper profiling the iteration of their generators.
+        """
+        function_index = self._register_function(func)
+        if self._profile_generators:
+            if inspect.isgeneratorfunction(func):
+                return functools.partial(self._profile_generator, func, function_index)
+            if inspect.isasyncgenfunction(func):
+                return functools.partial(self._profile_async_generator, func, function_index)
+        profile = self._profile if self._sampling is None else self._profile_sampled
+        if self._track_call_tree:
+            return functools.partial(self._profile_tree, profile, func, function_index)
+        return functools.partial(profile, func, function_index)
+
+    def _bind_async_wrapper(self, func):
+        r"""
+        Registers the coroutine function at decoration time and binds its index to the profiling coroutine wrapper.
+        """
+        function_index = self._register_function(func)
+        profile_async = self._profile_async if self._sampling is None else self._profile_async_sampled
+        if self._track_call_tree:
+            return functools.partial(self._profile_async_tree, profile_async, func, function_index)
+        return functools.partial(profile_async, func, function_index)
 
-        Returns
-        -------
-        str
-            The report of the ``FunctionProfiler`` in the "cumulative" format.
+    def _wrapper(self, func, *args, **kwargs):
+        r"""
+        Compute the profiled data of the function execution.
         """
-        report = ""
-        # Reorganize the data by function
-        reorganized_data = self.extract_profiled_data_reorganized_by_function()
-        # Write the report
-        for function_index, logs in reorganized_data.items():
-            # Extract the function signature name
-            function_signature_name = self.get_signature_name(self._profiled_functions[function_index])
-            report += f"[{function_signature_name}]"
-            # Read the data
-            calls = len(logs)
-            cumulative_data = {}
-            for log in logs:
-                data = log[1]
-                for utils_index, data_value in data.items():
-                    if utils_index not in cumulative_data.keys():
-                        cumulative_data[utils_index] = 0
-                    cumulative_data[utils_index] += data_value
-            report += f" - {calls} calls"
-            for utils_index, data_value in cumulative_data.items():
-                utils = self._connected_profiler_utils[utils_index]
-                report += f" - {utils.string_result(data_value)}"
-            report += "\n"
-        return report
+        return self._bind_wrapper(func)(*args, **kwargs)
 
-    def generate_report(self) -> str:
+    async def _async_wrapper(self, func, *args, **kwargs):
+        r"""
+        Compute the profiled data of the coroutine function execution.
         """
-        Generates the report of the ``FunctionProfiler`` according to the log format.
+        return await self._bind_async_wrapper(func)(*args, **kwargs)
 
-        .. seealso::
+    def _profile_tree(self, profile: Callable, func, function_index: int, *args, **kwargs):
+        r"""
+        Compute the profiled data of the execution of the function registered at ``function_index`` with ``profile`` and adds the call to the call tree.
+
+        The active profiled call of the current thread or asynchronous task is kept in a context variable: the new call is pushed as its child during the execution and its values are added to the call tree when it finishes (see :meth:`_exit_call`).
+        The calls which are not profiled because of the sampling policy are in the call tree (their profiled children are attached to them) but have no value.
+        """
+        frame = _CallFrame(function_index, self._call_frame.get())
+        context_token = self._call_frame.set(frame)
+        try:
+            outputs = profile(func, function_index, *args, **kwargs)
+        finally:
+            self._call_frame.reset(context_token)
+        self._exit_call(frame)
+        return outputs
+
+    async def _profile_async_tree(self, profile_async: Callable, func, function_index: int, *args, **kwargs):
+        r"""
+        Compute the profiled data of the execution of the coroutine function registered at ``function_index`` with ``profile_async`` and adds the call to the call tree (see :meth:`_profile_tree`).
+        The tasks created by the coroutine inherit its context, so their profiled calls are its children.
+        """
+        frame = _CallFrame(function_index, self._call_frame.get())
+        context_token = self._call_frame.set(frame)
+        try:
+            outputs = await profile_async(func, function_index, *args, **kwargs)
+        finally:
+            self._call_frame.reset(context_token)
+        self._exit_call(frame)
+        return outputs
+
+    def _exit_call(self, frame: "_CallFrame") -> None:
+        r"""
+        Adds a finished call to the call tree of the current thread: its inclusive values, its exclusive values (the inclusive values minus the values of its children) and its values to the children values of its parent.
+        """
+        try:
+            call_tree = self._local.shard[4]
+        except AttributeError:
+            call_tree = self._get_shard()[4]
+        node = call_tree.get(frame.path)
+        if node is None:
+            node = call_tree[frame.path] = [0, [], []]
+        node[0] += 1
+        values = frame.values
+        if values is None: # Call not profiled (sampling)
+            return
+        inclusive_aggregates, exclusive_aggregates = node[1], node[2]
+        while len(inclusive_aggregates) < len(values):
+            inclusive_aggregates.append(Aggregate(quantiles=self._track_quantiles))
+            exclusive_aggregates.append(Aggregate(quantiles=self._track_quantiles))
+        children_values = frame.children_values
+        parent = frame.parent
+        if parent is not None and parent.children_values is None:
+            parent.children_values = [0] * len(values)
+        for column_index, value in enumerate(values):
+            if not isinstance(value, (int, float)):
+                continue
+            inclusive_aggregates[column_index].add(value)
+            exclusive_aggregates[column_index].add(value if children_values is None else value - children_values[column_index])
+            if parent is not None:
+                parent.children_values[column_index] += value
+
+    def _count_unsampled(self, function_index: int) -> None:
+        r"""
+        Counts a call of the function registered at ``function_index`` which is not profiled because of the sampling policy.
+        """
+        try:
+            unsampled_calls = self._local.shard[3]
+        except AttributeError:
+            unsampled_calls = self._get_shard()[3]
+        unsampled_calls[function_index] = unsampled_calls.get(function_index, 0) + 1
+
+    def _profile_sampled(self, func, function_index: int, *args, **kwargs):
+        r"""
+        Compute the profiled data of the execution of the function registered at ``function_index`` if the call is selected by the ``sampling`` policy.
+        The calls which are not selected are only counted.
+
+        If the policy uses the feedback of the profiled calls (see :class:`pydecorium.decorators.Sampling`), the runtime of the function and the overhead of its profiling are given to the policy.
+        """
+        sampling = self._sampling
+        if not sampling.sample(function_index):
+            self._count_unsampled(function_index)
+            return func(*args, **kwargs)
+        if not sampling.uses_feedback:
+            return self._profile(func, function_index, *args, **kwargs)
+        start = time.perf_counter_ns()
+        timestamp = time.time_ns()
+        connected_profiler_utils = self._connected_profiler_utils
+        tokens = [utils.pre_execute(func, *args, **kwargs) for utils in connected_profiler_utils]
+        function_start = time.perf_counter_ns()
+        try:
+            outputs = func(*args, **kwargs)
+        except BaseException:
+            self._abort_execute(connected_profiler_utils, tokens, func, args, kwargs)
+            raise
+        function_end = time.perf_counter_ns()
+        tokens = [utils.post_execute(token, func, *args, **kwargs) for utils, token in zip(connected_profiler_utils, tokens)]
+        values = [utils.handle_result(token) for utils, token in zip(connected_profiler_utils, tokens)]
+        self._store(timestamp, function_index, values)
+        end = time.perf_counter_ns()
+        runtime = function_end - function_start
+        sampling.update(function_index, runtime, end - start - runtime)
+        return outputs
+
+    async def _profile_async_sampled(self, func, function_index: int, *args, **kwargs):
+        r"""
+        Compute the profiled data of the execution of the coroutine function registered at ``function_index`` if the call is selected by the ``sampling`` policy (see :meth:`_profile_sampled`).
+        The runtime given to the policy includes the time the coroutine is suspended.
+        """
+        sampling = self._sampling
+        if not sampling.sample(function_index):
+            self._count_unsampled(function_index)
+            return await func(*args, **kwargs)
+        if not sampling.uses_feedback:
+            return await self._profile_async(func, function_index, *args, **kwargs)
+        start = time.perf_counter_ns()
+        timestamp = time.time_ns()
+        connected_profiler_utils = self._connected_profiler_utils
+        tokens = [utils.pre_execute(func, *args, **kwargs) for utils in connected_profiler_utils]
+        function_start = time.perf_counter_ns()
+        try:
+            outputs = await func(*args, **kwargs)
+        except BaseException:
+            self._abort_execute(connected_profiler_utils, tokens, func, args, kwargs)
+            raise
+        function_end = time.perf_counter_ns()
+        tokens = [utils.post_execute(token, func, *args, **kwargs) for utils, token in zip(connected_profiler_utils, tokens)]
+        values = [utils.handle_result(token) for utils, token in zip(connected_profiler_utils, tokens)]
+        self._store(timestamp, function_index, values)
+        end = time.perf_counter_ns()
+        runtime = function_end - function_start
+        sampling.update(function_index, runtime, end - start - runtime)
+        return outputs
+
+    def _profile(self, func, function_index: int, *args, **kwargs):
+        r"""
+        Compute the profiled data of the execution of the function registered at ``function_index``.
+        """
+        timestamp = time.time_ns()
+        connected_profiler_utils = self._connected_profiler_utils
+        # Pre-execute: the state of the call is kept in the tokens, not in the profiler utils
+        tokens = [utils.pre_execute(func, *args, **kwargs) for utils in connected_profiler_utils]
+        # Execute the function
+        try:
+            outputs = func(*args, **kwargs)
+        except BaseException:
+            self._abort_execute(connected_profiler_utils, tokens, func, args, kwargs)
+            raise
+        # Post-execute
+        tokens = [utils.post_execute(token, func, *args, **kwargs) for utils, token in zip(connected_profiler_utils, tokens)]
+        # Handle the logged data
+        values = [utils.handle_result(token) for utils, token in zip(connected_profiler_utils, tokens)]
+        self._store(timestamp, function_index, values)
+        return outputs
+
+    async def _profile_async(self, func, function_index: int, *args, **kwargs):
+        r"""
+        Compute the profiled data of the execution of the coroutine function registered at ``function_index``.
+
+        The coroutine is awaited between the pre-execution and the post-execution, so the data cover the whole execution of the coroutine, including the time it is suspended.
+        The tokens are local to the coroutine, so the interleaved tasks of an event loop don't overwrite each other's measurements.
+        """
+        timestamp = time.time_ns()
+        connected_profiler_utils = self._connected_profiler_utils
+        # Pre-execute
+        tokens = [utils.pre_execute(func, *args, **kwargs) for utils in connected_profiler_utils]
+        # Execute the coroutine
+        try:
+            outputs = await func(*args, **kwargs)
+        except BaseException:
+            self._abort_execute(connected_profiler_utils, tokens, func, args, kwargs)
+            raise
+        # Post-execute
+        tokens = [utils.post_execute(token, func, *args, **kwargs) for utils, token in zip(connected_profiler_utils, tokens)]
+        # Handle the logged data
+        values = [utils.handle_result(token) for utils, token in zip(connected_profiler_utils, tokens)]
+        self._store(timestamp, function_index, values)
+        return outputs
+
+    def _profile_generator(self, func, function_index: int, *args, **kwargs):
+        r"""
+        Returns a generator profiling the iteration of the generator returned by the function registered at ``function_index``.
+
+        Each step of the iteration (``next()``, ``send()`` or ``throw()``) is profiled by the connected profiler utils and the values of the steps are summed, so the record of the iteration contains the runtime and the memory usage of the whole iteration, without the time spent by the consumer between the steps.
+        The record is stored when the generator is exhausted or closed (``close()``, end of a ``for`` loop with ``break``, garbage collection); an iteration interrupted by an exception is not stored, as a call raising an exception.
+        The number of items yielded and the throughput (items per second of the wall time between the first step and the last one) of the iteration are added to the ``generator_aggregates``.
+
+        With a ``sampling`` policy, the whole iteration of a generator is profiled or not: the generators which are not selected are returned unchanged and their call is only counted.
+        The feedback of the policies adapting their rate is not given for the generators.
+
+        With ``track_call_tree``, the iteration is a call of the call tree, child of the profiled call active when the generator is created: the profiled calls made during its steps are its children.
+        """
+        if self._sampling is not None and not self._sampling.sample(function_index):
+            self._count_unsampled(function_index)
+            return func(*args, **kwargs)
+        timestamp = time.time_ns()
+        generator = func(*args, **kwargs)
+        frame = _CallFrame(function_index, self._call_frame.get()) if self._track_call_tree else None
+        return self._iterate_generator(generator, func, function_index, timestamp, args, kwargs, frame)
+
+    def _iterate_generator(self, generator, func, function_index: int, timestamp: int, args: tuple, kwargs: dict, frame: Optional["_CallFrame"] = None):
+        r"""
+        Iterates over ``generator`` profiling each step (see :meth:`_profile_generator`).
+        """
+        connected_profiler_utils = self._connected_profiler_utils
+        totals = [None] * len(connected_profiler_utils)
+        items = 0
+        start = time.perf_counter_ns()
+        sent, thrown = None, None
+        while True:
+            tokens = [utils.pre_execute(func, *args, **kwargs) for utils in connected_profiler_utils]
+            context_token = None if frame is None else self._call_frame.set(frame)
+            try:
+                item = generator.send(sent) if thrown is None else generator.throw(thrown)
+            except StopIteration as stop:
+                end = time.perf_counter_ns()
+                self._add_generator_step(totals, tokens, func, args, kwargs)
+                self._finish_generator(frame, timestamp, function_index, totals, items, end - start)
+                return stop.value
+            except BaseException:
+                self._abort_execute(connected_profiler_utils, tokens, func, args, kwargs)
+                raise
+            finally:
+                if context_token is not None:
+                    self._call_frame.reset(context_token)
+            end = time.perf_counter_ns()
+            self._add_generator_step(totals, tokens, func, args, kwargs)
+            items += 1
+            try:
+                sent, thrown = (yield item), None
+            except GeneratorExit:
+                generator.close()
+                self._finish_generator(frame, timestamp, function_index, totals, items, end - start)
+                raise
+            except BaseException as exception:
+                sent, thrown = None, exception
+
+    def _profile_async_generator(self, func, function_index: int, *args, **kwargs):
+        r"""
+        Returns an asynchronous generator profiling the iteration of the asynchronous generator returned by the function registered at ``function_index`` (see :meth:`_profile_generator`).
+        """
+        if self._sampling is not None and not self._sampling.sample(function_index):
+            self._count_unsampled(function_index)
+            return func(*args, **kwargs)
+        timestamp = time.time_ns()
+        generator = func(*args, **kwargs)
+        frame = _CallFrame(function_index, self._call_frame.get()) if self._track_call_tree else None
+        return self._iterate_async_generator(generator, func, function_index, timestamp, args, kwargs, frame)
+
+    async def _iterate_async_generator(self, generator, func, function_index: int, timestamp: int, args: tuple, kwargs: dict, frame: Optional["_CallFrame"] = None):
+        r"""
+        Iterates over the asynchronous ``generator`` profiling each step (see :meth:`_profile_generator`).
+        """
+        connected_profiler_utils = self._connected_profiler_utils
+        totals = [None] * len(connected_profiler_utils)
+        items = 0
+        start = time.perf_counter_ns()
+        sent, thrown = None, None
+        while True:
+            tokens = [utils.pre_execute(func, *args, **kwargs) for utils in connected_profiler_utils]
+            context_token = None if frame is None else self._call_frame.set(frame)
+            try:
+                item = await (generator.asend(sent) if thrown is None else generator.athrow(thrown))
+            except StopAsyncIteration:
+                end = time.perf_counter_ns()
+                self._add_generator_step(totals, tokens, func, args, kwargs)
+                self._finish_generator(frame, timestamp, function_index, totals, items, end - start)
+                return
+            except BaseException:
+                self._abort_execute(connected_profiler_utils, tokens, func, args, kwargs)
+                raise
+            finally:
+                if context_token is not None:
+                    self._call_frame.reset(context_token)
+            end = time.perf_counter_ns()
+            self._add_generator_step(totals, tokens, func, args, kwargs)
+            items += 1
+            try:
+                sent, thrown = (yield item), None
+            except GeneratorExit:
+                await generator.aclose()
+                self._finish_generator(frame, timestamp, function_index, totals, items, end - start)
+                raise
+            except BaseException as exception:
+                sent, thrown = None, exception
+
+    @staticmethod
+    def _abort_execute(connected_profiler_utils: List[ProfilerUtils], tokens: List, func, args: tuple, kwargs: dict) -> None:
+        r"""
+        Releases the state of a call which raised an exception in each profiler utils (see :meth:`pydecorium.decorators.ProfilerUtils.abort_execute`).
+        """
+        for utils, token in zip(connected_profiler_utils, tokens):
+            utils.abort_execute(token, func, *args, **kwargs)
+
+    def _add_generator_step(self, totals: List, tokens: List, func, args: tuple, kwargs: dict) -> None:
+        r"""
+        Post-executes the profiler utils for a step of a generator and adds the values of the step to the ``totals`` of the iteration.
+        The numeric values are summed, the last value is kept for the other data and the None values are ignored.
+        """
+        for utils_index, (utils, token) in enumerate(zip(self._connected_profiler_utils, tokens)):
+            value = utils.handle_result(utils.post_execute(token, func, *args, **kwargs))
+            if value is None: # Step not measured (sampling for example)
+                continue
+            total = totals[utils_index]
+            if total is not None:
+                if isinstance(value, (int, float)) and isinstance(total, (int, float)):
+                    value += total
+                elif isinstance(value, tuple) and isinstance(total, tuple):
+                    value = tuple(field_value + field_total if isinstance(field_value, (int, float)) and isinstance(field_total, (int, float)) else field_value for field_value, field_total in zip(value, total))
+            totals[utils_index] = value
+
+    def _finish_generator(self, frame: Optional["_CallFrame"], timestamp: int, function_index: int, totals: List, items: int, elapsed: int) -> None:
+        r"""
+        Stores the record of a finished iteration of a generator and adds it to the call tree if ``frame`` is not None.
+        """
+        if frame is None:
+            self._store_generator(timestamp, function_index, totals, items, elapsed)
+            return
+        context_token = self._call_frame.set(frame)
+        try:
+            self._store_generator(timestamp, function_index, totals, items, elapsed)
+        finally:
+            self._call_frame.reset(context_token)
+        self._exit_call(frame)
+
+    def _store_generator(self, timestamp: int, function_index: int, totals: List, items: int, elapsed: int) -> None:
+        r"""
+        Stores the record of a finished iteration of a generator and updates the generator aggregates of the function.
+        """
+        self._store(timestamp, function_index, totals)
+        try:
+            generator_aggregates = self._local.shard[2]
+        except AttributeError:
+            generator_aggregates = self._get_shard()[2]
+        function_aggregates = generator_aggregates.get(function_index)
+        if function_aggregates is None:
+            function_aggregates = generator_aggregates[function_index] = [0, [Aggregate(quantiles=self._track_quantiles) for _ in self.generator_data]]
+        function_aggregates[0] += 1
+        items_aggregate, throughput_aggregate = function_aggregates[1]
+        items_aggregate.add(items)
+        if elapsed > 0:
+            throughput_aggregate.add(items * 1e9 / elapsed)
+
+    def _store(self, timestamp: int, function_index: int, values: List) -> None:
+        r"""
+        Appends the record of a call in the shard of the current thread and updates the aggregates of the function.
+        """
+        if self._has_data_fields:
+            values = self._flatten_values(values)
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._get_shard()
+        record_stores, aggregates = shard[0], shard[1]
+        if not self._aggregate_only:
+            if self._profile_queue is None:
+                self._get_record_store(record_stores, function_index).append(timestamp, function_index, values)
+            else:
+                self._store_spilled(record_stores, timestamp, function_index, values)
+        sink_queue = self._sink_queue
+        if sink_queue is not None:
+            sink_queue.put((timestamp, function_index, values))
+        self._accumulate(aggregates, function_index, values)
+        if self._track_call_tree:
+            frame = self._call_frame.get()
+            if frame is not None:
+                frame.values = values
+
+    def _store_spilled(self, record_stores: Dict[Optional[int], RecordStore], timestamp: int, function_index: int, values: List) -> None:
+        r"""
+        Appends the record of a call while a profile file is open: when the store contains ``flush_records`` records, it is handed over to the background thread of the profile file and replaced by an empty store.
+        The record is appended under the store lock of the thread (see :meth:`flush_profile_file`).
+        """
+        with self._local.store_lock:
+            record_store = self._get_record_store(record_stores, function_index)
+            record_store.append(timestamp, function_index, values)
+            profile_queue = self._profile_queue
+            if profile_queue is not None and len(record_store) >= self._profile_flush_records: # Not closed meanwhile
+                self._hand_over_record_stores(record_stores, profile_queue)
+
+    def _flatten_values(self, values: List) -> List:
+        r"""
+        Flattens the values of the profiler utils into the values of the data columns: the fields of the multi-valued results get one value each.
+        """
+        flattened_values = []
+        for utils, value in zip(self._connected_profiler_utils, values):
+            if utils.data_fields is None:
+                flattened_values.append(value)
+            elif value is None: # Missing value of all the fields
+                flattened_values.extend([None] * len(utils.data_fields))
+            else:
+                flattened_values.extend(value)
+        return flattened_values
+
+    def _accumulate(self, aggregates: Dict[int, List], function_index: int, values: List) -> None:
+        r"""
+        Updates the number of calls and the aggregates of the function registered at ``function_index`` among the ``aggregates`` of a thread.
+        """
+        function_aggregates = aggregates.get(function_index)
+        if function_aggregates is None:
+            function_aggregates = aggregates[function_index] = [0, []]
+        function_aggregates[0] += 1
+        utils_aggregates = function_aggregates[1]
+        while len(utils_aggregates) < len(values):
+            utils_aggregates.append(Aggregate(quantiles=self._track_quantiles))
+        for aggregate, value in zip(utils_aggregates, values):
+            if isinstance(value, (int, float)):
+                aggregate.add(value)
+
+    def _check_records_stored(self) -> None:
+        r"""
+        Checks that the records are stored to generate a report from them.
+        """
+        if self._aggregate_only:
+            raise ValueError(f"The report format '{self.report_format}' is not available in the aggregate_only mode, use 'cumulative', 'statistics' or 'percentiles'.")
+
+    # Report methods
+    def _get_signature_names(self) -> List[str]:
+        r"""
+        Returns the signature names of the registered functions.
+
+        The signature names are computed once per function and cached until the ``signature_name_format`` changes.
+        The cache is read from the profiled threads, the sinks and the metrics server: a published list is never modified, the missing names are computed under a lock in a new list published with a single assignment.
+        """
+        signature_name_format = self.signature_name_format
+        cached_format, signature_names = self._signature_names
+        if cached_format == signature_name_format and len(signature_names) >= len(self._profiled_functions):
+            return signature_names
+        with self._signature_names_lock:
+            cached_format, signature_names = self._signature_names
+            if cached_format != signature_name_format:
+                signature_names = []
+            missing_functions = self._profiled_functions[len(signature_names):]
+            if missing_functions or cached_format != signature_name_format:
+                signature_names = signature_names + [self.get_signature_name(func) for func in missing_functions]
+                self._signature_names = (signature_name_format, signature_names)
+        return signature_names
+
+    def _format_values(self, columns: List, length: int) -> List[str]:
+        r"""
+        Formats the values of a chunk of ``length`` records column by column.
+        For each record, the returned string contains " - data_name : data" for each present value.
+        """
+        suffixes = [""] * length
+        masks = []
+        for column_index, (data_column, column, missing_value) in enumerate(zip(self._data_columns, columns, self._missing_values())):
+            mask = missing_mask(column, missing_value)
+            masks.append(mask)
+            if mask is None:
+                parts = [" - " + part for part in data_column.string_results(column)]
+            else:
+                present_parts = iter(data_column.string_results([value for value, missing in zip(column, mask) if not missing]))
+                parts = ["" if missing else " - " + next(present_parts) for missing in mask]
+            suffixes = [suffix + part for suffix, part in zip(suffixes, parts)]
+            if isinstance(data_column, DataField) and data_column.is_last_field:
+                # Summary of the fields of the multi-valued results, for the records with all their fields
+                first_index = column_index - data_column.field_index
+                field_masks = [mask for mask in masks[first_index:] if mask is not None]
+                parts = []
+                for index, values in enumerate(zip(*columns[first_index:column_index + 1])):
+                    summary = None if any(mask[index] for mask in field_masks) else data_column.utils.string_summary(values)
+                    parts.append("" if summary is None else " - " + summary)
+                suffixes = [suffix + part for suffix, part in zip(suffixes, parts)]
+        return suffixes
+
+    def _missing_values(self) -> List:
+        r"""
+        Returns the sentinels of the missing values of the data columns.
+        """
+        return [RecordStore.missing_value(column.data_typecode) for column in self._data_columns]
+
+    def _iter_report_datetime(self):
+        r"""
+        Iterates over the chunks of the report in the "datetime" format.
+        Each chunk contains the lines of ``report_chunk_size`` records.
+        """
+        signature_names = self._get_signature_names()
+        timestamps, function_indices, columns = merge_columns(self.record_stores)
+        for start in range(0, len(timestamps), self.report_chunk_size):
+            end = start + self.report_chunk_size
+            dates = format_timestamps(timestamps[start:end])
+            suffixes = self._format_values([column[start:end] for column in columns], len(dates))
+            yield "".join([f"[{date}] - [{signature_names[function_index]}]{suffix}\n" for date, function_index, suffix in zip(dates, function_indices[start:end], suffixes)])
+
+    def _iter_report_function(self):
+        r"""
+        Iterates over the chunks of the report in the "function" format.
+        Each chunk contains the header of a function or the lines of at most ``report_chunk_size`` records of a function.
+        """
+        signature_names = self._get_signature_names()
+        timestamps, function_indices, columns = merge_columns(self.record_stores)
+        # Grouping the indices of the records by function, in the order of the first call
+        groups = {}
+        for index, function_index in enumerate(function_indices):
+            group = groups.get(function_index)
+            if group is None:
+                group = groups[function_index] = array.array("q")
+            group.append(index)
+        for function_index, group in groups.items():
+            yield f"[{signature_names[function_index]}]\n"
+            for start in range(0, len(group), self.report_chunk_size):
+                indices = group[start:start + self.report_chunk_size]
+                dates = format_timestamps([timestamps[index] for index in indices])
+                suffixes = self._format_values([[column[index] for index in indices] for column in columns], len(dates))
+                yield "".join([f"\t[{date}]{suffix}\n" for date, suffix in zip(dates, suffixes)])
+
+    def generate_report_datetime(self) -> str:
+        r"""
+        Generates the report of the ``FunctionProfiler`` in the "datetime" format.
+
+        .. seealso::
 
             :func:`pydecorium.decorators.FunctionProfiler.set_report_format()`
 
         Returns
         -------
         str
-            The report of the ``FunctionProfiler`` in the specified log format.
+            The report of the ``FunctionProfiler`` in the "datetime" format.
+
+        Raises
+        ------
+        ValueError
+            If the ``FunctionProfiler`` is in the ``aggregate_only`` mode.
+        """
+        self._check_records_stored()
+        return "".join(self._iter_report_datetime())
+
+    def generate_report_function(self) -> str:
+        r"""
+        Generates the report of the ``FunctionProfiler`` in the "function" format.
+
+        .. seealso::
+
+            :func:`pydecorium.decorators.FunctionProfiler.set_report_format()`
+
+        Returns
+        -------
+        str
+            The report of the ``FunctionProfiler`` in the "function" format.
+
+        Raises
+        ------
+        ValueError
+            If the ``FunctionProfiler`` is in the ``aggregate_only`` mode.
+        """
+        self._check_records_stored()
+        return "".join(self._iter_report_function())
+
+    def generate_report_cumulative(self) -> str:
+        r"""
+        Generates the report of the ``FunctionProfiler`` in the "cumulative" format.
+
+        .. seealso::
+
+            :func:`pydecorium.decorators.FunctionProfiler.set_report_format()`
+
+        Returns
+        -------
+        str
+            The report of the ``FunctionProfiler`` in the "cumulative" format.
+        """
+        return "".join(self._iter_report_aggregates(self._format_cumulative))
+
+    def generate_report_statistics(self) -> str:
+        r"""
+        Generates the report of the ``FunctionProfiler`` in the "statistics" format.
+
+        .. seealso::
+
+            :func:`pydecorium.decorators.FunctionProfiler.set_report_format()`
+
+        Returns
+        -------
+        str
+            The report of the ``FunctionProfiler`` in the "statistics" format.
+        """
+        return "".join(self._iter_report_aggregates(self._format_statistics))
+
+    def generate_report_percentiles(self) -> str:
+        r"""
+        Generates the report of the ``FunctionProfiler`` in the "percentiles" format.
+
+        .. seealso::
+
+            :func:`pydecorium.decorators.FunctionProfiler.set_report_format()`
+
+        Returns
+        -------
+        str
+            The report of the ``FunctionProfiler`` in the "percentiles" format.
+
+        Raises
+        ------
+        ValueError
+            If the quantiles are not tracked by the ``FunctionProfiler``.
+        """
+        self._check_quantiles_tracked()
+        return "".join(self._iter_report_aggregates(self._format_percentiles))
+
+    def generate_report_tree(self) -> str:
+        r"""
+        Generates the report of the ``FunctionProfiler`` in the "tree" format.
+
+        .. seealso::
+
+            :func:`pydecorium.decorators.FunctionProfiler.set_report_format()`
+
+        Returns
+        -------
+        str
+            The report of the ``FunctionProfiler`` in the "tree" format.
+
+        Raises
+        ------
+        ValueError
+            If the call tree is not tracked by the ``FunctionProfiler``.
+        """
+        self._check_call_tree_tracked()
+        return "".join(self._iter_report_tree())
+
+    def _check_call_tree_tracked(self) -> None:
+        r"""
+        Checks that the call tree is tracked to generate a report from it.
+        """
+        if not self._track_call_tree:
+            raise ValueError("The report format 'tree' requires track_call_tree.")
+
+    def _iter_report_tree(self):
+        r"""
+        Iterates over the lines of the report in the "tree" format, one line per path of the call tree in depth-first order.
+        The children of a path are sorted by the order of their first finished call.
+        """
+        signature_names = self._get_signature_names()
+        call_tree = self.call_tree
+        children = {}
+        for path in list(call_tree):
+            # The ancestors are added too: a call raising an exception is not in the call tree, but its profiled children are
+            for depth in range(1, len(path) + 1):
+                children.setdefault(path[:depth - 1], {})[path[:depth]] = None
+        stack = list(reversed(children.get((), {})))
+        while stack:
+            path = stack.pop()
+            calls, inclusive_aggregates, exclusive_aggregates = call_tree.get(path, (0, [], []))
+            indent = "\t" * (len(path) - 1)
+            line = [f"{indent}[{signature_names[path[-1]]}] - {calls} calls"]
+            for data_column, inclusive_aggregate, exclusive_aggregate in zip(self._data_columns, inclusive_aggregates, exclusive_aggregates):
+                if inclusive_aggregate.count != 0:
+                    inclusive, exclusive = self._estimate_total(inclusive_aggregate, calls), self._estimate_total(exclusive_aggregate, calls)
+                    line.append(f"{data_column.data_name} : {data_column.string_value(inclusive)} (self {data_column.string_value(exclusive)})")
+            yield " - ".join(line) + "\n"
+            stack.extend(reversed(list(children.get(path, {}))))
+
+    def _check_quantiles_tracked(self) -> None:
+        r"""
+        Checks that the quantiles are tracked to generate a report from them.
+        """
+        if not self._track_quantiles:
+            raise ValueError("The report format 'percentiles' requires track_quantiles.")
+
+    def _iter_report_aggregates(self, format_aggregate: Callable, shards: Optional[List[Tuple]] = None):
+        r"""
+        Iterates over the lines of a report generated from the aggregates, one line per called function.
+        ``format_aggregate(utils, aggregate, calls)`` returns the string reporting the aggregate of a profiler utils for a function called ``calls`` times.
+        If ``shards`` is given, only the aggregates of these shards are reported.
+        """
+        signature_names = self._get_signature_names()
+        if shards is None:
+            aggregates, generator_aggregates, unsampled_calls = self.aggregates, self.generator_aggregates, self.unsampled_calls
+        else:
+            aggregates = self._merge_shards_aggregates([shard[1] for shard in shards])
+            generator_aggregates = self._merge_shards_aggregates([shard[2] for shard in shards])
+            unsampled_calls = self._merge_shards_unsampled_calls([shard[3] for shard in shards])
+        # The aggregates are updated at each call
+        for function_index, (calls, utils_aggregates) in self._iter_calls_aggregates(aggregates, unsampled_calls):
+            line = [f"[{signature_names[function_index]}] - {calls} calls"]
+            if function_index in unsampled_calls:
+                line.append(f"sampling rate : {100 * (calls - unsampled_calls[function_index]) / calls:.2f}%")
+            for column_index, aggregate in enumerate(utils_aggregates):
+                data_column = self._data_columns[column_index]
+                if aggregate.count != 0:
+                    line.append(format_aggregate(data_column, aggregate, calls))
+                if isinstance(data_column, DataField) and data_column.is_last_field:
+                    # Summary of the totals of the fields of the multi-valued results
+                    field_aggregates = utils_aggregates[column_index - data_column.field_index:column_index + 1]
+                    if all(field_aggregate.count != 0 for field_aggregate in field_aggregates):
+                        summary = data_column.utils.string_summary(tuple(self._estimate_total(field_aggregate, calls) for field_aggregate in field_aggregates))
+                        if summary is not None:
+                            line.append(summary)
+            if function_index in generator_aggregates:
+                for data, aggregate in zip(self.generator_data, generator_aggregates[function_index][1]):
+                    if aggregate.count == 0 or (format_aggregate == self._format_cumulative and not data.summable):
+                        continue
+                    line.append(format_aggregate(data, aggregate, calls))
+            yield " - ".join(line) + "\n"
+
+    def _iter_report_process(self):
+        r"""
+        Iterates over the chunks of the report in the "process" format.
+        Each chunk contains the header of a process or the line of a function profiled by the process.
+        """
+        shards_by_process = {pid: [] for pid in self.process_ids}
+        for shard in list(self._shards):
+            shards_by_process[shard[5][0]].append(shard)
+        for pid, shards in shards_by_process.items():
+            if not shards:
+                continue
+            yield f"[process {pid}]\n"
+            for line in self._iter_report_aggregates(self._format_cumulative, shards):
+                yield "\t" + line
+
+    def generate_report_process(self) -> str:
+        r"""
+        Generates the report of the ``FunctionProfiler`` in the "process" format.
+
+        .. seealso::
+
+            :func:`pydecorium.decorators.FunctionProfiler.set_report_format()`
+
+        Returns
+        -------
+        str
+            The report of the ``FunctionProfiler`` in the "process" format.
+        """
+        return "".join(self._iter_report_process())
 
+    def _format_cumulative(self, utils: ProfilerUtils, aggregate: Aggregate, calls: int) -> str:
+        if aggregate.count < calls: # Some calls were not measured
+            return f"{utils.string_result(self._estimate_total(aggregate, calls))} (estimated from {aggregate.count} calls)"
+        return utils.string_result(aggregate.total)
+
+    def _format_statistics(self, utils: ProfilerUtils, aggregate: Aggregate, calls: int) -> str:
+        return f"{utils.data_name} : mean {utils.string_value(aggregate.mean)} - std {utils.string_value(aggregate.std)} - min {utils.string_value(aggregate.minimum)} - max {utils.string_value(aggregate.maximum)}"
+
+    def _format_percentiles(self, utils: ProfilerUtils, aggregate: Aggregate, calls: int) -> str:
+        percentiles = [f"p{format(q * 100, 'g').replace('.', '')} {utils.string_value(aggregate.quantile(q))}" for q in self.reported_quantiles]
+        return f"{utils.data_name} : {' - '.join(percentiles)}"
+
+    def iter_report(self):
+        r"""
+        Iterates over the chunks of the report of the ``FunctionProfiler`` according to the ``report_format``.
+
+        The report is never built entirely in memory:
+
+        - "datetime": each chunk contains the lines of ``report_chunk_size`` records.
+        - "function": each chunk contains the header of a function or the lines of at most ``report_chunk_size`` records of a function.
+        - "cumulative", "statistics", "percentiles": each chunk contains the line of a function.
+        - "tree": each chunk contains the line of a path of the call tree.
+        - "process": each chunk contains the header of a process or the line of a function.
+
+        .. code-block:: python
+
+            for chunk in function_profiler.iter_report():
+                print(chunk, end="")
+
+        .. seealso::
+
+            :func:`pydecorium.decorators.FunctionProfiler.set_report_format()`
+
+        Yields
+        ------
+        str
+            The chunks of the report. The concatenation of the chunks is the report returned by :meth:`generate_report`.
+
+        Raises
+        ------
+        ValueError
+            If the ``report_format`` is not available with the options of the ``FunctionProfiler``.
         """
+        if self.report_format in ("datetime", "function"):
+            self._check_records_stored()
+        elif self.report_format == "percentiles":
+            self._check_quantiles_tracked()
+        elif self.report_format == "tree":
+            self._check_call_tree_tracked()
         if self.report_format == "datetime":
-            return self.generate_report_datetime()
+            return self._iter_report_datetime()
         elif self.report_format == "function":
-            return self.generate_report_function()
+            return self._iter_report_function()
         elif self.report_format == "cumulative":
-            return self.generate_report_cumulative()
+            return self._iter_report_aggregates(self._format_cumulative)
+        elif self.report_format == "statistics":
+            return self._iter_report_aggregates(self._format_statistics)
+        elif self.report_format == "percentiles":
+            return self._iter_report_aggregates(self._format_percentiles)
+        elif self.report_format == "tree":
+            return self._iter_report_tree()
+        elif self.report_format == "process":
+            return self._iter_report_process()
+
+    def generate_report(self) -> str:
+        """
+        Generates the report of the ``FunctionProfiler`` according to the log format.
+
+        .. seealso::
+
+            - :func:`pydecorium.decorators.FunctionProfiler.set_report_format()`
+            - :meth:`iter_report` : Iterates over the chunks of the report without building it in memory.
+
+        Returns
+        -------
+        str
+            The report of the ``FunctionProfiler`` in the specified log format.
+
+        """
+        return "".join(self.iter_report())
     
-    def write_report(self, file_path: str) -> None:
+    def write_report(self, file_path: Union[str, os.PathLike, IO]) -> None:
         """
-        Writes the report of the ``FunctionProfiler`` in a file at the specified path according to the selected ``report_format``.
+        Writes the report of the ``FunctionProfiler`` according to the selected ``report_format``.
+
+        The report is streamed chunk by chunk (see :meth:`iter_report`) with buffered writes, so the whole report is never built in memory.
+
+        The target can be:
+
+        - a path. If the path ends with ".gz", the report is compressed with gzip.
+        - an open text file object, for example ``sys.stdout`` or an ``io.StringIO``. The file is not closed.
+        - an open binary file object, for example a ``gzip.GzipFile``. The report is encoded in UTF-8 and the file is not closed.
+
+        .. code-block:: python
+
+            function_profiler.write_report("report.txt")
+            function_profiler.write_report("report.txt.gz")
+            function_profiler.write_report(sys.stdout)
 
         Parameters
         ----------
-        file_path : str
-            The path of the file where the report will be written.
+        file_path : Union[str, os.PathLike, IO]
+            The path of the file or the file object where the report will be written.
         """
-        with open(file_path, "w") as file:
-            file.write(self.generate_report())
+        with open_text_output(file_path) as file:
+            for chunk in self.iter_report():
+                file.write(chunk)
 
-    def __str__(self) -> str:
-        return self.generate_report()
+    def _get_data_column_index(self, data_name: Optional[str] = None) -> Optional[int]:
+        r"""
+        Returns the index of the data column named ``data_name``.
+        If ``data_name`` is None, the first column measuring a runtime (:class:`pydecorium.decorators.Timer` or the "wall time" of a :class:`pydecorium.decorators.CPUTimer`) is returned, None if there is no such column.
 
-    def __repr__(self) -> str:
-        return self.generate_report()
\ No newline at end of file
+        Raises
+        ------
+        ValueError
+            If no data column is named ``data_name``.
+        """
+        if data_name is None:
+            for column_index, data_column in enumerate(self._data_columns):
+                if isinstance(data_column, Timer) or (isinstance(data_column, DataField) and data_column.data_name == "wall time"):
+                    return column_index
+            return None
+        for column_index, data_column in enumerate(self._data_columns):
+            if data_column.data_name == data_name:
+                return column_index
+        raise ValueError(f"The data_name must be one of the following: {[data_column.data_name for data_column in self._data_columns]}.")
+
+    def iter_collapsed_stacks(self, data_name: Optional[str] = None):
+        r"""
+        Iterates over the chunks of the profiled data in the collapsed-stack format read by ``flamegraph.pl`` and speedscope.
+
+        Each line contains the signature names of a stack of profiled calls from the root, separated by ";", and its weight: the exclusive value of the data ``data_name`` of the stack, estimated over all its calls (see the "tree" report format).
+
+        .. code-block:: console
+
+            process_request 15800000
+            process_request;load 30300000
+            process_request;save 60300000
+
+        If the call tree is not tracked (see ``track_call_tree``), each function is a stack of one frame weighted by the cumulative value of the data.
+        The stacks with a negative weight (see :meth:`extract_call_tree`) are skipped.
+
+        Parameters
+        ----------
+        data_name : str
+            The name of the data weighting the stacks, for example "runtime" or "memory usage".
+            Default is None (the runtime measured by the first connected timer).
+
+        Yields
+        ------
+        str
+            The chunks of the collapsed stacks.
+
+        Raises
+        ------
+        ValueError
+            If no data is named ``data_name`` or if ``data_name`` is None and no timer is connected.
+        """
+        column_index = self._get_data_column_index(data_name)
+        if column_index is None:
+            raise ValueError("The data_name must be given when no Timer is connected.")
+        if self._track_call_tree:
+            stacks = ((path, self._estimate_total(exclusive_aggregates[column_index], calls) if column_index < len(exclusive_aggregates) else None) for path, (calls, _, exclusive_aggregates) in self.call_tree.items())
+        else:
+            stacks = (((function_index,), cumulative[column_index] if column_index < len(cumulative) else None) for function_index, (_, cumulative) in self.cumulative_data.items())
+        return iter_collapsed_stacks(stacks, self._get_signature_names(), self.report_chunk_size)
+
+    def write_collapsed_stacks(self, file_path: Union[str, os.PathLike, IO], data_name: Optional[str] = None) -> None:
+        r"""
+        Writes the profiled data in the collapsed-stack format (see :meth:`iter_collapsed_stacks`).
+
+        The file can be given to ``flamegraph.pl`` or opened in speedscope to display a flame graph:
+
+        .. code-block:: python
+
+            function_profiler = FunctionProfiler([Timer, Memory], track_call_tree=True)
+            ...
+            function_profiler.write_collapsed_stacks("runtime.folded")
+            function_profiler.write_collapsed_stacks("memory.folded", data_name="memory usage")
+
+        .. code-block:: console
+
+            flamegraph.pl runtime.folded > runtime.svg
+
+        Parameters
+        ----------
+        file_path : Union[str, os.PathLike, IO]
+            The path of the file or the file object where the stacks will be written (see :meth:`write_report`).
+        data_name : str
+            The name of the data weighting the stacks.
+            Default is None (the runtime measured by the first connected timer).
+        """
+        with open_text_output(file_path) as file:
+            for chunk in self.iter_collapsed_stacks(data_name):
+                file.write(chunk)
+
+    def iter_chrome_trace(self, duration_data: Optional[str] = None):
+        r"""
+        Iterates over the chunks of the records in the trace-event JSON format read by the Chrome trace viewers (``chrome://tracing``, Perfetto, speedscope).
+
+        Each record is an event of the thread which profiled the call, starting at the timestamp of the call and lasting the value of the data ``duration_data`` (a runtime in nanoseconds).
+        The viewers nest the events of the calls made by a profiled call under it.
+        The values of the connected profiler utils are given in the arguments of the events.
+        The records are read store by store and the events are generated by chunks of ``report_chunk_size``, so the whole trace is never built in memory.
+
+        .. note::
+
+            The calls of the coroutines interleaved on the same thread are not nested, so their events can overlap.
+
+        Parameters
+        ----------
+        duration_data : str
+            The name of the data giving the duration of the events.
+            Default is None (the runtime measured by the first connected timer, or instant events if no timer is connected).
+
+        Yields
+        ------
+        str
+            The chunks of the JSON document.
+
+        Raises
+        ------
+        ValueError
+            If the ``FunctionProfiler`` is in the ``aggregate_only`` mode or if no data is named ``duration_data``.
+        """
+        if self._aggregate_only:
+            raise ValueError("The trace is not available in the aggregate_only mode.")
+        duration_column = self._get_data_column_index(duration_data)
+        shards = list(self._shards)
+        # The shard indices are the thread identifiers of the trace: the identifiers of the dead threads can be reused
+        threads = ((pid, shard_index + 1, thread_name, ((record_store.timestamps, record_store.function_indices, record_store.columns) for record_store in record_stores)) for shard_index, ((*_, (pid, _, thread_name)), record_stores) in enumerate(zip(shards, self._shards_record_stores(shards))))
+        data_names = [data_column.data_name for data_column in self._data_columns]
+        return iter_chrome_trace(threads, self._get_signature_names(), data_names, self._missing_values(), duration_column, self.report_chunk_size)
+
+    def write_chrome_trace(self, file_path: Union[str, os.PathLike, IO], duration_data: Optional[str] = None) -> None:
+        r"""
+        Writes the records in the trace-event JSON format (see :meth:`iter_chrome_trace`).
+
+        The file can be opened offline in ``chrome://tracing``, in Perfetto (https://ui.perfetto.dev) or in speedscope.
+
+        .. code-block:: python
+
+            function_profiler.write_chrome_trace("trace.json")
+            function_profiler.write_chrome_trace("trace.json.gz")
+
+        Parameters
+        ----------
+        file_path : Union[str, os.PathLike, IO]
+            The path of the file or the file object where the trace will be written (see :meth:`write_report`).
+        duration_data : str
+            The name of the data giving the duration of the events.
+            Default is None (the runtime measured by the first connected timer).
+        """
+        with open_text_output(file_path) as file:
+            for chunk in self.iter_chrome_trace(duration_data):
+                file.write(chunk)
+
+    def _check_profile_file_closed(self) -> None:
+        r"""
+        Checks that no profile file is open and no sink is connected before changing the data columns.
+        """
+        if self._profile_queue is not None:
+            raise ValueError("The profiler utils can't be changed while a profile file is open, close it with close_profile_file.")
+        if self._sink_queue is not None:
+            raise ValueError("The profiler utils can't be changed while sinks are connected, disconnect them with disconnect_sinks.")
+
+    def _new_profile_writer(self, file_path: Union[str, os.PathLike]) -> ProfileWriter:
+        r"""
+        Creates a profile writer with the data columns of the ``FunctionProfiler``.
+        """
+        return ProfileWriter(file_path, [data_column.data_name for data_column in self._data_columns], [column.data_typecode for column in self._data_columns])
+
+    def to_numpy(self):
+        r"""
+        Returns the stored records as a ``numpy`` structured array sorted by timestamp, for a vectorized analysis.
+
+        The array is built from the typed columns of the stores (see :class:`pydecorium.decorators.RecordStore`), without creating a Python object per record.
+        The fields are "timestamp" (int64 nanoseconds since the epoch), "function_index" (int32) and one field per data column named by its ``data_name``.
+        The missing values are the sentinels of the ``RecordStore`` (NaN, the minimum integer or None).
+        The signature names of the function indices are given by ``profiled_functions_signature_name``.
+
+        .. code-block:: python
+
+            records = function_profiler.to_numpy()
+            runtimes = records["runtime"][records["function_index"] == 0]
+
+        Returns
+        -------
+        numpy.ndarray
+            The structured array of the records.
+
+        Raises
+        ------
+        ImportError
+            If ``numpy`` is not installed.
+        ValueError
+            If the ``FunctionProfiler`` is in the ``aggregate_only`` mode.
+        """
+        if self._aggregate_only:
+            raise ValueError("The records are not available in the aggregate_only mode.")
+        return records_to_numpy(self.record_stores, [data_column.data_name for data_column in self._data_columns], [data_column.data_typecode for data_column in self._data_columns])
+
+    def to_dataframe(self):
+        r"""
+        Returns the stored records as a ``pandas.DataFrame`` sorted by timestamp (see :meth:`to_numpy`).
+
+        The columns are "timestamp" (``datetime64[ns, UTC]``), "function_index", "function" (the signature name as a categorical) and one column per data column named by its ``data_name``.
+        The missing integer values are masked (``pandas.NA``) and the missing float values are NaN.
+
+        .. code-block:: python
+
+            dataframe = function_profiler.to_dataframe()
+            dataframe.groupby("function", observed=True)["runtime"].describe()
+
+        Returns
+        -------
+        pandas.DataFrame
+            The data frame of the records.
+
+        Raises
+        ------
+        ImportError
+            If ``numpy`` or ``pandas`` is not installed.
+        ValueError
+            If the ``FunctionProfiler`` is in the ``aggregate_only`` mode.
+        """
+        records = self.to_numpy()
+        return records_to_dataframe(records, self._get_signature_names(), [RecordStore.missing_value(data_column.data_typecode) for data_column in self._data_columns])
+
+    def summarize_records(self, quantiles: Optional[List[float]] = None) -> Dict[str, Dict]:
+        r"""
+        Summarizes the stored records by function with ``numpy``, without a Python loop over the records.
+
+        Unlike the "statistics" and "percentiles" reports, which read the aggregates updated at each call, the summary is computed from the stored records: it covers only the records kept by the retention policy and its quantiles are exact.
+
+        .. code-block:: python
+
+            summary = function_profiler.summarize_records()
+            print(summary["function_signature_name"]["runtime"]["p99"])
+
+        Parameters
+        ----------
+        quantiles : List[float]
+            The quantiles to compute, between 0 and 1.
+            Default is None (the ``reported_quantiles``).
+
+        Returns
+        -------
+        Dict[str, Dict]
+            For each signature name, the number of records ("calls") and, for each numeric data column, the number of present values ("count"), "sum", "mean", "std", "min", "max" and the quantiles ("p50", "p99"...).
+
+        Raises
+        ------
+        ImportError
+            If ``numpy`` is not installed.
+        ValueError
+            If the ``FunctionProfiler`` is in the ``aggregate_only`` mode or a quantile is not between 0 and 1.
+        """
+        if quantiles is None:
+            quantiles = self.reported_quantiles
+        if not all(isinstance(quantile, (int, float)) and 0 <= quantile <= 1 for quantile in quantiles):
+            raise ValueError("The quantiles must be between 0 and 1.")
+        records = self.to_numpy()
+        return summarize_records(records, self._get_signature_names(), [RecordStore.missing_value(data_column.data_typecode) for data_column in self._data_columns], quantiles)
+
+    def write_profile(self, file_path: Union[str, os.PathLike]) -> None:
+        r"""
+        Writes the stored records in a binary profile file, sorted by timestamp.
+
+        The profile file contains a header, the records with a fixed width and the table of the signature names of the functions (see :class:`pydecorium.decorators.ProfileWriter`).
+        It can be read back without loading it in memory with a :class:`pydecorium.decorators.ProfileReader`.
+        The records are kept in the ``FunctionProfiler``.
+
+        Parameters
+        ----------
+        file_path : Union[str, os.PathLike]
+            The path of the profile file.
+
+        Raises
+        ------
+        ValueError
+            If the ``FunctionProfiler`` is in the ``aggregate_only`` mode.
+        """
+        if self._aggregate_only:
+            raise ValueError("The profile file is not available in the aggregate_only mode.")
+        timestamps, function_indices, columns = merge_columns(self.record_stores)
+        with self._new_profile_writer(file_path) as writer:
+            writer.set_signature_names(self._get_signature_names())
+            for start in range(0, len(timestamps), self.report_chunk_size):
+                end = start + self.report_chunk_size
+                writer.write(timestamps[start:end], function_indices[start:end], [column[start:end] for column in columns])
+
+    def open_profile_file(self, file_path: Union[str, os.PathLike], flush_records: int = 10000) -> None:
+        r"""
+        Opens a binary profile file where the records are moved incrementally while profiling.
+
+        The stored records are moved to the file at the opening.
+        Then, when the store of a thread contains ``flush_records`` records, the thread hands it over to a background thread writing it to the file (see :class:`pydecorium.decorators.ProfileWriterQueue`), so the profiled calls don't wait for the disk.
+        The memory used by the records stays bounded whatever the duration of the run, and the file is readable after each write with a :class:`pydecorium.decorators.ProfileReader`.
+
+        .. code-block:: python
+
+            function_profiler.open_profile_file("profile.pdprof")
+            ...
+            function_profiler.close_profile_file()
+
+            with ProfileReader("profile.pdprof") as reader:
+                records = reader.to_numpy()
+
+        The aggregates are not affected, so the "cumulative", "statistics" and "percentiles" reports stay exact, but the "datetime" and "function" reports only contain the records not yet moved to the file.
+        The file contains the records handed over and written by the background thread; :meth:`flush_profile_file` moves all the records and waits until they are written.
+        The records of the file are sorted by timestamp within each chunk of a thread, not globally.
+
+        .. note::
+
+            If a retention policy is set (see :meth:`set_retention`), the records are moved when the store reaches its capacity, and the records evicted by ``max_age`` before being moved are lost.
+
+        Parameters
+        ----------
+        file_path : Union[str, os.PathLike]
+            The path of the profile file. An existing file is overwritten.
+        flush_records : int
+            The number of records of a thread buffered in memory before being written to the file.
+            Default is 10000.
+
+        Raises
+        ------
+        TypeError
+            If ``flush_records`` is not an integer.
+        ValueError
+            If ``flush_records`` is not strictly positive, if the ``FunctionProfiler`` is in the ``aggregate_only`` mode or if a profile file is already open.
+        """
+        if not isinstance(flush_records, int):
+            raise TypeError("The flush_records must be an integer.")
+        if flush_records <= 0:
+            raise ValueError("The flush_records must be strictly positive.")
+        if self._aggregate_only:
+            raise ValueError("The profile file is not available in the aggregate_only mode.")
+        if self._profile_queue is not None:
+            raise ValueError("A profile file is already open, close it with close_profile_file.")
+        capacity = self._max_records if self._max_records_per_function is None else self._max_records_per_function
+        self._profile_flush_records = flush_records if capacity is None else min(flush_records, capacity)
+        self._profile_queue = ProfileWriterQueue(self._new_profile_writer(file_path), self._get_signature_names)
+        self.flush_profile_file()
+
+    def _hand_over_record_stores(self, record_stores: Dict[Optional[int], RecordStore], profile_queue: ProfileWriterQueue) -> None:
+        r"""
+        Replaces the non-empty stores of a shard by empty stores and hands them over to the background thread of the profile file.
+        The store lock of the thread owning the shard must be held by the caller.
+        """
+        for key, record_store in list(record_stores.items()):
+            if len(record_store):
+                record_stores[key] = self._new_record_store()
+                profile_queue.put(record_store)
+
+    def _hand_over_all_record_stores(self, profile_queue: ProfileWriterQueue) -> None:
+        r"""
+        Hands the stores of all the shards over to the background thread of the profile file.
+        The stores of the live threads are swapped under their store lock, so the records appended meanwhile are either handed over or kept in the new stores.
+        """
+        with self._lock: # The finished threads are not folded meanwhile
+            owned_shards = set()
+            for shard, _, store_lock in self._thread_shards:
+                owned_shards.add(id(shard))
+                with store_lock:
+                    self._hand_over_record_stores(shard[0], profile_queue)
+            for shard in self._shards:
+                if id(shard) not in owned_shards: # The retired shard and the merged shards
+                    self._hand_over_record_stores(shard[0], profile_queue)
+
+    def flush_profile_file(self) -> None:
+        r"""
+        Moves the records of all the threads to the open profile file and waits until they are written.
+
+        The profiled threads don't need to be idle: the records they append during the flush are either moved or kept for the next flush, never lost.
+        """
+        profile_queue = self._profile_queue
+        if profile_queue is None:
+            return
+        self._hand_over_all_record_stores(profile_queue)
+        profile_queue.flush()
+
+    def close_profile_file(self) -> None:
+        r"""
+        Moves the remaining records of all the threads to the profile file, waits until they are written and closes it (see :meth:`flush_profile_file`).
+        The next records are kept in memory.
+        """
+        profile_queue = self._profile_queue
+        if profile_queue is None:
+            return
+        self._profile_queue = None # The threads stop handing their stores over
+        self._hand_over_all_record_stores(profile_queue)
+        profile_queue.close()
+
+    def connect_sinks(self, sinks: Union[Sink, List[Sink]], max_queue_size: int = 100000, overflow: str = "drop", batch_size: int = 1000, flush_interval: float = 1.0) -> None:
+        r"""
+        Connects sinks receiving the records of the next profiled calls while profiling, for example to follow a long-running program.
+
+        .. code-block:: python
+
+            from pydecorium.decorators import JSONLinesSink, StatsDSink
+
+            function_profiler.connect_sinks([JSONLinesSink("records.jsonl"), StatsDSink("127.0.0.1", 8125)])
+
+        The profiled calls only append their raw record to a queue, without lock, formatting or I/O.
+        A background thread writes the queued records to the sinks by batches of ``batch_size`` records, at least every ``flush_interval`` seconds (see :class:`pydecorium.decorators.SinkQueue`).
+        The records are sent to the sinks in addition to the storage of the ``FunctionProfiler``, use ``aggregate_only=True`` to keep only the aggregates in memory.
+
+        When the queue holds ``max_queue_size`` records, the next records are dropped with ``overflow="drop"`` (see ``sink_statistics``), or the profiled calls wait for the background thread with ``overflow="block"``.
+
+        The sinks are connected until :meth:`disconnect_sinks` or the exit of the program, and the profiler utils can't be changed meanwhile.
+
+        Parameters
+        ----------
+        sinks : Union[Sink, List[Sink]]
+            The sinks receiving the records.
+        max_queue_size : int
+            The maximum number of queued records.
+            Default is 100000.
+        overflow : str
+            "drop" or "block".
+            Default is "drop".
+        batch_size : int
+            The number of records written per batch.
+            Default is 1000.
+        flush_interval : float
+            The maximum time in seconds between two writes of the queued records.
+            Default is 1.0.
+
+        Raises
+        ------
+        TypeError
+            If a sink is not an instance of ``Sink`` or an argument has a wrong type.
+        ValueError
+            If sinks are already connected or an argument has a wrong value.
+        """
+        if isinstance(sinks, Sink):
+            sinks = [sinks]
+        if self._sink_queue is not None:
+            raise ValueError("The sinks are already connected, disconnect them with disconnect_sinks.")
+        profiled_functions = self._profiled_functions
+        self._sink_queue = SinkQueue(
+            sinks,
+            list(self._data_columns),
+            lambda function_index: self.get_signature_name(profiled_functions[function_index]),
+            max_size=max_queue_size,
+            overflow=overflow,
+            batch_size=batch_size,
+            flush_interval=flush_interval
+        )
+
+    def flush_sinks(self, timeout: Optional[float] = None) -> bool:
+        r"""
+        Waits until the records queued before the call are written to the sinks.
+
+        Parameters
+        ----------
+        timeout : float
+            The maximum time to wait in seconds.
+            Default is None (no limit).
+
+        Returns
+        -------
+        bool
+            If the records were written before the timeout. True if no sink is connected.
+        """
+        if self._sink_queue is None:
+            return True
+        return self._sink_queue.flush(timeout)
+
+    def disconnect_sinks(self, timeout: Optional[float] = None) -> Dict[str, int]:
+        r"""
+        Writes the queued records, closes the sinks and stops their background thread.
+
+        Parameters
+        ----------
+        timeout : float
+            The maximum time to wait for the background thread in seconds.
+            Default is None (no limit).
+
+        Returns
+        -------
+        Dict[str, int]
+            The final ``sink_statistics``: the number of records written and dropped, and the number of errors of the sinks.
+        """
+        sink_queue, self._sink_queue = self._sink_queue, None
+        if sink_queue is None:
+            return self.sink_statistics
+        sink_queue.close(timeout)
+        return {"pending": sink_queue.pending, "written": sink_queue.written, "dropped": sink_queue.dropped, "errors": sink_queue.errors}
+
+    def merge(self, other: "FunctionProfiler") -> None:
+        r"""
+        Merges the profiled data of another ``FunctionProfiler`` in this one, for example the profiles of several runs of the same workload.
+
+        The functions are matched by their qualified name (module and qualified name), the functions profiled only by ``other`` are added.
+        The data columns are matched by their names, the data of ``other`` without a matching column are ignored.
+        The shards of ``other`` are merged as new shards, so the aggregates and the call tree are combined without reading the records, and the records of ``other`` are copied if the records are stored.
+        The data of ``other`` are copied and not modified.
+
+        .. code-block:: python
+
+            function_profiler.merge(other_function_profiler)
+
+        Parameters
+        ----------
+        other : FunctionProfiler
+            The ``FunctionProfiler`` to merge.
+
+        Raises
+        ------
+        TypeError
+            If ``other`` is not a ``FunctionProfiler``.
+        ValueError
+            If ``other`` is this ``FunctionProfiler``.
+        """
+        if not isinstance(other, FunctionProfiler):
+            raise TypeError("The other must be an instance of FunctionProfiler.")
+        if other is self:
+            raise ValueError("A FunctionProfiler can't be merged with itself.")
+        self._merge_exported_shards(other._export_shards(list(other._shards), not self._aggregate_only, copy=True))
+
+    def diff(self, baseline: "FunctionProfiler") -> Dict[str, Dict]:
+        r"""
+        Compares the aggregates of the ``FunctionProfiler`` with the aggregates of a ``baseline`` (for example the profile of the same workload before a change).
+
+        The functions are matched by their qualified name and the data columns by their names. Only the aggregates are read, not the records.
+        For each function, the number of calls and, for each data, the total (estimated over all the calls, see the "cumulative" report), the mean and the quantile ``diff_quantile`` are returned as a tuple ``(baseline_value, value)``.
+        A value is None if the function or the data is missing in one of the profiles, or if the quantiles are not tracked.
+
+        .. code-block:: python
+
+            {
+                "function_signature_name": {
+                    "calls": (100, 120),
+                    "data": {
+                        "runtime": {"total": (1000000, 1500000), "mean": (10000.0, 12500.0), "p99": (20000.0, 31000.0)},
+                    },
+                },
+            }
+
+        Parameters
+        ----------
+        baseline : FunctionProfiler
+            The ``FunctionProfiler`` to compare with.
+
+        Returns
+        -------
+        Dict[str, Dict]
+            The values of the baseline and of the ``FunctionProfiler`` for each function, by signature name (see :meth:`generate_report_diff`).
+            If different functions have the same signature name, their names are followed by their qualified name: ``"process [module.A.process]"``.
+
+        Raises
+        ------
+        TypeError
+            If ``baseline`` is not a ``FunctionProfiler``.
+        """
+        if not isinstance(baseline, FunctionProfiler):
+            raise TypeError("The baseline must be an instance of FunctionProfiler.")
+        quantile_name = f"p{format(self.diff_quantile * 100, 'g').replace('.', '')}"
+        data_names = [data_column.data_name for data_column in self._data_columns]
+        data_names.extend(data_column.data_name for data_column in baseline._data_columns if data_column.data_name not in data_names)
+
+        def summarize(function_profiler: "FunctionProfiler") -> Dict[Tuple, Tuple[int, Dict[str, Aggregate]]]:
+            summaries = {}
+            for function_index, (calls, utils_aggregates) in function_profiler._iter_calls_aggregates(function_profiler.aggregates, function_profiler.unsampled_calls):
+                key = function_profiler._function_key(function_profiler._profiled_functions[function_index])
+                aggregates = {data_column.data_name: aggregate for data_column, aggregate in zip(function_profiler._data_columns, utils_aggregates) if aggregate.count != 0}
+                if key in summaries: # Several functions with the same qualified name (closures)
+                    previous_calls, previous_aggregates = summaries[key]
+                    for data_name, aggregate in previous_aggregates.items():
+                        if data_name in aggregates:
+                            aggregate = aggregate.copy()
+                            aggregate.merge(aggregates[data_name])
+                        aggregates[data_name] = aggregate
+                    calls += previous_calls
+                summaries[key] = (calls, aggregates)
+            return summaries
+
+        def _summary_statistics(aggregate: Optional[Aggregate], calls: int) -> Dict[str, Optional[Union[int, float]]]:
+            if aggregate is None:
+                return {"total": None, "mean": None, quantile_name: None}
+            return {"total": self._estimate_total(aggregate, calls), "mean": aggregate.mean, quantile_name: None if aggregate.sketch is None else aggregate.quantile(self.diff_quantile)}
+
+        summaries, baseline_summaries = summarize(self), summarize(baseline)
+        signature_names = {}
+        for function_profiler in (baseline, self):
+            function_signature_names = function_profiler._get_signature_names()
+            for function_index, func in enumerate(list(function_profiler._profiled_functions)):
+                signature_names[function_profiler._function_key(func)] = function_signature_names[function_index]
+        signature_names = self._unique_key_names(signature_names)
+        differences = {}
+        for key in list(summaries) + [key for key in baseline_summaries if key not in summaries]:
+            calls, aggregates = summaries.get(key, (None, {}))
+            baseline_calls, baseline_aggregates = baseline_summaries.get(key, (None, {}))
+            data = {}
+            for data_name in data_names:
+                if data_name not in aggregates and data_name not in baseline_aggregates:
+                    continue
+                values, baseline_values = _summary_statistics(aggregates.get(data_name), calls), _summary_statistics(baseline_aggregates.get(data_name), baseline_calls)
+                data[data_name] = {statistic: (baseline_values[statistic], values[statistic]) for statistic in values}
+            differences[signature_names[key]] = {"calls": (baseline_calls, calls), "data": data}
+        return differences
+
+    def _format_difference(self, string_value: Callable, baseline_value: Optional[Union[int, float]], value: Optional[Union[int, float]]) -> str:
+        r"""
+        Formats the change of a value from the baseline: "baseline -> value (+delta, +percent%)".
+        """
+        if baseline_value is None:
+            return f"none -> {string_value(value)} (new)"
+        if value is None:
+            return f"{string_value(baseline_value)} -> none (removed)"
+        delta = value - baseline_value
+        change = ("+" if delta >= 0 else "") + string_value(delta)
+        if baseline_value != 0:
+            change += f", {100 * delta / baseline_value:+.2f}%"
+        return f"{string_value(baseline_value)} -> {string_value(value)} ({change})"
+
+    def iter_report_diff(self, baseline: "FunctionProfiler"):
+        r"""
+        Iterates over the chunks of the report comparing the ``FunctionProfiler`` with a ``baseline`` (see :meth:`diff`).
+        Each chunk contains the lines of a function.
+
+        Parameters
+        ----------
+        baseline : FunctionProfiler
+            The ``FunctionProfiler`` to compare with.
+
+        Yields
+        ------
+        str
+            The chunks of the report.
+        """
+        data_columns = {data_column.data_name: data_column for data_column in baseline._data_columns + self._data_columns}
+        for signature_name, difference in self.diff(baseline).items():
+            lines = [f"[{signature_name}] - calls : {self._format_difference(str, *difference['calls'])}\n"]
+            for data_name, data_statistics in difference["data"].items():
+                parts = [f"{statistic} {self._format_difference(data_columns[data_name].string_value, *values)}" for statistic, values in data_statistics.items() if values != (None, None)]
+                lines.append(f"\t{data_name} : {' - '.join(parts)}\n")
+            yield "".join(lines)
+
+    def generate_report_diff(self, baseline: "FunctionProfiler") -> str:
+        r"""
+        Generates the report comparing the ``FunctionProfiler`` with a ``baseline`` (see :meth:`diff`).
+
+        .. code-block:: console
+
+            [function_signature_name] - calls : 100 -> 120 (+20, +20.00%)
+                data_name : total baseline_total -> total (+delta, +percent%) - mean baseline_mean -> mean (+delta, +percent%) - p99 baseline_p99 -> p99 (+delta, +percent%)
+            [new_function_signature_name] - calls : none -> 10 (new)
+                data_name : total none -> total (new) - mean none -> mean (new) - p99 none -> p99 (new)
+
+        Parameters
+        ----------
+        baseline : FunctionProfiler
+            The ``FunctionProfiler`` to compare with.
+
+        Returns
+        -------
+        str
+            The report of the differences.
+        """
+        return "".join(self.iter_report_diff(baseline))
+
+    def _snapshot_metrics(self, bounds: List[float]) -> List[Tuple]:
+        r"""
+        Reads the number of calls and the histograms of the data of each function from the shards of the threads, for the OpenMetrics exposition.
+
+        The recording lock is not held: the histograms are read from copies of the buckets of the quantile sketches, and the cumulative bucket counts of the shards are summed instead of merging their aggregates.
+        The cost is in O(threads x functions x buckets), whatever the number of calls.
+        The functions with the same qualified name (closures) are merged, and the signature names shared by different functions are made unique, as OpenMetrics forbids duplicate label sets.
+        """
+        shards = [(list(shard[1].items()), list(shard[3].items())) for shard in list(self._shards)]
+        # The functions of the shards are registered before their calls are recorded
+        signature_names = self._get_signature_names()
+        function_keys = [self._function_key(func) for func in list(self._profiled_functions)]
+        key_names = {}
+        for function_key, signature_name in zip(function_keys, signature_names):
+            key_names.setdefault(function_key, signature_name)
+        key_names = self._unique_key_names(key_names)
+        functions = {}
+        for shard_aggregates, shard_unsampled_calls in shards:
+            for function_index, (calls, utils_aggregates) in shard_aggregates:
+                function_key = function_keys[function_index]
+                function = functions.get(function_key)
+                if function is None:
+                    function = functions[function_key] = [0, []]
+                function[0] += calls
+                columns = function[1]
+                for column_index, aggregate in enumerate(list(utils_aggregates)):
+                    while len(columns) <= column_index:
+                        columns.append(None)
+                    count, total, minimum = aggregate.count, aggregate.total, aggregate.minimum
+                    if count == 0 or not isinstance(total, (int, float)):
+                        continue
+                    if aggregate.sketch is None:
+                        bucket_counts = None
+                    else:
+                        # The count of the histogram is the one of the buckets read, so the +Inf bucket is consistent with the other buckets
+                        bucket_counts, count = aggregate.sketch.cumulative_counts(bounds)
+                    column = columns[column_index]
+                    if column is None:
+                        columns[column_index] = [count, total, minimum, bucket_counts]
+                    else:
+                        column[0] += count
+                        column[1] += total
+                        column[2] = min(column[2], minimum)
+                        column[3] = None if column[3] is None or bucket_counts is None else [a + b for a, b in zip(column[3], bucket_counts)]
+            for function_index, calls in shard_unsampled_calls:
+                function_key = function_keys[function_index]
+                function = functions.get(function_key)
+                if function is None:
+                    function = functions[function_key] = [0, []]
+                function[0] += calls
+        return [(key_names[function_key], calls, [None if column is None else tuple(column) for column in columns]) for function_key, (calls, columns) in functions.items()]
+
+    def generate_openmetrics(self, prefix: str = "pydecorium", buckets: Optional[List[float]] = None) -> str:
+        r"""
+        Generates the live metrics of the profiled functions in the OpenMetrics text format, to be scraped by Prometheus (see :func:`pydecorium.decorators.openmetrics.render_openmetrics`).
+
+        .. code-block:: console
+
+            # TYPE pydecorium_calls counter
+            pydecorium_calls_total{function="function_signature_name"} 125
+            # TYPE pydecorium_runtime histogram
+            pydecorium_runtime_bucket{function="function_signature_name",le="1000.0"} 0
+            pydecorium_runtime_bucket{function="function_signature_name",le="10000.0"} 119
+            ...
+            pydecorium_runtime_bucket{function="function_signature_name",le="+Inf"} 125
+            pydecorium_runtime_count{function="function_signature_name"} 125
+            pydecorium_runtime_sum{function="function_signature_name"} 2365800
+            # EOF
+
+        The metrics are computed from the aggregates updated at each call, so the generation costs O(functions x buckets) and doesn't read the records.
+        The data are in the unit of their profiler utils (nanoseconds for the ``Timer``, bytes for the ``Memory``).
+        The buckets of the histograms are estimated from the quantile sketches of the aggregates with their relative accuracy. Without ``track_quantiles``, the data are exposed as summaries (count and sum).
+
+        The recording lock is not held while the metrics are generated, so the profiled calls are never blocked.
+        The functions with the same qualified name (closures) share their metrics, and the "function" labels of different functions with the same signature name are followed by their qualified name: ``function="process [module.A.process]"``.
+
+        Parameters
+        ----------
+        prefix : str
+            The prefix of the metric names.
+            Default is "pydecorium".
+        buckets : List[float]
+            The upper bounds of the buckets of the histograms.
+            Default is None (the ``metrics_buckets``, the powers of 10 from 1 to 10^12).
+
+        Returns
+        -------
+        str
+            The metrics in the OpenMetrics text format.
+
+        Raises
+        ------
+        TypeError
+            If the prefix is not a string or the buckets are not a list of numerics.
+        """
+        if not isinstance(prefix, str):
+            raise TypeError("The prefix must be a string.")
+        if buckets is None:
+            buckets = self.metrics_buckets
+        if not isinstance(buckets, (list, tuple)) or not all(isinstance(bound, (int, float)) for bound in buckets):
+            raise TypeError("The buckets must be a list of numerics.")
+        bounds = sorted(set(buckets))
+        return render_openmetrics(self._snapshot_metrics(bounds), [data_column.data_name for data_column in self._data_columns], bounds, prefix)
+
+    def start_metrics_server(self, host: str = "127.0.0.1", port: int = 9464, path: str = "/metrics", prefix: str = "pydecorium", buckets: Optional[List[float]] = None) -> MetricsServer:
+        r"""
+        Starts an HTTP server exposing the metrics of :meth:`generate_openmetrics` on ``path``, to be scraped by Prometheus while the program is running.
+
+        .. code-block:: python
+
+            metrics_server = function_profiler.start_metrics_server(port=9464)
+
+            ...
+
+            metrics_server.close()
+
+        The server runs in a daemon thread and the metrics are generated at each request (see :class:`pydecorium.decorators.MetricsServer`).
+
+        Parameters
+        ----------
+        host : str
+            The address of the server. Use "0.0.0.0" to accept the requests of the other hosts.
+            Default is "127.0.0.1".
+        port : int
+            The port of the server, 0 to choose a free port.
+            Default is 9464.
+        path : str
+            The path of the metrics.
+            Default is "/metrics".
+        prefix : str
+            The prefix of the metric names.
+            Default is "pydecorium".
+        buckets : List[float]
+            The upper bounds of the buckets of the histograms.
+            Default is None (the ``metrics_buckets``).
+
+        Returns
+        -------
+        MetricsServer
+            The running server, stopped by its ``close`` method.
+        """
+        self.generate_openmetrics(prefix, buckets) # Checks the arguments before starting the server
+        return MetricsServer(lambda: self.generate_openmetrics(prefix, buckets), host=host, port=port, path=path)
+
+    def start_process_collection(self, spool_directory: Optional[Union[str, os.PathLike]] = None, collect_records: bool = True) -> str:
+        r"""
+        Starts collecting the data profiled by the worker processes.
+
+        Each process has its own copy of the ``FunctionProfiler``, so the data profiled by the workers of a ``multiprocessing.Pool`` or of a ``concurrent.futures.ProcessPoolExecutor`` are lost at their exit.
+        During the collection, each worker process writes its data in a spool file at its exit (or when :meth:`flush_process_data` is called), and :meth:`collect_process_data` merges the spool files in the ``FunctionProfiler`` of the parent process.
+
+        .. code-block:: python
+
+            function_profiler.start_process_collection()
+            with ProcessPoolExecutor() as executor:
+                results = list(executor.map(work, items))
+            function_profiler.collect_process_data()
+            function_profiler.report_format = "process"
+            print(function_profiler)
+
+        - The workers created by fork remove the data copied from the parent process at their start.
+        - The workers created by spawn or forkserver find the spool directory in the environment variable ``PYDECORIUM_SPOOL_DIRECTORY`` when their ``FunctionProfiler`` is created.
+
+        The data of each worker are merged as new shards tagged with the identifier of the worker process: the reports merge all the processes, the "process" report format reports each process and the trace events (see :meth:`iter_chrome_trace`) keep the process identifiers.
+        The functions of the workers are matched with the functions of the parent by their module and their qualified name.
+
+        .. warning::
+
+            The worker processes killed before their exit (``terminate``, crash) don't write their data.
+            With spawn or forkserver, all the ``FunctionProfiler`` instances of the workers write in the spool directory of the environment variable: only one ``FunctionProfiler`` should be collected.
+
+        Parameters
+        ----------
+        spool_directory : Union[str, os.PathLike]
+            The directory of the spool files.
+            Default is None (a temporary directory removed by :meth:`stop_process_collection`).
+        collect_records : bool
+            If True, the workers ship their records with their aggregates. Otherwise, only the aggregates are shipped, and their size doesn't depend on the number of calls.
+            Default is True.
+
+        Returns
+        -------
+        str
+            The spool directory.
+
+        Raises
+        ------
+        TypeError
+            If ``collect_records`` is not a booleen.
+        ValueError
+            If the processes are already collected.
+        """
+        if not isinstance(collect_records, bool):
+            raise TypeError("The collect_records must be a booleen.")
+        if self._spool_directory is not None:
+            raise ValueError("The processes are already collected, stop the collection with stop_process_collection.")
+        if spool_directory is None:
+            spool_directory = tempfile.mkdtemp(prefix="pydecorium-")
+            self._owns_spool_directory = True
+        else:
+            spool_directory = os.path.abspath(os.fspath(spool_directory))
+            os.makedirs(spool_directory, exist_ok=True)
+            self._owns_spool_directory = False
+        write_collection_config(spool_directory, os.getpid(), collect_records)
+        os.environ[SPOOL_DIRECTORY_VARIABLE] = spool_directory
+        self._spool_directory = spool_directory
+        self._collection_pid = os.getpid()
+        self._collect_records = collect_records
+        _collected_profilers.add(self)
+        # The multiprocessing workers clear the finalizers inherited at the fork, then run the "after fork" callbacks
+        multiprocessing.util.register_after_fork(self, FunctionProfiler._register_worker_finalizer)
+        return spool_directory
+
+    def _start_worker_collection(self) -> None:
+        r"""
+        Starts the collection in a worker process: the data copied from the parent process are removed, and the data of the worker are written in a spool file at its exit.
+        """
+        self._lock = threading.Lock() # The lock can be held by another thread of the parent at the fork
+        self._signature_names_lock = threading.Lock()
+        self._profile_queue = None # The profile file and its thread belong to the parent process
+        self._sink_queue = None # The sinks and their thread belong to the parent process
+        self._call_frame.set(None)
+        self.initialize()
+        _collected_profilers.add(self)
+        self._register_worker_finalizer()
+        # The workers forked by this process (forkserver, nested pools) register their own finalizer
+        multiprocessing.util.register_after_fork(self, FunctionProfiler._register_worker_finalizer)
+
+    def _register_worker_finalizer(self) -> None:
+        r"""
+        Registers the writing of the spool file at the exit of the worker process.
+        The finalizers are run at the exit of the multiprocessing workers and of the main process of a worker created by spawn.
+        """
+        if self._spool_directory is not None and self._collection_pid != os.getpid():
+            multiprocessing.util.Finalize(None, self.flush_process_data, exitpriority=10)
+
+    def flush_process_data(self) -> None:
+        r"""
+        Writes the data profiled by the current worker process in a spool file and removes them from the ``FunctionProfiler`` of the worker.
+
+        It is called automatically at the exit of the worker, it can be called at the end of each task to ship the data before the exit.
+        Nothing is done in the collecting process or if the processes are not collected.
+
+        .. warning::
+
+            The data profiled by the other threads of the worker during the flush can be lost.
+        """
+        if self._spool_directory is None or self._collection_pid == os.getpid():
+            return
+        payload = self._export_process_data()
+        if payload is not None:
+            write_spool_file(self._spool_directory, payload)
+
+    @staticmethod
+    def _process_function_key(module: Optional[str], qualname: Optional[str], name: Optional[str]) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        r"""
+        Returns the key matching the functions of different processes. The main module of the workers created by spawn is named "__mp_main__".
+        """
+        return ("__main__" if module == "__mp_main__" else module), qualname, name
+
+    @staticmethod
+    def _unique_key_names(key_names: Dict[Tuple, str]) -> Dict[Tuple, str]:
+        r"""
+        Makes unique the signature names of the functions keyed by :meth:`_function_key`: the names shared by different keys are followed by the qualified name of the function, for example ``"process [module.A.process]"``.
+        """
+        keys_by_name = {}
+        for key, signature_name in key_names.items():
+            keys_by_name.setdefault(signature_name, []).append(key)
+        unique_names = {}
+        for signature_name, keys in keys_by_name.items():
+            for key in keys:
+                if len(keys) == 1:
+                    unique_names[key] = signature_name
+                else:
+                    module, qualname, name = key
+                    unique_names[key] = f"{signature_name} [{module}.{qualname or name}]"
+        # The keys with the same module and qualified name but different names are numbered
+        seen = set()
+        for key, unique_name in unique_names.items():
+            if unique_name in seen:
+                index = 2
+                while f"{unique_name} ({index})" in seen:
+                    index += 1
+                unique_name = unique_names[key] = f"{unique_name} ({index})"
+            seen.add(unique_name)
+        return unique_names
+
+    @classmethod
+    def _function_key(cls, func) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        r"""
+        Returns the key matching a function with the functions of another ``FunctionProfiler`` or of another process: its module, its qualified name and its name.
+        """
+        return cls._process_function_key(getattr(func, "__module__", None), getattr(func, "__qualname__", None), getattr(func, "__name__", None))
+
+    def _export_process_data(self) -> Optional[dict]:
+        r"""
+        Removes the data of all the shards and returns them with the description of the functions and of the data columns, None if there is no data.
+        """
+        shards = list(self._shards)
+        self.initialize() # The next calls are profiled in new shards
+        if not any(shard[1] or shard[3] for shard in shards):
+            return None
+        return self._export_shards(shards, self._collect_records, copy=False)
+
+    def _export_shards(self, shards: List[Tuple], collect_records: bool, copy: bool) -> dict:
+        r"""
+        Returns the data of the shards with the description of the functions and of the data columns, to be merged by another ``FunctionProfiler`` (see :meth:`_merge_exported_shards`).
+        If ``copy`` is True, the aggregates are copied, so the exported data don't change with the next calls.
+        """
+        exported_shards = []
+        shards_record_stores = self._shards_record_stores(shards) if collect_records else [[] for _ in shards]
+        for (_, aggregates, generator_aggregates, unsampled_calls, call_tree, (pid, thread_ident, thread_name)), record_stores in zip(shards, shards_record_stores):
+            records = [(record_store.timestamps, record_store.function_indices, record_store.columns) for record_store in record_stores if len(record_store)]
+            if copy:
+                aggregates = {function_index: [calls, [aggregate.copy() for aggregate in utils_aggregates]] for function_index, (calls, utils_aggregates) in list(aggregates.items())}
+                generator_aggregates = {function_index: [calls, [aggregate.copy() for aggregate in data_aggregates]] for function_index, (calls, data_aggregates) in list(generator_aggregates.items())}
+                unsampled_calls = dict(unsampled_calls)
+                call_tree = {path: [calls, [aggregate.copy() for aggregate in inclusive_aggregates], [aggregate.copy() for aggregate in exclusive_aggregates]] for path, (calls, inclusive_aggregates, exclusive_aggregates) in list(call_tree.items())}
+            exported_shards.append((pid, thread_ident, thread_name, records, aggregates, generator_aggregates, unsampled_calls, call_tree))
+        functions = [self._function_key(func) for func in list(self._profiled_functions)]
+        return {
+            "version": SPOOL_VERSION,
+            "pid": os.getpid(),
+            "functions": functions,
+            "data_names": [data_column.data_name for data_column in self._data_columns],
+            "shards": exported_shards,
+        }
+
+    def collect_process_data(self) -> int:
+        r"""
+        Merges the data written by the worker processes in the spool directory and removes their spool files (see :meth:`start_process_collection`).
+
+        It can be called several times during the collection, for example after each batch of tasks.
+
+        Returns
+        -------
+        int
+            The number of worker processes whose data were merged.
+        """
+        if self._spool_directory is None or self._collection_pid != os.getpid():
+            return 0
+        pids = set()
+        for file_path, payload in iter_spool_files(self._spool_directory):
+            self._merge_exported_shards(payload)
+            os.remove(file_path)
+            pids.add(payload["pid"])
+        return len(pids)
+
+    def _merge_exported_shards(self, payload: dict) -> None:
+        r"""
+        Merges the shards exported by another ``FunctionProfiler`` (see :meth:`_export_shards`) as new shards.
+        The function indices and the data columns of the other ``FunctionProfiler`` are mapped to the ones of the ``FunctionProfiler`` by their keys and their names.
+        """
+        function_keys = {}
+        for function_index, func in enumerate(list(self._profiled_functions)):
+            function_keys.setdefault(self._function_key(func), function_index)
+        function_indices = []
+        for key in payload["functions"]:
+            function_index = function_keys.get(tuple(key))
+            if function_index is None: # Function profiled only by the other FunctionProfiler
+                function_index = function_keys[tuple(key)] = self._register_function(_ProcessFunction(*key))
+            function_indices.append(function_index)
+        data_names = [data_column.data_name for data_column in self._data_columns]
+        column_indices = [data_names.index(data_name) if data_name in data_names else None for data_name in payload["data_names"]]
+        same_columns = column_indices == list(range(len(data_names)))
+        missing_values = self._missing_values()
+
+        def map_aggregates(aggregates: List[Aggregate]) -> List[Aggregate]:
+            if same_columns:
+                return aggregates
+            mapped_aggregates = [Aggregate(quantiles=self._track_quantiles) for _ in data_names]
+            for column_index, aggregate in zip(column_indices, aggregates):
+                if column_index is not None:
+                    mapped_aggregates[column_index] = aggregate
+            return mapped_aggregates
+
+        for pid, thread_ident, thread_name, records, aggregates, generator_aggregates, unsampled_calls, call_tree in payload["shards"]:
+            record_stores = {}
+            if not self._aggregate_only:
+                for timestamps, record_function_indices, columns in records:
+                    for timestamp, function_index, *values in zip(timestamps, record_function_indices, *columns):
+                        if not same_columns:
+                            mapped_values = list(missing_values)
+                            for column_index, value in zip(column_indices, values):
+                                if column_index is not None:
+                                    mapped_values[column_index] = value
+                            values = mapped_values
+                        function_index = function_indices[function_index]
+                        self._get_record_store(record_stores, function_index).append(timestamp, function_index, values)
+            # Several functions of the worker can be matched with the same function (closures created at each call)
+            shard_aggregates = self._merge_shards_aggregates([{function_indices[function_index]: [calls, map_aggregates(utils_aggregates)]} for function_index, (calls, utils_aggregates) in aggregates.items()] or [{}])
+            shard_generator_aggregates = self._merge_shards_aggregates([{function_indices[function_index]: function_aggregates} for function_index, function_aggregates in generator_aggregates.items()] or [{}])
+            shard_unsampled_calls = {}
+            for function_index, calls in unsampled_calls.items():
+                function_index = function_indices[function_index]
+                shard_unsampled_calls[function_index] = shard_unsampled_calls.get(function_index, 0) + calls
+            shard_call_tree = {}
+            for path, (calls, inclusive_aggregates, exclusive_aggregates) in call_tree.items():
+                path = tuple(function_indices[function_index] for function_index in path)
+                merged = shard_call_tree.get(path)
+                if merged is None:
+                    shard_call_tree[path] = [calls, map_aggregates(inclusive_aggregates), map_aggregates(exclusive_aggregates)]
+                    continue
+                merged[0] += calls
+                for merged_aggregates, path_aggregates in ((merged[1], map_aggregates(inclusive_aggregates)), (merged[2], map_aggregates(exclusive_aggregates))):
+                    for merged_aggregate, aggregate in zip(merged_aggregates, path_aggregates):
+                        merged_aggregate.merge(aggregate)
+            shard = (record_stores, shard_aggregates, shard_generator_aggregates, shard_unsampled_calls, shard_call_tree, (pid, thread_ident, thread_name))
+            with self._lock:
+                self._shards.append(shard)
+
+    def stop_process_collection(self) -> None:
+        r"""
+        Merges the remaining spool files and stops the collection of the worker processes.
+        The temporary spool directory created by :meth:`start_process_collection` is removed.
+        """
+        if self._spool_directory is None:
+            return
+        if self._collection_pid == os.getpid():
+            self.collect_process_data()
+            if os.environ.get(SPOOL_DIRECTORY_VARIABLE) == self._spool_directory:
+                del os.environ[SPOOL_DIRECTORY_VARIABLE]
+            if self._owns_spool_directory:
+                shutil.rmtree(self._spool_directory, ignore_errors=True)
+        self._spool_directory = None
+        self._collection_pid = None
+        self._owns_spool_directory = False
+        _collected_profilers.discard(self)
+
+    def __str__(self) -> str:
+        return self.generate_report()
+
+    def __repr__(self) -> str:
+        return self.generate_report()
+
+
+
+class _CallFrame(object):
+    r"""
+    Active profiled call of the call tree of a :class:`FunctionProfiler` (see ``track_call_tree``).
+
+    Parameters
+    ----------
+    function_index : int
+        The index of the called function.
+    parent : _CallFrame
+        The frame of the profiled call active when the call started, None at the root of the tree.
+    """
+    __slots__ = ("path", "parent", "values", "children_values")
+
+    def __init__(self, function_index: int, parent: Optional["_CallFrame"]) -> None:
+        self.path = (function_index,) if parent is None else parent.path + (function_index,)
+        self.parent = parent
+        self.values = None # The values of the data columns of the call, None if the call is not profiled
+        self.children_values = None # The sums of the values of the profiled calls made by the call
+
+
+
+class _ProcessFunction(object):
+    r"""
+    Function profiled only by a worker process or by another :class:`FunctionProfiler`, registered in the ``FunctionProfiler`` merging its data (see :meth:`FunctionProfiler.start_process_collection` and :meth:`FunctionProfiler.merge`).
+
+    Parameters
+    ----------
+    module : str
+        The module of the function.
+    qualname : str
+        The qualified name of the function.
+    name : str
+        The name of the function.
+    """
+    def __init__(self, module: Optional[str], qualname: Optional[str], name: Optional[str]) -> None:
+        self.__module__ = module
+        self.__qualname__ = qualname
+        self.__name__ = name
+
+    def __repr__(self) -> str:
+        return f"<function {self.__qualname__} profiled by another profiler>"
+
+
+# The FunctionProfiler instances collecting the worker processes, the workers created by fork start their collection
+_collected_profilers = weakref.WeakSet()
+
+def _start_forked_workers_collection() -> None:
+    for function_profiler in list(_collected_profilers):
+        function_profiler._start_worker_collection()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_start_forked_workers_collection)
@@ -0,0 +1,37 @@
+from typing import Union
+
+class GeneratorData(object):
+    r"""
+    ``GeneratorData`` describes a data measured on the iterations of the generators profiled by the :class:`pydecorium.decorators.FunctionProfiler` (see its ``profile_generators`` option).
+
+    It formats the data in the reports with the same methods as a :class:`pydecorium.decorators.ProfilerUtils`.
+
+    Parameters
+    ----------
+    data_name : str
+        The name of the data.
+    unit : str
+        The unit appended to the values.
+        Default is "".
+    summable : bool
+        If the values can be summed. The data which can't be summed (a throughput for example) are not reported by the "cumulative" report.
+        Default is True.
+    """
+    def __init__(self, data_name: str, unit: str = "", summable: bool = True) -> None:
+        self.data_name = data_name
+        self.unit = unit
+        self.summable = summable
+
+    def string_value(self, result: Union[int, float]) -> str:
+        r"""
+        Converts the value in a string format, the integers are kept and the floats are rounded to two decimals.
+        """
+        if isinstance(result, int):
+            return f"{result}{self.unit}"
+        return f"{result:.2f}{self.unit}"
+
+    def string_result(self, result: Union[int, float]) -> str:
+        r"""
+        Converts the value in a string format with the name of the data.
+        """
+        return f"{self.data_name} : {self.string_value(result)}"
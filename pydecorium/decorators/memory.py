@@ -1,5 +1,9 @@
 from .profiler_utils import ProfilerUtils
+from .sampling import EveryNSampling
+import os
+import weakref
 import psutil
+from typing import Union, List
 
 class Memory(ProfilerUtils):
     """
@@ -9,39 +13,138 @@ class Memory(ProfilerUtils):
 
     The ``data_name`` attribute is set to "memory usage".
 
+    The memory usage is the difference of the resident set size (RSS) of the process after and before the function execution.
+    The RSS is read with one of the following backends:
+
+    - "statm": The RSS is read from ``/proc/self/statm`` with ``os.pread`` on a file descriptor kept open (Linux only). It is the fastest backend.
+    - "psutil": The RSS is read with ``psutil.Process().memory_info()`` on a cached process handle.
+    - "auto": "statm" if ``/proc/self/statm`` is available, "psutil" otherwise (default).
+
+    The file descriptor and the process handle are opened again in the child processes after a ``fork``.
+
+    To reduce the overhead further, only one call out of ``sample_every`` of each function can be measured: ``sample_every=n`` is a shortcut for ``sampling=EveryNSampling(n)`` (see :class:`pydecorium.decorators.ProfilerUtils`).
+    The result of the other calls is None: the ``FunctionProfiler`` stores them as missing values and doesn't add them to the aggregates.
+
     .. note::
     
         The memory handle result is given in bytes. It can be summed to get the total memory usage. The string_value method converts the result in bytes, kilobytes, megabytes.
 
+    Parameters
+    ----------
+    backend : str
+        The backend used to read the RSS of the process: "auto", "statm" or "psutil".
+        Default is "auto".
+    sample_every : int
+        The memory usage is measured for one call out of ``sample_every`` of each function, with an :class:`pydecorium.decorators.EveryNSampling` policy. It can't be combined with the ``sampling`` argument.
+        Default is 1 (every call is measured).
+
+    Attributes
+    ----------
+    backend : str
+        The backend used to read the RSS of the process: "statm" or "psutil" ("auto" is resolved at the instantiation).
+    sample_every : int
+        The period of the ``EveryNSampling`` policy set by ``sample_every``, 1 otherwise.
     """
     data_name: str = "memory usage"
+    data_typecode: str = "q"
+    correct_backends = ["auto", "statm", "psutil"]
+    statm_path: str = "/proc/self/statm"
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, backend: str = "auto", sample_every: int = 1, **kwargs):
         super().__init__(*args, **kwargs)
+        if not isinstance(backend, str):
+            raise TypeError("The backend must be a string.")
+        if backend not in self.correct_backends:
+            raise ValueError(f"The backend must be one of {self.correct_backends}.")
+        if backend == "auto":
+            backend = "statm" if os.path.exists(self.statm_path) else "psutil"
+        elif backend == "statm" and not os.path.exists(self.statm_path):
+            raise ValueError(f"The backend 'statm' requires {self.statm_path}.")
+        if not isinstance(sample_every, int):
+            raise TypeError("The sample_every must be an integer.")
+        if sample_every <= 0:
+            raise ValueError("The sample_every must be strictly positive.")
+        if sample_every != 1:
+            if self.sampling is not None:
+                raise ValueError("The sample_every and sampling can't be set together.")
+            self.sampling = EveryNSampling(sample_every)
+        self._backend = backend
+        self._statm_finalizer = None
+        self._open_backend()
+        # The file descriptor and the process handle refer to the parent process after a fork
+        _memory_instances.add(self)
+
+    @property
+    def backend(self) -> str:
+        return self._backend
 
-    def pre_execute(self, func, *args, **kwargs) -> None:
+    @property
+    def sample_every(self) -> int:
+        return self.sampling.n if isinstance(self.sampling, EveryNSampling) else 1
+
+    def _open_backend(self) -> None:
+        """
+        Opens the file descriptor of ``/proc/self/statm`` or the process handle of the current process, and sets the function reading the RSS.
+        """
+        if self._statm_finalizer is not None:
+            self._statm_finalizer() # Closing the previous file descriptor
+            self._statm_finalizer = None
+        if self._backend == "statm":
+            file_descriptor = os.open(self.statm_path, os.O_RDONLY)
+            self._statm_finalizer = weakref.finalize(self, os.close, file_descriptor)
+            page_size = os.sysconf("SC_PAGE_SIZE")
+            pread = os.pread
+            def read_rss() -> int:
+                # statm: size resident shared text lib data dt (in pages)
+                return int(pread(file_descriptor, 128, 0).split()[1]) * page_size
+        else:
+            memory_info = psutil.Process().memory_info
+            def read_rss() -> int:
+                return memory_info().rss
+        self._read_rss = read_rss
+
+    def pre_execute(self, func, *args, **kwargs) -> int:
         """
         Computes the memory usage before the function execution.
+
+        Returns
+        -------
+        int
+            The memory usage (resident set size) of the process in bytes before the function execution.
         """
-        self.process = psutil.Process()
-        self.pre_execute_memory = self.process.memory_info().rss
+        return self._read_rss()
 
-    def post_execute(self, func, *args, **kwargs) -> None:
+    def post_execute(self, token: int, func, *args, **kwargs) -> int:
         """
         Computes the memory usage after the function execution.
+
+        Parameters
+        ----------
+        token : int
+            The memory usage in bytes returned by :meth:`pre_execute`.
+
+        Returns
+        -------
+        int
+            The memory usage of the function in bytes.
         """
-        self.post_execute_memory = self.process.memory_info().rss
+        return self._read_rss() - token
     
-    def handle_result(self) -> int:
+    def handle_result(self, token: int) -> int:
         """
         Computes the memory usage.
 
+        Parameters
+        ----------
+        token : int
+            The memory usage of the function in bytes returned by :meth:`post_execute`.
+
         Returns
         -------
         int
             The memory usage in bytes.
         """
-        return self.post_execute_memory - self.pre_execute_memory
+        return token
     
     def string_value(self, result) -> str:
         """
@@ -49,8 +152,8 @@ class Memory(ProfilerUtils):
         
         Parameters
         ----------
-        result: int
-            The memory usage in bytes.
+        result: Union[int, float]
+            The memory usage in bytes. A float value (a mean for example) is rounded to the nearest byte.
 
         Returns
         -------
@@ -60,16 +163,62 @@ class Memory(ProfilerUtils):
         Raises
         ------
         TypeError
-            If the parameter `result` is not an integer.
+            If the parameter `result` is not numeric.
         """
         # Parameter check
-        if not isinstance(result, int):
-            raise TypeError("The parameter `result` must be an integer.")
-        # Conversion
-        megabytes, remainder = divmod(result, 1024**2)
-        kilobytes, ubytes = divmod(remainder, 1024)
-        return f"{megabytes}MB {kilobytes}KB {ubytes}B"
+        if not isinstance(result, (int, float)):
+            raise TypeError("The parameter `result` must be numeric.")
+        return format_memory(result)
 
+    def string_results(self, results) -> List[str]:
+        """
+        Converts a column of memory usages in a list of strings in the format "memory usage : {megabytes}MB {kilobytes}KB {bytes}B".
 
+        Parameters
+        ----------
+        results : Iterable[int]
+            The memory usages in bytes.
+
+        Returns
+        -------
+        List[str]
+            The memory usages in a string format.
+        """
+        prefix = f"{self.data_name} : "
+        string_value = self.string_value
+        # The null memory usages are the most frequent ones
+        return [f"{prefix}0MB 0KB 0B" if result == 0 else prefix + string_value(result) for result in results]
 
 
+
+_memory_instances = weakref.WeakSet() # The live instances, whose backend is reopened in the forked processes
+
+def _reopen_memory_backends() -> None:
+    for memory in list(_memory_instances):
+        memory._open_backend()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reopen_memory_backends)
+
+
+
+def format_memory(memory: Union[int, float]) -> str:
+    """
+    Converts a memory size in bytes in megabytes, kilobytes and bytes in the format "{megabytes}MB {kilobytes}KB {bytes}B".
+    A negative size is prefixed by "-". A float value (a mean for example) is rounded to the nearest byte.
+
+    Parameters
+    ----------
+    memory : Union[int, float]
+        The memory size in bytes.
+
+    Returns
+    -------
+    str
+        The memory size in megabytes, kilobytes and bytes.
+    """
+    memory = int(round(memory))
+    sign = "-" if memory < 0 else ""
+    megabytes, remainder = divmod(abs(memory), 1024**2)
+    kilobytes, ubytes = divmod(remainder, 1024)
+    return f"{sign}{megabytes}MB {kilobytes}KB {ubytes}B"
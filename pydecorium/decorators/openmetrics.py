@@ -0,0 +1,204 @@
+from typing import Callable, List, Optional, Tuple, Union
+import http.server
+import re
+import threading
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Statistics of a data column of a function: count, total, minimum and cumulative bucket counts (None without quantile sketch)
+ColumnMetrics = Tuple[int, Union[int, float], Union[int, float], Optional[List[int]]]
+
+def metric_name(name: str) -> str:
+    r"""
+    Converts a name into a valid OpenMetrics metric name: the characters which are not letters, digits or "_" are replaced by "_".
+
+    Parameters
+    ----------
+    name : str
+        The name to convert, for example a ``data_name``.
+
+    Returns
+    -------
+    str
+        The metric name.
+    """
+    name = re.sub(r"[^A-Za-z0-9_]", "_", name)
+    return "_" + name if name[:1].isdigit() else name
+
+
+def _label_value(value: str) -> str:
+    r"""
+    Escapes a label value of the OpenMetrics text format.
+    """
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _number(value: Union[int, float]) -> str:
+    r"""
+    Formats a number of the OpenMetrics text format.
+    """
+    if isinstance(value, int):
+        return str(value)
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def render_openmetrics(functions: List[Tuple[str, int, List[Optional[ColumnMetrics]]]], data_names: List[str], bounds: List[float], prefix: str = "pydecorium") -> str:
+    r"""
+    Renders the metrics of the profiled functions in the OpenMetrics text format.
+
+    The following metric families are rendered, with the signature name of the function in the "function" label:
+
+    - ``{prefix}_calls`` (counter): the number of calls of the function, including the calls which were not profiled because of the sampling.
+    - ``{prefix}_{data_name}`` (histogram): the distribution of the numeric data of the profiled calls, with the buckets ``bounds``.
+      Without quantile sketch, the family is a summary with only the count and the sum of the data.
+      The sum is omitted if the data has negative values (a memory delta for example), as required by OpenMetrics for the histograms.
+
+    .. code-block:: console
+
+        # TYPE pydecorium_calls counter
+        pydecorium_calls_total{function="function_signature_name"} 125
+        # TYPE pydecorium_runtime histogram
+        pydecorium_runtime_bucket{function="function_signature_name",le="1000.0"} 0
+        ...
+        pydecorium_runtime_bucket{function="function_signature_name",le="+Inf"} 125
+        pydecorium_runtime_count{function="function_signature_name"} 125
+        pydecorium_runtime_sum{function="function_signature_name"} 2365800
+        # EOF
+
+    The rendering is in O(functions x data columns x buckets), whatever the number of calls.
+
+    Parameters
+    ----------
+    functions : List[Tuple[str, int, List[Optional[ColumnMetrics]]]]
+        For each function, the signature name, the number of calls and for each data column, the count, the total, the minimum and the cumulative bucket counts of the data (None if the data has no numeric value).
+    data_names : List[str]
+        The names of the data columns.
+    bounds : List[float]
+        The upper bounds of the buckets, in increasing order (the "+Inf" bucket is added).
+    prefix : str
+        The prefix of the metric names.
+        Default is "pydecorium".
+
+    Returns
+    -------
+    str
+        The metrics in the OpenMetrics text format, ended by "# EOF".
+    """
+    prefix = metric_name(prefix) + "_" if prefix else ""
+    labels = [f"function=\"{_label_value(signature_name)}\"" for signature_name, _, _ in functions]
+    lines = [f"# TYPE {prefix}calls counter", f"# HELP {prefix}calls The number of calls of the profiled functions."]
+    lines.extend(f"{prefix}calls_total{{{label}}} {calls}" for label, (_, calls, _) in zip(labels, functions))
+    bound_labels = [_number(float(bound)) for bound in bounds] + ["+Inf"]
+    for column_index, data_name in enumerate(data_names):
+        name = prefix + metric_name(data_name)
+        columns = [(label, column_metrics[column_index]) for label, (_, _, column_metrics) in zip(labels, functions) if column_index < len(column_metrics) and column_metrics[column_index] is not None]
+        if not columns:
+            continue
+        histogram = all(column[3] is not None for _, column in columns)
+        lines.append(f"# TYPE {name} {'histogram' if histogram else 'summary'}")
+        lines.append(f"# HELP {name} The {data_name} of the profiled calls.")
+        for label, (count, total, minimum, bucket_counts) in columns:
+            if histogram:
+                # The +Inf bucket must be equal to the count
+                bucket_counts = bucket_counts + [count]
+                lines.extend(f"{name}_bucket{{{label},le=\"{bound_label}\"}} {bucket_count}" for bound_label, bucket_count in zip(bound_labels, bucket_counts))
+            lines.append(f"{name}_count{{{label}}} {count}")
+            if not (histogram and minimum < 0):
+                lines.append(f"{name}_sum{{{label}}} {_number(total)}")
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+
+class MetricsServer(object):
+    r"""
+    ``MetricsServer`` is a minimal HTTP server exposing the metrics of a :class:`pydecorium.decorators.FunctionProfiler` in the OpenMetrics text format, to be scraped by Prometheus (see :meth:`pydecorium.decorators.FunctionProfiler.start_metrics_server`).
+
+    The server answers the GET requests on ``path`` from a daemon thread, the metrics are rendered at each request.
+
+    .. code-block:: console
+
+        $ curl http://127.0.0.1:9464/metrics
+
+    Parameters
+    ----------
+    render : Callable[[], str]
+        The function rendering the metrics.
+    host : str
+        The address of the server.
+        Default is "127.0.0.1".
+    port : int
+        The port of the server, 0 to choose a free port.
+        Default is 9464.
+    path : str
+        The path of the metrics.
+        Default is "/metrics".
+    """
+    def __init__(self, render: Callable[[], str], host: str = "127.0.0.1", port: int = 9464, path: str = "/metrics") -> None:
+        if not isinstance(port, int):
+            raise TypeError("The port must be an integer.")
+        if not isinstance(path, str):
+            raise TypeError("The path must be a string.")
+        self._render = render
+        self._path = path
+        server = self
+
+        class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] != server._path:
+                    self.send_error(404)
+                    return
+                try:
+                    body = server._render().encode("utf-8")
+                except Exception as error:
+                    self.send_error(500, explain=repr(error))
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass # The scrapes are not logged
+
+        self._server = http.server.ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="pydecorium-metrics", daemon=True)
+        self._thread.start()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        r"""
+        The host and the port of the server.
+        """
+        return self._server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        r"""
+        The URL of the metrics.
+        """
+        host, port = self.address
+        return f"http://{host}:{port}{self._path}"
+
+    def close(self) -> None:
+        r"""
+        Stops the server and releases its port.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self) -> "MetricsServer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"MetricsServer({self.url!r})"
@@ -0,0 +1,105 @@
+from typing import Any, Dict, Iterator, Optional, Tuple
+import itertools
+import json
+import os
+import pickle
+
+# The spool directory of the process collection, inherited by the worker processes (fork, spawn or forkserver)
+SPOOL_DIRECTORY_VARIABLE = "PYDECORIUM_SPOOL_DIRECTORY"
+SPOOL_VERSION = 1
+_CONFIG_NAME = "collection.json"
+_SPOOL_SUFFIX = ".pdspool"
+_sequence = itertools.count()
+
+def write_collection_config(spool_directory: str, parent_pid: int, collect_records: bool) -> None:
+    r"""
+    Writes the configuration of a process collection in its spool directory, so the worker processes created by spawn can read it.
+
+    Parameters
+    ----------
+    spool_directory : str
+        The spool directory of the collection.
+    parent_pid : int
+        The identifier of the process collecting the data.
+    collect_records : bool
+        If the workers ship their records with their aggregates.
+    """
+    with open(os.path.join(spool_directory, _CONFIG_NAME), "w") as file:
+        json.dump({"version": SPOOL_VERSION, "pid": parent_pid, "records": collect_records}, file)
+
+
+def read_collection_config(spool_directory: str) -> Optional[Dict[str, Any]]:
+    r"""
+    Reads the configuration of a process collection, None if the spool directory doesn't contain a valid configuration.
+
+    Parameters
+    ----------
+    spool_directory : str
+        The spool directory of the collection.
+
+    Returns
+    -------
+    Optional[Dict[str, Any]]
+        The identifier of the collecting process ("pid") and if the records are collected ("records").
+    """
+    try:
+        with open(os.path.join(spool_directory, _CONFIG_NAME)) as file:
+            config = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(config, dict) or config.get("version") != SPOOL_VERSION:
+        return None
+    return config
+
+
+def write_spool_file(spool_directory: str, payload: Dict[str, Any]) -> str:
+    r"""
+    Writes the data of a worker process in a new spool file.
+
+    The file is written under a temporary name and renamed at the end, so the collecting process never reads a partial file.
+
+    Parameters
+    ----------
+    spool_directory : str
+        The spool directory of the collection.
+    payload : Dict[str, Any]
+        The data of the worker process.
+
+    Returns
+    -------
+    str
+        The path of the spool file.
+    """
+    file_path = os.path.join(spool_directory, f"{os.getpid()}-{next(_sequence)}{_SPOOL_SUFFIX}")
+    temporary_path = file_path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, file_path)
+    return file_path
+
+
+def iter_spool_files(spool_directory: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    r"""
+    Iterates over the complete spool files of a collection in the order of their writing.
+
+    .. warning::
+
+        The spool files are unpickled, the spool directory must only be writable by the profiled program.
+
+    Parameters
+    ----------
+    spool_directory : str
+        The spool directory of the collection.
+
+    Yields
+    ------
+    Tuple[str, Dict[str, Any]]
+        The path of the spool file and the data of the worker process.
+    """
+    file_names = [file_name for file_name in os.listdir(spool_directory) if file_name.endswith(_SPOOL_SUFFIX)]
+    file_paths = sorted((os.path.join(spool_directory, file_name) for file_name in file_names), key=os.path.getmtime)
+    for file_path in file_paths:
+        with open(file_path, "rb") as file:
+            payload = pickle.load(file)
+        if payload.get("version") == SPOOL_VERSION:
+            yield file_path, payload
@@ -0,0 +1,655 @@
+from .record_store import RecordStore
+
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
+import array
+import atexit
+import math
+import mmap
+import os
+import queue
+import struct
+import sys
+import threading
+
+PROFILE_MAGIC = b"PYDPROF\x00"
+PROFILE_VERSION = 1
+# magic, version, number of data columns, record size, number of records, footer offset, footer size
+_HEADER = struct.Struct("<8sHHIQQQ24x")
+_INTEGER_CODES = {(1, False): "b", (2, False): "h", (4, False): "i", (8, False): "q", (1, True): "B", (2, True): "H", (4, True): "I", (8, True): "Q"}
+
+def profile_typecode(typecode: Optional[str]) -> str:
+    r"""
+    Returns the fixed-width code of a column of the profile files for the typecode of a column of a :class:`pydecorium.decorators.RecordStore`.
+
+    The integer typecodes are converted to the codes of the same size in the standard sizes of the ``struct`` module ("b", "h", "i", "q" and their unsigned versions).
+    The columns of Python objects (None) are stored as float64 ("d").
+
+    Parameters
+    ----------
+    typecode : Optional[str]
+        The typecode of the column (see the ``array`` module).
+
+    Returns
+    -------
+    str
+        The code of the column in the profile files.
+    """
+    if typecode is None or typecode == "d":
+        return "d"
+    if typecode == "f":
+        return "f"
+    return _INTEGER_CODES[(array.array(typecode).itemsize, typecode.isupper())]
+
+
+class ProfileWriter(object):
+    r"""
+    ``ProfileWriter`` writes the records of a :class:`pydecorium.decorators.FunctionProfiler` in a binary profile file, chunk by chunk.
+
+    The profile file is composed of:
+
+    - a header of 64 bytes: the magic ``b"PYDPROF\0"``, the version, the number of data columns, the size of a record, the number of records, the offset and the size of the footer (little-endian).
+    - the records, with a fixed width: the timestamp in nanoseconds (int64), the function index (int32) and one value per data column, packed without padding.
+    - the footer, after the records: the table of the data columns (code and name of each column) and the table of the functions (signature name of each function index).
+
+    The header is always written last: the records and the new footer are written and synced to the disk first, then the header pointing to them is rewritten.
+    A record or a footer referenced by the header is never overwritten, so the file is readable after each :meth:`write`, even by a reader mapping it while it is written or after a crash.
+    While the file is open, a gap can separate the records from the footer; it is removed by :meth:`close`.
+    The file can be read without loading it with a :class:`pydecorium.decorators.ProfileReader`.
+
+    The missing values are stored with the sentinels of the :class:`pydecorium.decorators.RecordStore`.
+    The columns of Python objects are stored as float64: their non-numeric values are missing (NaN).
+
+    Parameters
+    ----------
+    file_path : Union[str, os.PathLike]
+        The path of the profile file. An existing file is overwritten.
+    data_names : List[str]
+        The names of the data columns.
+    typecodes : List[Optional[str]]
+        The typecodes of the data columns (see :class:`pydecorium.decorators.RecordStore`).
+
+    Raises
+    ------
+    ValueError
+        If the numbers of names and typecodes are different.
+    """
+    def __init__(self, file_path: Union[str, os.PathLike], data_names: List[str], typecodes: List[Optional[str]]) -> None:
+        if len(data_names) != len(typecodes):
+            raise ValueError("The data_names and typecodes must have the same length.")
+        self._file_path = os.fspath(file_path)
+        self._data_names = list(data_names)
+        self._codes = ["q", "i"] + [profile_typecode(typecode) for typecode in typecodes]
+        self._offsets = []
+        offset = 0
+        for code in self._codes:
+            self._offsets.append(offset)
+            offset += struct.calcsize("<" + code)
+        self._record_size = offset
+        self._length = 0
+        self._signature_names = []
+        self._lock = threading.Lock()
+        self._file = open(self._file_path, "w+b")
+        # The footer referenced by the header
+        self._footer = b""
+        self._footer_offset = _HEADER.size
+        self._commit(0, self._pack_footer(), _HEADER.size)
+
+    @property
+    def file_path(self) -> str:
+        return self._file_path
+
+    @property
+    def record_size(self) -> int:
+        return self._record_size
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def __len__(self) -> int:
+        return self._length
+
+    def set_signature_names(self, signature_names: List[str]) -> None:
+        r"""
+        Sets the signature names of the functions, written in the footer at the next :meth:`write` or :meth:`flush`.
+
+        Parameters
+        ----------
+        signature_names : List[str]
+            The signature name of each function index.
+        """
+        self._signature_names = list(signature_names)
+
+    def write(self, timestamps, function_indices, columns: List) -> None:
+        r"""
+        Appends records given by columns to the file and updates the footer and the header.
+
+        If the records would overwrite the footer referenced by the header, the footer is first moved after them (and the header updated), so the file stays readable at each step.
+
+        Parameters
+        ----------
+        timestamps : Union[array.array, list]
+            The timestamps of the records in nanoseconds since the epoch.
+        function_indices : Union[array.array, list]
+            The function indices of the records.
+        columns : List
+            The data columns of the records, with the missing values given as their sentinels.
+
+        Raises
+        ------
+        ValueError
+            If the number of columns is different from the number of data columns of the file or if the file is closed.
+        """
+        if len(columns) != len(self._codes) - 2:
+            raise ValueError("The number of columns doesn't match the data columns of the profile file.")
+        length = len(timestamps)
+        if length == 0:
+            return
+        records = self._pack_records([timestamps, function_indices, *columns], length)
+        with self._lock:
+            if self._file.closed:
+                raise ValueError("The profile file is closed.")
+            records_offset = _HEADER.size + self._length * self._record_size
+            records_end = records_offset + len(records)
+            footer = self._pack_footer()
+            if records_end > self._footer_offset:
+                # The records would overwrite the committed footer: the footer is moved after them first
+                self._commit(self._length, footer, records_end)
+            self._file.seek(records_offset)
+            self._file.write(records)
+            if footer == self._footer:
+                self._commit_header(self._length + length)
+            else:
+                self._commit(self._length + length, footer, records_end)
+
+    def _pack_records(self, columns: List, length: int) -> bytearray:
+        r"""
+        Packs the columns into fixed-width records.
+        The bytes of each column are interleaved in the records with strided slice assignments, without a Python loop over the records.
+        """
+        records = bytearray(length * self._record_size)
+        for code, offset, column in zip(self._codes, self._offsets, columns):
+            if not (isinstance(column, array.array) and column.typecode == code):
+                if code in "fd":
+                    column = [value if isinstance(value, (int, float)) else math.nan for value in column]
+                column = array.array(code, column)
+            elif sys.byteorder == "big":
+                column = array.array(code, column)
+            if sys.byteorder == "big":
+                column.byteswap()
+            data = column.tobytes()
+            itemsize = column.itemsize
+            for byte in range(itemsize):
+                records[offset + byte::self._record_size] = data[byte::itemsize]
+        return records
+
+    def _pack_footer(self) -> bytes:
+        r"""
+        Packs the table of the data columns and the table of the functions.
+        """
+        footer = bytearray()
+        for code, data_name in zip(self._codes[2:], self._data_names):
+            name = data_name.encode("utf-8")
+            footer += struct.pack("<cH", code.encode("ascii"), len(name)) + name
+        footer += struct.pack("<I", len(self._signature_names))
+        for signature_name in self._signature_names:
+            name = signature_name.encode("utf-8")
+            footer += struct.pack("<I", len(name)) + name
+        return bytes(footer)
+
+    def _commit(self, length: int, footer: bytes, reserved_end: int) -> None:
+        r"""
+        Writes ``footer`` and then the header referencing ``length`` records and the footer.
+
+        The footer is written after ``reserved_end`` (the end of the records) and doesn't overlap the committed footer: it is put in the gap before the committed footer if it fits, after it otherwise.
+        The lock must be held by the caller.
+        """
+        committed_end = self._footer_offset + len(self._footer)
+        footer_offset = reserved_end if reserved_end + len(footer) <= self._footer_offset else max(reserved_end, committed_end)
+        self._file.seek(footer_offset)
+        self._file.write(footer)
+        self._footer, self._footer_offset = footer, footer_offset
+        self._commit_header(length)
+
+    def _commit_header(self, length: int) -> None:
+        r"""
+        Syncs the records and the footer to the disk, then rewrites the header referencing them.
+        The lock must be held by the caller.
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(PROFILE_MAGIC, PROFILE_VERSION, len(self._codes) - 2, self._record_size, length, self._footer_offset, len(self._footer)))
+        self._file.flush()
+        self._length = length
+
+    def flush(self) -> None:
+        r"""
+        Rewrites the footer with the current signature names.
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            footer = self._pack_footer()
+            if footer != self._footer:
+                self._commit(self._length, footer, _HEADER.size + self._length * self._record_size)
+
+    def close(self) -> None:
+        r"""
+        Writes the footer right after the records, truncates the file and closes it.
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            records_end = _HEADER.size + self._length * self._record_size
+            footer = self._pack_footer()
+            # The footer is moved after the committed one until it fits right after the records
+            while self._footer_offset != records_end or footer != self._footer:
+                self._commit(self._length, footer, records_end)
+            self._file.truncate(records_end + len(footer))
+            self._file.close()
+
+    def __enter__(self) -> "ProfileWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ProfileWriterQueue(object):
+    r"""
+    ``ProfileWriterQueue`` writes the record stores of the profiled threads to a profile file from a background thread, so the profiled calls never wait for the disk.
+
+    It is created by :meth:`pydecorium.decorators.FunctionProfiler.open_profile_file`.
+    A thread hands a full store over with :meth:`put` and never modifies it afterwards; the background thread appends its records to the file with a :class:`ProfileWriter`, with the signature names current at the write.
+    When ``max_pending`` stores are waiting, :meth:`put` blocks until the background thread catches up, so the memory used by the records stays bounded and no record is dropped.
+
+    Parameters
+    ----------
+    writer : ProfileWriter
+        The writer of the profile file, closed by :meth:`close`.
+    get_signature_names : Callable[[], List[str]]
+        The function returning the signature name of each function index.
+    max_pending : int
+        The maximum number of stores waiting to be written.
+        Default is 16.
+    """
+    def __init__(self, writer: ProfileWriter, get_signature_names: Callable[[], List[str]], max_pending: int = 16) -> None:
+        if not isinstance(writer, ProfileWriter):
+            raise TypeError("The writer must be an instance of ProfileWriter.")
+        if not isinstance(max_pending, int):
+            raise TypeError("The max_pending must be an integer.")
+        if max_pending <= 0:
+            raise ValueError("The max_pending must be strictly positive.")
+        self._writer = writer
+        self._get_signature_names = get_signature_names
+        self._queue = queue.Queue(max_pending)
+        self._written = 0
+        self._errors = 0
+        self.last_error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="pydecorium-profile-file", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def writer(self) -> ProfileWriter:
+        return self._writer
+
+    @property
+    def file_path(self) -> str:
+        return self._writer.file_path
+
+    @property
+    def pending(self) -> int:
+        r"""
+        The number of stores waiting to be written.
+        """
+        return self._queue.qsize()
+
+    @property
+    def written(self) -> int:
+        r"""
+        The number of records written to the file.
+        """
+        return self._written
+
+    @property
+    def errors(self) -> int:
+        r"""
+        The number of stores which couldn't be written.
+        """
+        return self._errors
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, record_store: RecordStore) -> None:
+        r"""
+        Queues a store to be written. The store must not be modified afterwards.
+
+        Parameters
+        ----------
+        record_store : RecordStore
+            The store handed over by its thread.
+
+        Raises
+        ------
+        ValueError
+            If the queue is closed.
+        """
+        if self._closed:
+            raise ValueError("The profile file is closed.")
+        self._queue.put(record_store)
+
+    def _run(self) -> None:
+        r"""
+        Loop of the background thread: writes the queued stores until the queue is closed, then closes the writer.
+        """
+        while True:
+            item = self._queue.get()
+            self._writer.set_signature_names(self._get_signature_names())
+            if item is None: # Closing
+                self._call_writer(self._writer.close)
+                return
+            if isinstance(item, threading.Event): # Flush request
+                self._call_writer(self._writer.flush)
+                item.set()
+                continue
+            if self._call_writer(self._writer.write, item.timestamps, item.function_indices, item.columns):
+                self._written += len(item)
+
+    def _call_writer(self, method: Callable, *args) -> bool:
+        r"""
+        Calls a method of the writer, the errors are counted instead of stopping the background thread.
+        """
+        try:
+            method(*args)
+        except Exception as error:
+            self._errors += 1
+            self.last_error = error
+            return False
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        r"""
+        Waits until the stores queued before the call are written and the footer of the file contains the current signature names.
+
+        Parameters
+        ----------
+        timeout : float
+            The maximum time to wait in seconds.
+            Default is None (no limit).
+
+        Returns
+        -------
+        bool
+            If the stores were written before the timeout.
+        """
+        if self._closed or not self._thread.is_alive():
+            return False
+        flushed = threading.Event()
+        self._queue.put(flushed)
+        return flushed.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        r"""
+        Writes the queued stores, closes the profile file with the current signature names and stops the background thread.
+
+        Parameters
+        ----------
+        timeout : float
+            The maximum time to wait for the background thread in seconds.
+            Default is None (no limit).
+        """
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._queue.put(None)
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+
+class ProfileReader(object):
+    r"""
+    ``ProfileReader`` reads a binary profile file written by a :class:`pydecorium.decorators.ProfileWriter` (see :meth:`pydecorium.decorators.FunctionProfiler.open_profile_file`).
+
+    The file is memory-mapped: the records are read from the file by the operating system when they are accessed, so a profile larger than the memory can be queried.
+
+    .. code-block:: python
+
+        with ProfileReader("profile.pdprof") as reader:
+            records = reader.to_numpy() # Structured array mapped on the file, without copy
+            runtimes = records["runtime"][records["function_index"] == reader.signature_names.index("load")]
+
+    Without ``numpy``, the records can be read with :meth:`get_record`, :meth:`iter_records` and :meth:`iter_rows`.
+
+    Parameters
+    ----------
+    file_path : Union[str, os.PathLike]
+        The path of the profile file.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a profile file or if its version is not supported.
+    """
+    def __init__(self, file_path: Union[str, os.PathLike]) -> None:
+        self._file_path = os.fspath(file_path)
+        with open(self._file_path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_metadata()
+        except BaseException:
+            self._mmap.close()
+            raise
+
+    def _read_metadata(self) -> None:
+        r"""
+        Reads the header and the footer of the file.
+        """
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError("The file is not a pydecorium profile file.")
+        magic, version, columns, record_size, length, footer_offset, footer_size = _HEADER.unpack_from(self._mmap, 0)
+        if magic != PROFILE_MAGIC:
+            raise ValueError("The file is not a pydecorium profile file.")
+        if version != PROFILE_VERSION:
+            raise ValueError(f"The version {version} of the profile file is not supported.")
+        # A gap can separate the records from the footer while the file is written
+        if footer_offset + footer_size > len(self._mmap) or footer_offset < _HEADER.size + length * record_size:
+            raise ValueError("The profile file is truncated.")
+        offset = footer_offset
+        self._codes = ["q", "i"]
+        self._data_names = []
+        for _ in range(columns):
+            code, size = struct.unpack_from("<cH", self._mmap, offset)
+            offset += 3
+            self._codes.append(code.decode("ascii"))
+            self._data_names.append(self._mmap[offset:offset + size].decode("utf-8"))
+            offset += size
+        functions, = struct.unpack_from("<I", self._mmap, offset)
+        offset += 4
+        self._signature_names = []
+        for _ in range(functions):
+            size, = struct.unpack_from("<I", self._mmap, offset)
+            offset += 4
+            self._signature_names.append(self._mmap[offset:offset + size].decode("utf-8"))
+            offset += size
+        self._record = struct.Struct("<" + "".join(self._codes))
+        if self._record.size != record_size:
+            raise ValueError("The record size of the profile file doesn't match its columns.")
+        self._length = length
+        self._missing_values = [RecordStore.missing_value(code) for code in self._codes[2:]]
+
+    @property
+    def file_path(self) -> str:
+        return self._file_path
+
+    @property
+    def data_names(self) -> List[str]:
+        r"""
+        The names of the data columns.
+        """
+        return self._data_names
+
+    @property
+    def typecodes(self) -> List[str]:
+        r"""
+        The codes of the data columns (see the ``struct`` module).
+        """
+        return self._codes[2:]
+
+    @property
+    def signature_names(self) -> List[str]:
+        r"""
+        The signature name of each function index.
+        """
+        return self._signature_names
+
+    @property
+    def missing_values(self) -> List[Any]:
+        r"""
+        The sentinels of the missing values of each data column.
+        """
+        return self._missing_values
+
+    @property
+    def record_size(self) -> int:
+        return self._record.size
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _is_missing(self, column_index: int, value: Any) -> bool:
+        missing_value = self._missing_values[column_index]
+        if isinstance(missing_value, float):
+            return value != value
+        return value == missing_value
+
+    def get_record(self, index: int) -> Tuple[int, int, dict]:
+        r"""
+        Returns the record at the given index, in the order of the file.
+
+        Parameters
+        ----------
+        index : int
+            The index of the record.
+
+        Returns
+        -------
+        Tuple[int, int, dict]
+            The timestamp in nanoseconds, the function index and the dictionary of the present values with the column index as key.
+
+        Raises
+        ------
+        IndexError
+            If the index is out of range.
+        """
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("The record index is out of range.")
+        timestamp, function_index, *values = self._record.unpack_from(self._mmap, _HEADER.size + index * self._record.size)
+        return timestamp, function_index, {column_index: value for column_index, value in enumerate(values) if not self._is_missing(column_index, value)}
+
+    def iter_rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[tuple]:
+        r"""
+        Iterates over the raw rows of the records between ``start`` and ``stop``, read directly from the mapped file.
+        The missing values are given as their sentinel.
+
+        Parameters
+        ----------
+        start : int
+            The index of the first record.
+            Default is 0.
+        stop : int
+            The index after the last record.
+            Default is None (the end of the file).
+
+        Yields
+        ------
+        tuple
+            The timestamp in nanoseconds, the function index and the values of each column.
+        """
+        start, stop, _ = slice(start, stop).indices(self._length)
+        if start >= stop:
+            return
+        with memoryview(self._mmap) as view:
+            records = view[_HEADER.size + start * self._record.size:_HEADER.size + stop * self._record.size]
+            try:
+                yield from self._record.iter_unpack(records)
+            finally:
+                records.release()
+
+    def iter_records(self) -> Iterator[Tuple[int, int, dict]]:
+        r"""
+        Iterates over the records in the order of the file.
+
+        Yields
+        ------
+        Tuple[int, int, dict]
+            The timestamp in nanoseconds, the function index and the dictionary of the present values with the column index as key.
+        """
+        for timestamp, function_index, *values in self.iter_rows():
+            yield timestamp, function_index, {column_index: value for column_index, value in enumerate(values) if not self._is_missing(column_index, value)}
+
+    def to_numpy(self):
+        r"""
+        Returns the records as a ``numpy`` structured array mapped on the file, without copy.
+
+        The fields are "timestamp", "function_index" and the names of the data columns.
+        The array is read-only and its data are loaded by the operating system when they are accessed.
+
+        Returns
+        -------
+        numpy.ndarray
+            The structured array of the records.
+
+        Raises
+        ------
+        ImportError
+            If ``numpy`` is not installed.
+        """
+        try:
+            import numpy
+        except ImportError as error:
+            raise ImportError("The numpy package is required to read the profile file as an array.") from error
+        dtype = numpy.dtype([(name, "<" + code) for name, code in zip(["timestamp", "function_index"] + self._data_names, self._codes)])
+        return numpy.frombuffer(self._mmap, dtype=dtype, count=self._length, offset=_HEADER.size)
+
+    def column(self, name: str):
+        r"""
+        Returns a column of the records as a ``numpy`` array mapped on the file, without copy (see :meth:`to_numpy`).
+
+        Parameters
+        ----------
+        name : str
+            The name of the column: "timestamp", "function_index" or the name of a data column.
+
+        Returns
+        -------
+        numpy.ndarray
+            The strided view of the column.
+        """
+        return self.to_numpy()[name]
+
+    def close(self) -> None:
+        r"""
+        Closes the mapping of the file.
+        If ``numpy`` arrays returned by :meth:`to_numpy` are still alive, the mapping is closed when they are deleted.
+        """
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def __enter__(self) -> "ProfileReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"ProfileReader({self._file_path!r}, records={self._length}, data_names={self._data_names})"
@@ -1,4 +1,9 @@
 from ..decorator import Decorator
+from .sampling import Sampling
+
+from typing import Any, List, Optional, Tuple
+import threading
+import time
 
 class ProfilerUtils(Decorator):
     """
@@ -8,39 +13,172 @@ class ProfilerUtils(Decorator):
 
     .. code-block:: python
 
-        def pre_execute(func, *args, **kwargs) -> None:
+        def pre_execute(self, func, *args, **kwargs) -> Any:
             pass
 
-        def post_execute(func, *args, **kwargs) -> None:
+        def post_execute(self, token, func, *args, **kwargs) -> Any:
             pass
 
-        def handle_result(self):
+        def handle_result(self, token):
             pass
 
         def string_value(self, result) -> str:
             pass
 
+    The state of a call is not stored on the instance, because the same instance measures the concurrent calls (several threads) and the nested calls (recursion) of the profiled functions.
+    ``pre_execute`` returns a token describing the state of the call before its execution (the start time for example).
+    ``post_execute`` receives this token and returns the token of the finished call (the runtime for example).
+    ``handle_result`` receives the token returned by ``post_execute`` and returns the result of the call, or None if the call is not measured (sampling for example).
+
+    If the function raises an exception, ``post_execute`` is not called and the token is given to ``abort_execute`` instead.
+    By default it does nothing; the subclasses keeping a per-thread state (a stack of the nested calls for example) override it to release the state of the call.
+
     The subclasses must contain the following attributes:
 
     - `data_name`: str
         The name of the data collected by the profiler.
 
+    The subclasses can also set the following attributes:
+
+    - `data_typecode`: str
+        The typecode (see the ``array`` module) used by the :class:`pydecorium.decorators.FunctionProfiler` to store the results in a compact typed column.
+        Default is None: the results are stored as Python objects.
+
+    - `data_fields`: Tuple[str, ...]
+        The names of the fields of a multi-valued result. If set, ``handle_result`` returns a tuple with one value per field and the :class:`pydecorium.decorators.FunctionProfiler` stores and aggregates each field in its own column (with the ``data_typecode``).
+        The subclasses can then implement :meth:`string_summary` to report a data derived from the fields (a ratio for example).
+        Default is None: the result is a single value.
+
+    A sampling policy (see :class:`pydecorium.decorators.Sampling`) can be given with the ``sampling`` argument to measure only some calls of the profiled functions.
+    The calls which are not measured don't execute ``pre_execute`` and ``post_execute`` and their result is None.
+    They are counted in the ``unsampled_calls`` attribute of the profiler utils.
+
     .. note::
 
         The subclasses can also be used as a simple decorator that prints on the console the result.
+        The coroutine functions are measured until the end of their execution (the coroutine is awaited between ``pre_execute`` and ``post_execute``).
+
+    Parameters
+    ----------
+    sampling : Sampling
+        The sampling policy selecting the measured calls.
+        Default is None (every call is measured).
     """
     data_name: str = None
+    data_typecode: str = None
+    data_fields: Tuple[str, ...] = None
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, sampling: Optional[Sampling] = None, **kwargs):
         super().__init__(*args, **kwargs)
+        self._unsampled_calls = 0
+        self._unsampled_lock = threading.Lock()
+        self.sampling = sampling
+
+    @property
+    def sampling(self) -> Optional[Sampling]:
+        return self._sampling
+
+    @sampling.setter
+    def sampling(self, sampling: Optional[Sampling]) -> None:
+        if sampling is not None and not isinstance(sampling, Sampling):
+            raise TypeError("The sampling must be an instance of Sampling.")
+        self._sampling = sampling
+        with self._unsampled_lock:
+            self._unsampled_calls = 0
+        # The sampled hooks replace the hooks of the instance, so the callers (FunctionProfiler, wrappers) don't check the sampling
+        if sampling is None:
+            for hook in ("pre_execute", "post_execute", "handle_result", "abort_execute"):
+                self.__dict__.pop(hook, None)
+        else:
+            self.pre_execute = self._sampled_pre_execute
+            self.post_execute = self._sampled_post_execute
+            self.handle_result = self._sampled_handle_result
+            self.abort_execute = self._sampled_abort_execute
+
+    @property
+    def unsampled_calls(self) -> int:
+        """
+        The number of calls which were not measured because of the sampling policy, since the policy was set.
+        """
+        return self._unsampled_calls
+
+    def _sampled_pre_execute(self, func, *args, **kwargs) -> Any:
+        """
+        Executes :meth:`pre_execute` if the call is selected by the sampling policy.
+        The token of a call which is not measured is the ``_unsampled`` sentinel.
+        """
+        sampling = self._sampling
+        if not sampling.sample(func):
+            with self._unsampled_lock: # The threads share the counter
+                self._unsampled_calls += 1
+            return _unsampled
+        if not sampling.uses_feedback:
+            return type(self).pre_execute(self, func, *args, **kwargs)
+        start = time.perf_counter_ns()
+        token = type(self).pre_execute(self, func, *args, **kwargs)
+        end = time.perf_counter_ns()
+        return _SampledCall(token, end - start, end)
+
+    def _sampled_post_execute(self, token, func, *args, **kwargs) -> Any:
+        """
+        Executes :meth:`post_execute` for the calls selected by the sampling policy and gives the runtime and the overhead of the call to the policy if it uses them.
+        """
+        if token is _unsampled:
+            return token
+        if not isinstance(token, _SampledCall):
+            return type(self).post_execute(self, token, func, *args, **kwargs)
+        start = time.perf_counter_ns()
+        result_token = type(self).post_execute(self, token.token, func, *args, **kwargs)
+        end = time.perf_counter_ns()
+        self._sampling.update(func, start - token.end, token.overhead + end - start)
+        return result_token
+
+    def _sampled_handle_result(self, token) -> Any:
+        """
+        Executes :meth:`handle_result` for the calls selected by the sampling policy, returns None for the other ones.
+        """
+        if token is _unsampled:
+            return None
+        return type(self).handle_result(self, token)
+
+    def _sampled_abort_execute(self, token, func, *args, **kwargs) -> None:
+        """
+        Executes :meth:`abort_execute` for the calls selected by the sampling policy.
+        """
+        if token is _unsampled:
+            return
+        if isinstance(token, _SampledCall):
+            token = token.token
+        type(self).abort_execute(self, token, func, *args, **kwargs)
 
     def _wrapper(self, func, *args, **kwargs):
-        pre_execute = self.pre_execute(func, *args, **kwargs)
-        outputs = func(*args, **kwargs)
-        post_execute = self.post_execute(func, *args, **kwargs)
-        # print the result of the logger utils
-        function_signature_name = self.get_signature_name(func)
-        print(f"{function_signature_name} - {self.string_result(self.handle_result())}")
+        token = self.pre_execute(func, *args, **kwargs)
+        try:
+            outputs = func(*args, **kwargs)
+        except BaseException:
+            self.abort_execute(token, func, *args, **kwargs)
+            raise
+        token = self.post_execute(token, func, *args, **kwargs)
+        # print the result of the logger utils (None if the call is not measured)
+        result = self.handle_result(token)
+        if result is not None:
+            function_signature_name = self.get_signature_name(func)
+            print(f"{function_signature_name} - {self.string_result(result)}")
+        return outputs
+
+    async def _async_wrapper(self, func, *args, **kwargs):
+        token = self.pre_execute(func, *args, **kwargs)
+        try:
+            outputs = await func(*args, **kwargs)
+        except BaseException:
+            self.abort_execute(token, func, *args, **kwargs)
+            raise
+        token = self.post_execute(token, func, *args, **kwargs)
+        # print the result of the logger utils (None if the call is not measured)
+        result = self.handle_result(token)
+        if result is not None:
+            function_signature_name = self.get_signature_name(func)
+            print(f"{function_signature_name} - {self.string_result(result)}")
         return outputs
 
     def string_result(self, result) -> str:
@@ -59,28 +197,151 @@ class ProfilerUtils(Decorator):
         """
         return f"{self.data_name} : {self.string_value(result)}"
 
+    def string_results(self, results) -> List[str]:
+        """
+        Converts a column of results in a list of strings in the same format as :meth:`string_result`.
+
+        The :class:`pydecorium.decorators.FunctionProfiler` uses this method to format the records column by column.
+        The subclasses can override it with a faster implementation than calling :meth:`string_result` for each result.
+
+        Parameters
+        ----------
+        results : Iterable[Any]
+            The results to convert in a string format.
+
+        Returns
+        -------
+        List[str]
+            The results in a string format.
+        """
+        return [self.string_result(result) for result in results]
+
+    def string_field_value(self, field_index: int, result) -> str:
+        """
+        Converts the value of a field of a multi-valued result (see ``data_fields``) in a string format.
+
+        By default, the value is converted with :meth:`string_value`. The subclasses can override it if the fields don't have the same unit.
+
+        Parameters
+        ----------
+        field_index : int
+            The index of the field in ``data_fields``.
+        result : Any
+            The value of the field.
+
+        Returns
+        -------
+        str
+            The value in a string format.
+        """
+        return self.string_value(result)
+
+    def string_summary(self, values: Tuple) -> Optional[str]:
+        """
+        Converts the fields of a multi-valued result (see ``data_fields``) in a string reporting a data derived from them.
+
+        The :class:`pydecorium.decorators.FunctionProfiler` reports the summary after the fields, for each record and for the totals of the fields of each function.
+        By default, there is no summary.
+
+        Parameters
+        ----------
+        values : Tuple
+            The values of the fields of a record or the totals of the fields.
+
+        Returns
+        -------
+        Optional[str]
+            The summary in a string format, None if there is no summary.
+        """
+        return None
+
     # To be implemented in subclasses
-    def pre_execute(self, func, *args, **kwargs) -> None:
+    def pre_execute(self, func, *args, **kwargs) -> Any:
         """
         Method to be implemented in subclasses.
+
+        Returns the token of the call before the execution of ``func``.
         """
         raise NotImplementedError("Method pre_execute must be implemented in subclasses.")
 
-    def post_execute(self, func, *args, **kwargs) -> None:
+    def post_execute(self, token, func, *args, **kwargs) -> Any:
         """
         Method to be implemented in subclasses.
+
+        Returns the token of the finished call from the ``token`` returned by :meth:`pre_execute`.
         """
         raise NotImplementedError("Method post_execute must be implemented in subclasses.")
     
-    def handle_result(self):
+    def handle_result(self, token):
         """
         Method to be implemented in subclasses.
+
+        Returns the result of the call from the ``token`` returned by :meth:`post_execute`.
         """
         raise NotImplementedError("Method handle_result must be implemented in subclasses.")
 
+    def abort_execute(self, token, func, *args, **kwargs) -> None:
+        """
+        Releases the state of a call which raised an exception, from the ``token`` returned by :meth:`pre_execute`.
+
+        The call is not measured. By default, nothing is done.
+        """
+        pass
+
     def string_value(self, result) -> str:
         """
         Method to be implemented in subclasses.
         """
         raise NotImplementedError("Method string_result must be implemented in subclasses.")
-    
\ No newline at end of file
+    
+
+
+
+_unsampled = object() # Token of the calls which are not measured
+
+
+
+class _SampledCall(object):
+    """
+    Token of a call measured by a profiler utils whose sampling policy uses the runtime and the overhead of the calls.
+    """
+    __slots__ = ("token", "overhead", "end")
+
+    def __init__(self, token: Any, overhead: int, end: int) -> None:
+        self.token = token
+        self.overhead = overhead
+        self.end = end
+
+
+
+class DataField(object):
+    """
+    ``DataField`` formats a field of the multi-valued results of a profiler utils (see ``data_fields`` in :class:`ProfilerUtils`) with the same methods as a profiler utils.
+
+    The :class:`pydecorium.decorators.FunctionProfiler` uses it to report each field as a data named after the field.
+
+    Parameters
+    ----------
+    utils : ProfilerUtils
+        The profiler utils with multi-valued results.
+    field_index : int
+        The index of the field in ``utils.data_fields``.
+    """
+    def __init__(self, utils: ProfilerUtils, field_index: int) -> None:
+        self.utils = utils
+        self.field_index = field_index
+        self.data_name = utils.data_fields[field_index]
+        self.data_typecode = utils.data_typecode
+
+    @property
+    def is_last_field(self) -> bool:
+        return self.field_index == len(self.utils.data_fields) - 1
+
+    def string_value(self, result) -> str:
+        return self.utils.string_field_value(self.field_index, result)
+
+    def string_result(self, result) -> str:
+        return f"{self.data_name} : {self.string_value(result)}"
+
+    def string_results(self, results) -> List[str]:
+        return [self.string_result(result) for result in results]
@@ -0,0 +1,263 @@
+from typing import Dict, List, Optional, Tuple, Union
+import math
+
+class QuantileSketch(object):
+    r"""
+    ``QuantileSketch`` is a mergeable streaming quantile sketch with a bounded memory, used by the :class:`pydecorium.decorators.FunctionProfiler` to report the percentiles of the profiled data.
+
+    The sketch is a logarithmically bucketed histogram (DDSketch): a positive value :math:`x` is counted in the bucket :math:`\lceil \log_\gamma(x) \rceil` with :math:`\gamma = (1 + \alpha) / (1 - \alpha)`.
+    Any quantile is then estimated with a relative error lower than :math:`\alpha` (``relative_accuracy``).
+    The negative values are counted in a second histogram of their absolute values and the zeros are counted apart.
+
+    The number of buckets is bounded by ``max_buckets``: when a histogram exceeds it, its buckets of lowest magnitude are collapsed together, so only the quantiles of the smallest magnitudes lose their accuracy.
+
+    Two sketches with the same ``relative_accuracy`` can be merged, and a sketch can be converted to and from a dictionary of builtin types (see :meth:`to_dict`) to be merged across processes.
+
+    .. code-block:: python
+
+        sketch = QuantileSketch()
+        for value in range(1, 1001):
+            sketch.add(value)
+        sketch.quantile(0.99) # 990 +/- 1%
+
+    Parameters
+    ----------
+    relative_accuracy : float
+        The relative accuracy of the estimated quantiles. It must be in ]0, 1[.
+        Default is 0.01.
+    max_buckets : int
+        The maximum number of buckets of each histogram (positive and negative values).
+        Default is 2048.
+
+    Raises
+    ------
+    ValueError
+        If ``relative_accuracy`` is not in ]0, 1[ or ``max_buckets`` is not strictly positive.
+    """
+    __slots__ = ("relative_accuracy", "max_buckets", "count", "zero_count", "minimum", "maximum", "_gamma", "_log_gamma", "_positive", "_negative")
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("The relative_accuracy must be in ]0, 1[.")
+        if max_buckets <= 0:
+            raise ValueError("The max_buckets must be strictly positive.")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.count = 0
+        self.zero_count = 0
+        self.minimum = None
+        self.maximum = None
+        self._positive = {}
+        self._negative = {}
+
+    def add(self, value: Union[int, float]) -> None:
+        r"""
+        Adds a value to the sketch.
+
+        Parameters
+        ----------
+        value : Union[int, float]
+            The value to add.
+        """
+        if self.count == 0:
+            self.minimum = self.maximum = value
+        elif value < self.minimum:
+            self.minimum = value
+        elif value > self.maximum:
+            self.maximum = value
+        self.count += 1
+        if value > 0:
+            buckets = self._positive
+        elif value < 0:
+            buckets = self._negative
+            value = -value
+        else:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        buckets[index] = buckets.get(index, 0) + 1
+        if len(buckets) > self.max_buckets:
+            self._collapse(buckets)
+
+    def _collapse(self, buckets: Dict[int, int]) -> None:
+        r"""
+        Collapses the buckets of lowest magnitude of a histogram to respect ``max_buckets``.
+        """
+        indices = sorted(buckets)
+        excess = len(indices) - self.max_buckets
+        target = indices[excess]
+        for index in indices[:excess]:
+            buckets[target] += buckets.pop(index)
+
+    def _bucket_value(self, index: int) -> float:
+        r"""
+        Returns the representative value of a bucket (relative error lower than ``relative_accuracy`` for the values of the bucket).
+        """
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        r"""
+        Estimates the quantile ``q`` of the values added to the sketch.
+
+        Parameters
+        ----------
+        q : float
+            The quantile to estimate, in [0, 1] (0.99 for the 99th percentile).
+
+        Returns
+        -------
+        Optional[float]
+            The estimated quantile (None if the sketch is empty).
+
+        Raises
+        ------
+        ValueError
+            If ``q`` is not in [0, 1].
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("The quantile must be in [0, 1].")
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        cumulative = 0
+        # Negative values: from the largest magnitude to the smallest
+        for index in sorted(self._negative, reverse=True):
+            cumulative += self._negative[index]
+            if cumulative > rank:
+                return self._clamp(-self._bucket_value(index))
+        cumulative += self.zero_count
+        if cumulative > rank:
+            return 0.0
+        for index in sorted(self._positive):
+            cumulative += self._positive[index]
+            if cumulative > rank:
+                return self._clamp(self._bucket_value(index))
+        return self.maximum
+
+    def _clamp(self, value: float) -> float:
+        r"""
+        Clamps an estimated value between the exact minimum and maximum of the sketch.
+        """
+        return min(max(value, self.minimum), self.maximum)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        r"""
+        Merges another sketch into this one.
+
+        Parameters
+        ----------
+        other : QuantileSketch
+            The sketch to merge. It must have the same ``relative_accuracy``.
+
+        Raises
+        ------
+        ValueError
+            If the sketches don't have the same ``relative_accuracy``.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only the sketches with the same relative_accuracy can be merged.")
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.minimum, self.maximum = other.minimum, other.maximum
+        else:
+            self.minimum = min(self.minimum, other.minimum)
+            self.maximum = max(self.maximum, other.maximum)
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for buckets, other_buckets in ((self._positive, other._positive), (self._negative, other._negative)):
+            for index, count in other_buckets.items():
+                buckets[index] = buckets.get(index, 0) + count
+            if len(buckets) > self.max_buckets:
+                self._collapse(buckets)
+
+    def copy(self) -> "QuantileSketch":
+        r"""
+        Returns a copy of the sketch.
+        """
+        sketch = QuantileSketch(self.relative_accuracy, self.max_buckets)
+        sketch.merge(self)
+        return sketch
+
+    def cumulative_counts(self, bounds: List[float]) -> Tuple[List[int], int]:
+        r"""
+        Estimates the number of values lower than or equal to each bound, as the cumulative buckets of a Prometheus histogram.
+
+        A bucket of the sketch is counted under a bound if its representative value is lower than or equal to the bound, so a value is misplaced only if it is within ``relative_accuracy`` of a bound.
+        The buckets are read from copies of the histograms, so the counts stay consistent if values are added by another thread meanwhile.
+
+        Parameters
+        ----------
+        bounds : List[float]
+            The upper bounds of the buckets, in increasing order.
+
+        Returns
+        -------
+        Tuple[List[int], int]
+            The cumulative count of each bound and the total count of the buckets read.
+        """
+        minimum, maximum = self.minimum, self.maximum
+        values = [(-self._bucket_value(index), count) for index, count in list(self._negative.items())]
+        values.append((0.0, self.zero_count))
+        values.extend((self._bucket_value(index), count) for index, count in list(self._positive.items()))
+        if minimum is not None and maximum is not None:
+            values = [(min(max(value, minimum), maximum), count) for value, count in values]
+        values.sort()
+        counts = []
+        cumulative = 0
+        position = 0
+        for bound in bounds:
+            while position < len(values) and values[position][0] <= bound:
+                cumulative += values[position][1]
+                position += 1
+            counts.append(cumulative)
+        return counts, sum(count for _, count in values)
+
+    def to_dict(self) -> dict:
+        r"""
+        Converts the sketch into a dictionary of builtin types, which can be serialized (JSON, pickle) to merge sketches across processes.
+
+        Returns
+        -------
+        dict
+            The dictionary describing the sketch.
+        """
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "count": self.count,
+            "zero_count": self.zero_count,
+            "minimum": self.minimum,
+            "maximum": self.maximum,
+            "positive": {str(index): count for index, count in self._positive.items()},
+            "negative": {str(index): count for index, count in self._negative.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        r"""
+        Creates a sketch from a dictionary returned by :meth:`to_dict`.
+
+        Parameters
+        ----------
+        data : dict
+            The dictionary describing the sketch.
+
+        Returns
+        -------
+        QuantileSketch
+            The sketch.
+        """
+        sketch = cls(data["relative_accuracy"], data["max_buckets"])
+        sketch.count = data["count"]
+        sketch.zero_count = data["zero_count"]
+        sketch.minimum = data["minimum"]
+        sketch.maximum = data["maximum"]
+        sketch._positive = {int(index): count for index, count in data["positive"].items()}
+        sketch._negative = {int(index): count for index, count in data["negative"].items()}
+        return sketch
+
+    def __repr__(self) -> str:
+        return f"QuantileSketch(count={self.count}, relative_accuracy={self.relative_accuracy})"
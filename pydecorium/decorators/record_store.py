@@ -0,0 +1,559 @@
+from typing import List, Optional, Tuple, Iterator, Any
+from collections.abc import Sequence
+import array
+import bisect
+import datetime
+import heapq
+import math
+import time
+
+class RecordStore(object):
+    r"""
+    ``RecordStore`` is a compact columnar storage for the records of the :class:`pydecorium.decorators.FunctionProfiler`.
+
+    A record is composed of the timestamp of the call, the index of the profiled function and one value for each connected :class:`pydecorium.decorators.ProfilerUtils`.
+    Instead of storing one list, one ``datetime`` and one dictionary per record, the records are stored in typed columns:
+
+    - the timestamps are stored as int64 nanoseconds since the epoch (typecode ``"q"``).
+    - the function indices are stored as int32 (typecode ``"i"``).
+    - each profiler utils value is stored in its own column. The typecode of the column is the ``data_typecode`` attribute of the profiler utils. If the typecode is None, the values are stored in a Python list.
+
+    A value can be missing (for example for a column added after the first records), it is stored with a sentinel: NaN for the float columns, the minimum value for the integer columns and None for the list columns.
+
+    The store can have a retention policy:
+
+    - ``capacity``: the store is a ring buffer keeping only the ``capacity`` most recent records. The columns are allocated once and the oldest record is overwritten by the new one.
+    - ``max_age``: the records older than ``max_age`` seconds are evicted when a new record is appended or when the records are read.
+
+    Parameters
+    ----------
+    typecodes : List[Optional[str]]
+        The typecodes of the value columns (see the ``array`` module). None for a column of Python objects.
+        Default is None (no value column).
+    capacity : int
+        The maximum number of records kept by the store.
+        Default is None (no limit).
+    max_age : float
+        The maximum age of the records kept by the store in seconds.
+        Default is None (no limit).
+
+    Raises
+    ------
+    TypeError
+        If ``capacity`` is not an integer or ``max_age`` is not a numeric.
+    ValueError
+        If ``capacity`` or ``max_age`` is not strictly positive.
+    """
+    def __init__(self, typecodes: Optional[List[Optional[str]]] = None, capacity: Optional[int] = None, max_age: Optional[float] = None) -> None:
+        if capacity is not None:
+            if not isinstance(capacity, int):
+                raise TypeError("The capacity must be an integer.")
+            if capacity <= 0:
+                raise ValueError("The capacity must be strictly positive.")
+        if max_age is not None:
+            if not isinstance(max_age, (int, float)):
+                raise TypeError("The max_age must be a numeric.")
+            if max_age <= 0:
+                raise ValueError("The max_age must be strictly positive.")
+        self._capacity = capacity
+        self._max_age_ns = None if max_age is None else int(max_age * 1e9)
+        self._timestamps = array.array("q")
+        self._function_indices = array.array("i")
+        self._columns = []
+        self._missing_values = []
+        self._start = 0 # Physical index of the oldest record
+        self._size = 0 # Number of records
+        self._evicted = 0 # Number of evicted records
+        for typecode in typecodes or []:
+            self.add_column(typecode)
+
+    @staticmethod
+    def missing_value(typecode: Optional[str]) -> Any:
+        r"""
+        Returns the sentinel used to store a missing value in a column with the given typecode.
+
+        Parameters
+        ----------
+        typecode : Optional[str]
+            The typecode of the column.
+
+        Returns
+        -------
+        Any
+            The sentinel of the missing values.
+        """
+        if typecode is None:
+            return None
+        if typecode in "fd":
+            return math.nan
+        itemsize = array.array(typecode).itemsize
+        if typecode.isupper():
+            return (1 << (8 * itemsize)) - 1
+        return -(1 << (8 * itemsize - 1))
+
+    def add_column(self, typecode: Optional[str] = None) -> None:
+        r"""
+        Adds a value column to the store.
+        The value of the existing records in this column is missing.
+
+        Parameters
+        ----------
+        typecode : Optional[str]
+            The typecode of the column. None for a column of Python objects.
+            Default is None.
+        """
+        missing_value = self.missing_value(typecode)
+        allocated = len(self._timestamps)
+        if typecode is None:
+            column = [None] * allocated
+        else:
+            column = array.array(typecode, [missing_value]) * allocated
+        self._columns.append(column)
+        self._missing_values.append(missing_value)
+
+    def append(self, timestamp: int, function_index: int, values: List[Any]) -> None:
+        r"""
+        Appends a record to the store.
+        If the store is full, the oldest record is evicted.
+
+        Parameters
+        ----------
+        timestamp : int
+            The timestamp of the call in nanoseconds since the epoch.
+        function_index : int
+            The index of the profiled function.
+        values : List[Any]
+            The values of the record, one per column. A None value is stored as a missing value.
+        """
+        if self._max_age_ns is not None:
+            self.expire(timestamp)
+        if None in values:
+            values = [missing_value if value is None else value for value, missing_value in zip(values, self._missing_values)]
+        allocated = len(self._timestamps)
+        if self._start == 0 and self._size == allocated and (self._capacity is None or allocated < self._capacity):
+            # Growing columns
+            self._timestamps.append(timestamp)
+            self._function_indices.append(function_index)
+            for column, value in zip(self._columns, values):
+                column.append(value)
+            self._size += 1
+            return
+        if self._size == allocated:
+            if self._capacity is None or allocated < self._capacity:
+                # The columns are full but not at the capacity: the records are put back in order to grow
+                self._linearize()
+                self.append(timestamp, function_index, values)
+                return
+            # Ring buffer full: the oldest record is overwritten
+            index = self._start
+            self._start = (self._start + 1) % allocated
+            self._evicted += 1
+        else:
+            index = (self._start + self._size) % allocated
+            self._size += 1
+        self._timestamps[index] = timestamp
+        self._function_indices[index] = function_index
+        for column, value in zip(self._columns, values):
+            column[index] = value
+
+    def expire(self, now: Optional[int] = None) -> None:
+        r"""
+        Evicts the records older than the ``max_age`` of the store.
+
+        Parameters
+        ----------
+        now : int
+            The current timestamp in nanoseconds since the epoch.
+            Default is None (``time.time_ns()``).
+        """
+        if self._max_age_ns is None or self._size == 0:
+            return
+        if now is None:
+            now = time.time_ns()
+        limit = now - self._max_age_ns
+        allocated = len(self._timestamps)
+        while self._size > 0 and self._timestamps[self._start] < limit:
+            self._start = (self._start + 1) % allocated
+            self._size -= 1
+            self._evicted += 1
+        if self._size == 0:
+            self._start = 0
+
+    def clear(self) -> None:
+        r"""
+        Removes all the records of the store. The columns and the number of evicted records are kept.
+        """
+        self._timestamps = array.array("q")
+        self._function_indices = array.array("i")
+        self._columns = [[] if isinstance(column, list) else array.array(column.typecode) for column in self._columns]
+        self._start = 0
+        self._size = 0
+
+    def _linearize(self) -> None:
+        r"""
+        Puts the records back in order at the beginning of the columns.
+        """
+        self._timestamps = self._ordered(self._timestamps)
+        self._function_indices = self._ordered(self._function_indices)
+        self._columns = [self._ordered(column) for column in self._columns]
+        self._start = 0
+
+    def _ordered(self, column):
+        r"""
+        Returns the present records of a column in the order of insertion.
+        The column itself is returned if the records are already in order.
+        """
+        allocated = len(column)
+        if self._start == 0 and self._size == allocated:
+            return column
+        end = self._start + self._size
+        if end <= allocated:
+            return column[self._start:end]
+        return column[self._start:] + column[:end - allocated]
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> Optional[int]:
+        r"""
+        The maximum number of records kept by the store (None if no limit).
+        """
+        return self._capacity
+
+    @property
+    def evicted(self) -> int:
+        r"""
+        The number of records evicted by the retention policy of the store.
+        """
+        return self._evicted
+
+    @property
+    def timestamps(self) -> array.array:
+        r"""
+        The column of the timestamps in nanoseconds since the epoch, in the order of insertion.
+        """
+        return self._ordered(self._timestamps)
+
+    @property
+    def function_indices(self) -> array.array:
+        r"""
+        The column of the indices of the profiled functions, in the order of insertion.
+        """
+        return self._ordered(self._function_indices)
+
+    @property
+    def columns(self) -> List:
+        r"""
+        The list of the value columns, in the order of insertion.
+        """
+        return [self._ordered(column) for column in self._columns]
+
+    @property
+    def missing_values(self) -> List[Any]:
+        r"""
+        The list of the sentinels of the missing values of each value column.
+        """
+        return self._missing_values
+
+    def is_missing(self, column_index: int, value: Any) -> bool:
+        r"""
+        Checks if a value of the given column is the missing value sentinel.
+
+        Parameters
+        ----------
+        column_index : int
+            The index of the column.
+        value : Any
+            The value to check.
+
+        Returns
+        -------
+        bool
+            If the value is missing.
+        """
+        missing_value = self._missing_values[column_index]
+        if missing_value is None:
+            return value is None
+        if isinstance(missing_value, float):
+            return value != value
+        return value == missing_value
+
+    def get_record(self, index: int) -> Tuple[int, int, dict]:
+        r"""
+        Returns the record at the given index.
+        The index 0 is the oldest record of the store.
+
+        Parameters
+        ----------
+        index : int
+            The index of the record.
+
+        Returns
+        -------
+        Tuple[int, int, dict]
+            The timestamp in nanoseconds, the function index and the dictionary of the present values with the column index as key.
+        """
+        index = (self._start + index) % len(self._timestamps)
+        values = {}
+        for column_index, column in enumerate(self._columns):
+            value = column[index]
+            if not self.is_missing(column_index, value):
+                values[column_index] = value
+        return self._timestamps[index], self._function_indices[index], values
+
+    def tail(self, count: int) -> "RecordStore":
+        r"""
+        Returns a new store with the ``count`` most recent records of the store.
+        The columns are copied by slices, without creating a Python object per record.
+
+        Parameters
+        ----------
+        count : int
+            The number of records to keep.
+
+        Returns
+        -------
+        RecordStore
+            The store of the most recent records, without retention policy.
+        """
+        start = max(self._size - count, 0)
+        record_store = RecordStore()
+        record_store._timestamps = self.timestamps[start:]
+        record_store._function_indices = self.function_indices[start:]
+        record_store._columns = [column[start:] for column in self.columns]
+        record_store._missing_values = list(self._missing_values)
+        # The store can be appended by its thread meanwhile: only the rows present in every column are kept
+        record_store._size = min([len(record_store._timestamps), len(record_store._function_indices)] + [len(column) for column in record_store._columns])
+        return record_store
+
+    def iter_records(self) -> Iterator[Tuple[int, int, dict]]:
+        r"""
+        Iterates over the records in the order of insertion.
+
+        Yields
+        ------
+        Tuple[int, int, dict]
+            The timestamp in nanoseconds, the function index and the dictionary of the present values with the column index as key.
+        """
+        for index in range(len(self)):
+            yield self.get_record(index)
+
+    def iter_rows(self) -> Iterator[tuple]:
+        r"""
+        Iterates over the raw rows of the store in the order of insertion.
+        The missing values are given as their sentinel.
+
+        Yields
+        ------
+        tuple
+            The timestamp in nanoseconds, the function index and the values of each column.
+        """
+        return zip(self.timestamps, self.function_indices, *self.columns)
+
+
+def merge_columns(record_stores: List[RecordStore]) -> Tuple[array.array, array.array, List]:
+    r"""
+    Returns the columns of the records of several stores merged by timestamp.
+
+    If there is only one store, its columns are returned without copy when possible.
+    Otherwise, the rows are merged and copied into new columns with the same typecodes.
+
+    Parameters
+    ----------
+    record_stores : List[RecordStore]
+        The stores to merge. The stores must have the same columns and their records must be sorted by timestamp.
+
+    Returns
+    -------
+    Tuple[array.array, array.array, List]
+        The timestamps, the function indices and the value columns of the merged records.
+    """
+    if len(record_stores) == 1:
+        record_store = record_stores[0]
+        return record_store.timestamps, record_store.function_indices, record_store.columns
+    if len(record_stores) == 0:
+        return array.array("q"), array.array("i"), []
+    timestamps = array.array("q")
+    function_indices = array.array("i")
+    columns = [[] if isinstance(column, list) else array.array(column.typecode) for column in record_stores[0]._columns]
+    for row in heapq.merge(*(record_store.iter_rows() for record_store in record_stores), key=lambda row: row[0]):
+        timestamps.append(row[0])
+        function_indices.append(row[1])
+        for column, value in zip(columns, row[2:]):
+            column.append(value)
+    return timestamps, function_indices, columns
+
+
+def missing_mask(column, missing_value: Any) -> Optional[List[bool]]:
+    r"""
+    Returns the mask of the missing values of a column.
+
+    Parameters
+    ----------
+    column : Union[array.array, list]
+        The column to check.
+    missing_value : Any
+        The sentinel of the missing values of the column.
+
+    Returns
+    -------
+    Optional[List[bool]]
+        The list of booleans, True for a missing value. None if no value is missing.
+    """
+    if isinstance(missing_value, float):
+        if not any(map(math.isnan, column)):
+            return None
+        return [value != value for value in column]
+    if missing_value not in column:
+        return None
+    if missing_value is None:
+        return [value is None for value in column]
+    return [value == missing_value for value in column]
+
+
+def format_timestamps(timestamps) -> List[str]:
+    r"""
+    Formats timestamps in nanoseconds since the epoch as ``str(datetime)`` of their local naive ``datetime`` (see :func:`timestamp_to_datetime`).
+
+    The date and time part is computed once per second, so formatting a column of timestamps costs little more than formatting the microseconds.
+
+    Parameters
+    ----------
+    timestamps : Iterable[int]
+        The timestamps in nanoseconds since the epoch.
+
+    Returns
+    -------
+    List[str]
+        The formatted timestamps.
+    """
+    formatted_timestamps = []
+    last_seconds = None
+    prefix = None
+    for timestamp in timestamps:
+        seconds, nanoseconds = divmod(timestamp, 1_000_000_000)
+        if seconds != last_seconds:
+            last_seconds = seconds
+            prefix = str(datetime.datetime.fromtimestamp(seconds))
+        microseconds = nanoseconds // 1000
+        formatted_timestamps.append(f"{prefix}.{microseconds:06d}" if microseconds else prefix)
+    return formatted_timestamps
+
+
+def merge_records(record_stores: List[RecordStore]) -> Iterator[Tuple[int, int, dict]]:
+    r"""
+    Iterates over the records of several stores sorted by timestamp.
+
+    Parameters
+    ----------
+    record_stores : List[RecordStore]
+        The stores to merge. The records of each store must be sorted by timestamp.
+
+    Yields
+    ------
+    Tuple[int, int, dict]
+        The timestamp in nanoseconds, the function index and the dictionary of the present values with the column index as key.
+    """
+    if len(record_stores) == 1:
+        return record_stores[0].iter_records()
+    return heapq.merge(*(record_store.iter_records() for record_store in record_stores), key=lambda record: record[0])
+
+
+def count_recent_records(record_stores: List[RecordStore], count: int) -> List[int]:
+    r"""
+    Returns the number of records to keep in each store to keep the ``count`` most recent records of several stores.
+
+    The timestamp separating the most recent records is found by a binary search, counting the records of each store with a bisection of its timestamps, so the records are never merged.
+
+    Parameters
+    ----------
+    record_stores : List[RecordStore]
+        The stores of the records. The records of each store must be sorted by timestamp.
+    count : int
+        The maximum number of records to keep.
+
+    Returns
+    -------
+    List[int]
+        The number of most recent records to keep in each store, at most ``count`` together.
+    """
+    columns = [record_store.timestamps for record_store in record_stores]
+    lower = min((min(column) for column in columns if len(column)), default=0)
+    upper = max((max(column) for column in columns if len(column)), default=0) + 1
+    # Smallest timestamp with at most count records from this timestamp
+    while lower < upper:
+        middle = (lower + upper) // 2
+        if sum(len(column) - bisect.bisect_left(column, middle) for column in columns) > count:
+            lower = middle + 1
+        else:
+            upper = middle
+    return [len(column) - bisect.bisect_left(column, lower) for column in columns]
+
+
+def timestamp_to_datetime(timestamp: int) -> datetime.datetime:
+    r"""
+    Converts a timestamp in nanoseconds since the epoch into a local naive ``datetime``, as returned by ``datetime.datetime.now()``.
+
+    Parameters
+    ----------
+    timestamp : int
+        The timestamp in nanoseconds since the epoch.
+
+    Returns
+    -------
+    datetime.datetime
+        The corresponding datetime with a microsecond resolution.
+    """
+    seconds, nanoseconds = divmod(timestamp, 1_000_000_000)
+    return datetime.datetime.fromtimestamp(seconds).replace(microsecond=nanoseconds // 1000)
+
+
+class ProfiledDataView(Sequence):
+    r"""
+    ``ProfiledDataView`` is a read-only view of one or several :class:`pydecorium.decorators.RecordStore` with the historical structure of the profiled data:
+
+    .. code-block:: python
+
+        profiled_data = [[datetime, function_index, {utils_index: data, utils_index: data, ...}], ...]
+
+    The records are materialized lazily, when they are accessed.
+    The records of several stores are merged by timestamp.
+
+    Parameters
+    ----------
+    record_stores : List[RecordStore]
+        The stores to view.
+    """
+    def __init__(self, record_stores: List[RecordStore]) -> None:
+        self._record_stores = record_stores
+        self._merged_records = None
+
+    def __len__(self) -> int:
+        return sum(len(record_store) for record_store in self._record_stores)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("The profiled data index is out of range.")
+        if len(self._record_stores) == 1:
+            timestamp, function_index, values = self._record_stores[0].get_record(index)
+        else:
+            # Random access in several stores requires the merged order
+            if self._merged_records is None:
+                self._merged_records = list(merge_records(self._record_stores))
+            timestamp, function_index, values = self._merged_records[index]
+        return [timestamp_to_datetime(timestamp), function_index, values]
+
+    def __iter__(self):
+        for timestamp, function_index, values in merge_records(self._record_stores):
+            yield [timestamp_to_datetime(timestamp), function_index, values]
+
+    def __eq__(self, other) -> bool:
+        return list(self) == other
+
+    def __repr__(self) -> str:
+        return repr(list(self))
@@ -0,0 +1,272 @@
+import itertools
+import random
+import threading
+import weakref
+from typing import Any, Hashable, Optional
+
+class Sampling(object):
+    """
+    ``Sampling`` is the base class of the sampling policies selecting the calls measured by a :class:`pydecorium.decorators.FunctionProfiler` or by a :class:`pydecorium.decorators.ProfilerUtils`.
+
+    The subclasses must implement the following method:
+
+    .. code-block:: python
+
+        def sample(self, key) -> bool:
+            pass
+
+    ``sample`` is called before each call with a key identifying the profiled function and returns True if the call is measured.
+    The ``FunctionProfiler`` uses the index of the function as key, the ``ProfilerUtils`` uses the function itself.
+    The policies keeping a state per function don't keep the functions alive: the state of a function is removed when it is garbage collected.
+
+    If the ``uses_feedback`` attribute is True, :meth:`update` is called after each measured call with the runtime of the function and the overhead of its measure, so the policy can adapt its rate.
+
+    .. note::
+
+        The reports of the ``FunctionProfiler`` don't depend on the policy: the sampling rate is computed from the numbers of measured and unmeasured calls, and the cumulative data are estimated by scaling the totals of the measured calls.
+    """
+    uses_feedback: bool = False
+
+    def sample(self, key: Hashable) -> bool:
+        """
+        Returns True if the next call of the function identified by ``key`` is measured.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key identifying the profiled function.
+
+        Returns
+        -------
+        bool
+            If the call is measured.
+        """
+        raise NotImplementedError("The sample method must be implemented.")
+
+    def update(self, key: Hashable, runtime: int, overhead: int) -> None:
+        """
+        Updates the policy after a measured call (only if ``uses_feedback`` is True).
+
+        Parameters
+        ----------
+        key : Hashable
+            The key identifying the profiled function.
+        runtime : int
+            The runtime of the function in nanoseconds.
+        overhead : int
+            The runtime of the measure of the call in nanoseconds.
+        """
+        pass
+
+    def rate(self, key: Optional[Hashable] = None) -> float:
+        """
+        Returns the expected fraction of the calls measured for the function identified by ``key``.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key identifying the profiled function.
+            Default is None.
+
+        Returns
+        -------
+        float
+            The expected sampling rate between 0 and 1.
+        """
+        raise NotImplementedError("The rate method must be implemented.")
+
+
+
+class EveryNSampling(Sampling):
+    """
+    ``EveryNSampling`` measures one call out of ``n`` of each function, starting with the first call.
+
+    Parameters
+    ----------
+    n : int
+        The sampling period.
+    """
+    def __init__(self, n: int) -> None:
+        if not isinstance(n, int):
+            raise TypeError("The n must be an integer.")
+        if n <= 0:
+            raise ValueError("The n must be strictly positive.")
+        self._n = n
+        self._counters = _KeyStates()
+
+    @property
+    def n(self) -> int:
+        return self._n
+
+    def sample(self, key: Hashable) -> bool:
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters.setdefault(key, itertools.count())
+        # next() on itertools.count is atomic, the threads don't lose calls
+        return next(counter) % self._n == 0
+
+    def rate(self, key: Optional[Hashable] = None) -> float:
+        return 1 / self._n
+
+
+
+class ProbabilisticSampling(Sampling):
+    """
+    ``ProbabilisticSampling`` measures each call with the probability ``rate``.
+
+    Unlike :class:`EveryNSampling`, the measured calls are not synchronized with a periodic pattern of the calls.
+
+    Parameters
+    ----------
+    rate : float
+        The probability to measure a call, between 0 (excluded) and 1.
+    seed : Any
+        The seed of the random generator.
+        Default is None.
+    """
+    def __init__(self, rate: float, seed: Any = None) -> None:
+        if not isinstance(rate, (int, float)):
+            raise TypeError("The rate must be a numeric.")
+        if not 0 < rate <= 1:
+            raise ValueError("The rate must be in ]0, 1].")
+        self._rate = rate
+        self._random = random.Random(seed).random
+
+    def sample(self, key: Hashable) -> bool:
+        return self._random() < self._rate
+
+    def rate(self, key: Optional[Hashable] = None) -> float:
+        return self._rate
+
+
+
+class AdaptiveSampling(Sampling):
+    """
+    ``AdaptiveSampling`` adapts the sampling rate of each function to keep the overhead of the measures under a budget.
+
+    After each measured call, the runtime of the function and the overhead of its measure are averaged (exponential moving averages).
+    The rate of the function is set so that the overhead spread over all the calls is ``max_overhead`` times the runtime of the function:
+
+    .. code-block:: python
+
+        rate = max_overhead * mean_runtime / mean_overhead
+
+    The rate is clamped between ``min_rate`` and 1, so the short functions called very often are sampled and the long functions are measured at each call.
+    The calls are measured deterministically: each call adds the rate to a credit and the call is measured when the credit reaches 1. The first call is always measured.
+
+    Parameters
+    ----------
+    max_overhead : float
+        The overhead budget, as a fraction of the runtime of the functions.
+        Default is 0.01.
+    min_rate : float
+        The minimum sampling rate.
+        Default is 0.001.
+    smoothing : float
+        The weight of the last measure in the moving averages, between 0 (excluded) and 1.
+        Default is 0.1.
+    """
+    uses_feedback: bool = True
+
+    def __init__(self, max_overhead: float = 0.01, min_rate: float = 0.001, smoothing: float = 0.1) -> None:
+        if not isinstance(max_overhead, (int, float)):
+            raise TypeError("The max_overhead must be a numeric.")
+        if max_overhead <= 0:
+            raise ValueError("The max_overhead must be strictly positive.")
+        if not isinstance(min_rate, (int, float)):
+            raise TypeError("The min_rate must be a numeric.")
+        if not 0 < min_rate <= 1:
+            raise ValueError("The min_rate must be in ]0, 1].")
+        if not isinstance(smoothing, (int, float)):
+            raise TypeError("The smoothing must be a numeric.")
+        if not 0 < smoothing <= 1:
+            raise ValueError("The smoothing must be in ]0, 1].")
+        self._max_overhead = max_overhead
+        self._min_rate = min_rate
+        self._smoothing = smoothing
+        # {key: [credit, rate, mean_runtime, mean_overhead]}
+        self._states = _KeyStates()
+        # The state of a function is shared by the threads calling it
+        self._lock = threading.Lock()
+
+    @property
+    def max_overhead(self) -> float:
+        return self._max_overhead
+
+    @property
+    def min_rate(self) -> float:
+        return self._min_rate
+
+    @property
+    def smoothing(self) -> float:
+        return self._smoothing
+
+    def _get_state(self, key: Hashable) -> list:
+        state = self._states.get(key)
+        if state is None:
+            state = self._states.setdefault(key, [1.0, 1.0, None, None])
+        return state
+
+    def sample(self, key: Hashable) -> bool:
+        state = self._get_state(key)
+        with self._lock:
+            credit = state[0] + state[1]
+            if credit >= 1.0:
+                state[0] = credit - 1.0
+                return True
+            state[0] = credit
+            return False
+
+    def update(self, key: Hashable, runtime: int, overhead: int) -> None:
+        state = self._get_state(key)
+        with self._lock:
+            if state[2] is None:
+                state[2], state[3] = runtime, overhead
+            else:
+                state[2] += self._smoothing * (runtime - state[2])
+                state[3] += self._smoothing * (overhead - state[3])
+            if state[3] <= 0:
+                state[1] = 1.0
+            else:
+                state[1] = min(1.0, max(self._min_rate, self._max_overhead * state[2] / state[3]))
+
+    def rate(self, key: Optional[Hashable] = None) -> float:
+        """
+        Returns the current sampling rate of the function identified by ``key`` (1 if it was never measured).
+        """
+        state = self._states.get(key)
+        return 1.0 if state is None else state[1]
+
+
+
+class _KeyStates(object):
+    """
+    Mapping of the states of a sampling policy per key.
+
+    The functions (keys of the ``ProfilerUtils``) are weak keys: the state of a function is removed when the function is garbage collected.
+    The other keys (indices of the functions of the ``FunctionProfiler``) can't be weakly referenced and are kept in a plain dictionary.
+    """
+    __slots__ = ("_states", "_weak_states")
+
+    def __init__(self) -> None:
+        self._states = {}
+        self._weak_states = weakref.WeakKeyDictionary()
+
+    def get(self, key: Hashable) -> Any:
+        if type(key) is int: # Fast path of the FunctionProfiler
+            return self._states.get(key)
+        try:
+            return self._weak_states.get(key)
+        except TypeError: # Not weakly referenceable
+            return self._states.get(key)
+
+    def setdefault(self, key: Hashable, default: Any) -> Any:
+        if type(key) is int:
+            return self._states.setdefault(key, default)
+        try:
+            return self._weak_states.setdefault(key, default)
+        except TypeError:
+            return self._states.setdefault(key, default)
+
+    def __len__(self) -> int:
+        return len(self._states) + len(self._weak_states)
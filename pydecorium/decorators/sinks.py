@@ -0,0 +1,586 @@
+from .record_store import format_timestamps
+
+from typing import Any, Callable, List, Optional, Tuple, Union
+import atexit
+import collections
+import csv
+import json
+import math
+import os
+import re
+import socket
+import sqlite3
+import threading
+
+class Sink(object):
+    r"""
+    ``Sink`` is the base class of the destinations where a :class:`pydecorium.decorators.FunctionProfiler` sends its records while profiling (see :meth:`pydecorium.decorators.FunctionProfiler.connect_sinks`).
+
+    The records are sent by batches from the background thread of a :class:`SinkQueue`, so the methods of a sink are never called by the profiled functions.
+    The subclasses must implement the following method:
+
+    .. code-block:: python
+
+        def write(self, records) -> None:
+            pass
+
+    ``write`` receives a batch of records. Each record is a tuple of the timestamp of the call in nanoseconds since the epoch, the signature name of the function and the list of the values of the data columns (None for a missing value).
+
+    The resources of the sink (files, connections, sockets) are opened by :meth:`open` in the background thread, and released by :meth:`close`.
+    """
+    def open(self, data_columns: List) -> None:
+        r"""
+        Opens the sink before the first batch of records.
+
+        Parameters
+        ----------
+        data_columns : List
+            The data columns of the records (see ``data_columns`` in :class:`pydecorium.decorators.FunctionProfiler`), with their ``data_name`` and their ``string_value`` method.
+        """
+        self.data_columns = data_columns
+        self.data_names = [data_column.data_name for data_column in data_columns]
+
+    def write(self, records: List[Tuple[int, str, List[Any]]]) -> None:
+        r"""
+        Writes a batch of records.
+
+        Parameters
+        ----------
+        records : List[Tuple[int, str, List[Any]]]
+            The timestamp in nanoseconds, the signature name of the function and the values of each record.
+        """
+        raise NotImplementedError("The write method must be implemented.")
+
+    def flush(self) -> None:
+        r"""
+        Flushes the records written by the sink.
+        """
+        pass
+
+    def close(self) -> None:
+        r"""
+        Flushes and releases the resources of the sink.
+        """
+        self.flush()
+
+
+
+class _TextFileSink(Sink):
+    r"""
+    Base class of the sinks writing lines in a text file.
+    """
+    def __init__(self, file_path: Union[str, os.PathLike], append: bool = False) -> None:
+        if not isinstance(append, bool):
+            raise TypeError("The append must be a booleen.")
+        self._file_path = os.fspath(file_path)
+        self._append = append
+        self._file = None
+
+    @property
+    def file_path(self) -> str:
+        return self._file_path
+
+    def open(self, data_columns: List) -> None:
+        super().open(data_columns)
+        self._file = open(self._file_path, "a" if self._append else "w", newline="", encoding="utf-8")
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+
+class FileSink(_TextFileSink):
+    r"""
+    ``FileSink`` writes the records in a text file, in the format of the "datetime" report of the :class:`pydecorium.decorators.FunctionProfiler`:
+
+    .. code-block:: console
+
+        [datetime] - [function_signature_name] - data_name : data - other_data_name : other_data
+
+    Parameters
+    ----------
+    file_path : Union[str, os.PathLike]
+        The path of the file.
+    append : bool
+        If True, the records are appended to an existing file. Otherwise the file is overwritten.
+        Default is False.
+    """
+    def write(self, records: List[Tuple[int, str, List[Any]]]) -> None:
+        timestamps = format_timestamps([record[0] for record in records])
+        lines = []
+        for timestamp, (_, signature_name, values) in zip(timestamps, records):
+            parts = [f"[{timestamp}]", f"[{signature_name}]"]
+            parts.extend(f"{data_column.data_name} : {data_column.string_value(value)}" for data_column, value in zip(self.data_columns, values) if value is not None)
+            lines.append(" - ".join(parts) + "\n")
+        self._file.write("".join(lines))
+
+
+
+class JSONLinesSink(_TextFileSink):
+    r"""
+    ``JSONLinesSink`` writes the records in a JSON-lines file, one JSON object per record:
+
+    .. code-block:: console
+
+        {"timestamp": 1737395000000000000, "function": "function_signature_name", "data_name": data, "other_data_name": other_data}
+
+    The missing values are omitted and the values which are not JSON serializable are converted in strings.
+
+    Parameters
+    ----------
+    file_path : Union[str, os.PathLike]
+        The path of the file.
+    append : bool
+        If True, the records are appended to an existing file. Otherwise the file is overwritten.
+        Default is False.
+    """
+    def write(self, records: List[Tuple[int, str, List[Any]]]) -> None:
+        lines = []
+        for timestamp, signature_name, values in records:
+            record = {"timestamp": timestamp, "function": signature_name}
+            record.update((data_name, value) for data_name, value in zip(self.data_names, values) if value is not None)
+            lines.append(json.dumps(record, default=str) + "\n")
+        self._file.write("".join(lines))
+
+
+
+class CSVSink(_TextFileSink):
+    r"""
+    ``CSVSink`` writes the records in a CSV file with the columns "timestamp", "function" and one column per data. The missing values are empty.
+
+    Parameters
+    ----------
+    file_path : Union[str, os.PathLike]
+        The path of the file.
+    append : bool
+        If True, the records are appended to an existing file and the header is not written again. Otherwise the file is overwritten.
+        Default is False.
+    """
+    def open(self, data_columns: List) -> None:
+        write_header = not (self._append and os.path.exists(self._file_path) and os.path.getsize(self._file_path) > 0)
+        super().open(data_columns)
+        self._writer = csv.writer(self._file)
+        if write_header:
+            self._writer.writerow(["timestamp", "function"] + self.data_names)
+
+    def write(self, records: List[Tuple[int, str, List[Any]]]) -> None:
+        self._writer.writerows([timestamp, signature_name] + ["" if value is None else value for value in values] for timestamp, signature_name, values in records)
+
+
+
+class SQLiteSink(Sink):
+    r"""
+    ``SQLiteSink`` inserts the records in a table of a SQLite database with the columns "timestamp", "function" and one column per data. The missing values are NULL.
+
+    The table is created if it doesn't exist and each batch of records is committed in one transaction.
+
+    Parameters
+    ----------
+    database : Union[str, os.PathLike]
+        The path of the database.
+    table : str
+        The name of the table.
+        Default is "records".
+    """
+    def __init__(self, database: Union[str, os.PathLike], table: str = "records") -> None:
+        if not isinstance(table, str):
+            raise TypeError("The table must be a string.")
+        self._database = os.fspath(database)
+        self._table = table
+        self._connection = None
+
+    @property
+    def database(self) -> str:
+        return self._database
+
+    @property
+    def table(self) -> str:
+        return self._table
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def open(self, data_columns: List) -> None:
+        super().open(data_columns)
+        # The connection is created and used by the background thread only
+        self._connection = sqlite3.connect(self._database)
+        columns = ", ".join(["timestamp INTEGER", "function TEXT"] + [f"{self._quote(data_name)} NUMERIC" for data_name in self.data_names])
+        self._connection.execute(f"CREATE TABLE IF NOT EXISTS {self._quote(self._table)} ({columns})")
+        self._connection.commit()
+        placeholders = ", ".join(["?"] * (len(self.data_names) + 2))
+        self._insert = f"INSERT INTO {self._quote(self._table)} VALUES ({placeholders})"
+
+    def write(self, records: List[Tuple[int, str, List[Any]]]) -> None:
+        with self._connection:
+            self._connection.executemany(self._insert, ([timestamp, signature_name] + [value if value is None or isinstance(value, (int, float)) else str(value) for value in values] for timestamp, signature_name, values in records))
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+
+class StatsDSink(Sink):
+    r"""
+    ``StatsDSink`` sends the records as metrics in the StatsD line protocol over UDP.
+
+    For each record, a counter of the calls and one metric per present numeric value are sent:
+
+    .. code-block:: console
+
+        pydecorium.function_signature_name.calls:1|c
+        pydecorium.function_signature_name.data_name:data|h
+
+    The characters of the names which are not letters, digits, "_", "-" or "." are replaced by "_".
+    The lines are grouped in datagrams of at most ``max_packet_size`` bytes. UDP doesn't guarantee the delivery of the datagrams.
+
+    Parameters
+    ----------
+    host : str
+        The host of the StatsD server.
+        Default is "127.0.0.1".
+    port : int
+        The port of the StatsD server.
+        Default is 8125.
+    prefix : str
+        The prefix of the metric names.
+        Default is "pydecorium".
+    metric_type : str
+        The type of the metrics of the values: "h" (histogram), "ms" (timer), "g" (gauge)...
+        Default is "h".
+    max_packet_size : int
+        The maximum size of a datagram in bytes.
+        Default is 1432.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 8125, prefix: str = "pydecorium", metric_type: str = "h", max_packet_size: int = 1432) -> None:
+        if not isinstance(port, int):
+            raise TypeError("The port must be an integer.")
+        if not isinstance(max_packet_size, int):
+            raise TypeError("The max_packet_size must be an integer.")
+        if max_packet_size <= 0:
+            raise ValueError("The max_packet_size must be strictly positive.")
+        self._address = (host, port)
+        self._prefix = self._metric_name(prefix) + "." if prefix else ""
+        self._metric_type = metric_type
+        self._max_packet_size = max_packet_size
+        self._socket = None
+
+    @staticmethod
+    def _metric_name(name: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.\-]", "_", name)
+
+    def open(self, data_columns: List) -> None:
+        super().open(data_columns)
+        self._socket = socket.socket(socket.AF_INET6 if ":" in self._address[0] else socket.AF_INET, socket.SOCK_DGRAM)
+        self._metric_names = {}
+        self._data_metric_names = [self._metric_name(data_name) for data_name in self.data_names]
+
+    def write(self, records: List[Tuple[int, str, List[Any]]]) -> None:
+        packet = []
+        size = 0
+        for _, signature_name, values in records:
+            metric_name = self._metric_names.get(signature_name)
+            if metric_name is None:
+                metric_name = self._metric_names[signature_name] = self._prefix + self._metric_name(signature_name)
+            lines = [f"{metric_name}.calls:1|c"]
+            lines.extend(f"{metric_name}.{data_metric_name}:{value:g}|{self._metric_type}" for data_metric_name, value in zip(self._data_metric_names, values) if isinstance(value, (int, float)) and math.isfinite(value))
+            for line in lines:
+                line_size = len(line) + 1
+                if packet and size + line_size > self._max_packet_size:
+                    self._send(packet)
+                    packet, size = [], 0
+                packet.append(line)
+                size += line_size
+        if packet:
+            self._send(packet)
+
+    def _send(self, lines: List[str]) -> None:
+        self._socket.sendto("\n".join(lines).encode("utf-8"), self._address)
+
+    def close(self) -> None:
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+
+class SinkQueue(object):
+    r"""
+    ``SinkQueue`` is the queue between a :class:`pydecorium.decorators.FunctionProfiler` and its sinks (see :meth:`pydecorium.decorators.FunctionProfiler.connect_sinks`).
+
+    The profiled calls only append their raw record (timestamp, function index, values) to a ``collections.deque``: the append is atomic, so no lock is taken and no I/O or formatting is done by the profiled functions.
+    A background thread wakes up every ``flush_interval`` seconds, or when ``batch_size`` records are queued, resolves the signature names and writes the records to each sink by batches.
+    The signature names are cached until :meth:`clear_signature_names` is called (the ``FunctionProfiler`` calls it when its signature name format changes).
+
+    The queue is bounded by ``max_size`` records. When it is full:
+
+    - ``overflow="drop"``: the new records are dropped and counted in ``dropped``.
+    - ``overflow="block"``: the profiled call waits until the background thread frees some space (backpressure).
+
+    The errors raised by a sink are counted in ``errors`` (the last one is kept in ``last_error``) and don't stop the other sinks.
+
+    Parameters
+    ----------
+    sinks : List[Sink]
+        The sinks receiving the records.
+    data_columns : List
+        The data columns of the records.
+    get_signature_name : Callable[[int], str]
+        The function returning the signature name of a function index.
+    max_size : int
+        The maximum number of queued records.
+        Default is 100000.
+    overflow : str
+        "drop" or "block".
+        Default is "drop".
+    batch_size : int
+        The number of records written per batch, the background thread is woken up as soon as a batch is queued.
+        Default is 1000.
+    flush_interval : float
+        The maximum time in seconds between two writes of the queued records.
+        Default is 1.0.
+    """
+    def __init__(self, sinks: List[Sink], data_columns: List, get_signature_name: Callable[[int], str], max_size: int = 100000, overflow: str = "drop", batch_size: int = 1000, flush_interval: float = 1.0) -> None:
+        if not isinstance(sinks, list) or not all(isinstance(sink, Sink) for sink in sinks):
+            raise TypeError("The sinks must be a list of Sink instances.")
+        if not isinstance(max_size, int):
+            raise TypeError("The max_size must be an integer.")
+        if max_size <= 0:
+            raise ValueError("The max_size must be strictly positive.")
+        if overflow not in ("drop", "block"):
+            raise ValueError("The overflow must be 'drop' or 'block'.")
+        if not isinstance(batch_size, int):
+            raise TypeError("The batch_size must be an integer.")
+        if batch_size <= 0:
+            raise ValueError("The batch_size must be strictly positive.")
+        if not isinstance(flush_interval, (int, float)):
+            raise TypeError("The flush_interval must be a numeric.")
+        if flush_interval <= 0:
+            raise ValueError("The flush_interval must be strictly positive.")
+        self._sinks = sinks
+        self._data_columns = data_columns
+        self._get_signature_name = get_signature_name
+        self._signature_names = {}
+        self._max_size = max_size
+        self._overflow = overflow
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue = collections.deque()
+        self._wakeup = threading.Event()
+        self._space = threading.Condition()
+        self._counters_lock = threading.Lock()
+        self._dropped = 0
+        self._written = 0
+        self._errors = 0
+        self.last_error = None
+        self._closed = False
+        self._flushed = threading.Condition()
+        self._flush_requests = 0
+        self._flush_done = 0
+        self._thread = threading.Thread(target=self._run, name="pydecorium-sinks", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def sinks(self) -> List[Sink]:
+        return self._sinks
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def overflow(self) -> str:
+        return self._overflow
+
+    @property
+    def pending(self) -> int:
+        r"""
+        The number of records waiting in the queue.
+        """
+        return len(self._queue)
+
+    @property
+    def dropped(self) -> int:
+        r"""
+        The number of records dropped because the queue was full.
+        """
+        return self._dropped
+
+    @property
+    def written(self) -> int:
+        r"""
+        The number of records written to the sinks.
+        """
+        return self._written
+
+    @property
+    def errors(self) -> int:
+        r"""
+        The number of batches which raised an error in a sink.
+        """
+        return self._errors
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, record: Tuple[int, int, List[Any]]) -> None:
+        r"""
+        Queues a record. It is called by the profiled calls, so it does nothing but an append in the nominal case.
+
+        Parameters
+        ----------
+        record : Tuple[int, int, List[Any]]
+            The timestamp in nanoseconds, the function index and the values of the record.
+        """
+        if self._closed: # Nothing writes the records queued after the closing
+            self._drop()
+            return
+        queue = self._queue
+        if len(queue) >= self._max_size:
+            if self._overflow == "drop":
+                self._drop()
+                return
+            self._wait_for_space()
+            if self._closed: # Closed while waiting
+                self._drop()
+                return
+        queue.append(record)
+        if len(queue) >= self._batch_size and not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def _drop(self) -> None:
+        r"""
+        Counts a dropped record.
+        """
+        with self._counters_lock:
+            self._dropped += 1
+
+    def _wait_for_space(self) -> None:
+        r"""
+        Blocks the profiled call until the queue is not full (``overflow="block"``).
+        """
+        self._wakeup.set()
+        with self._space:
+            while len(self._queue) >= self._max_size and not self._closed:
+                self._space.wait(self._flush_interval)
+
+    def _run(self) -> None:
+        r"""
+        Loop of the background thread: opens the sinks, writes the queued records and closes the sinks when the queue is closed.
+        """
+        for sink in self._sinks:
+            self._call_sink(sink.open, self._data_columns)
+        while True:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            closed = self._closed
+            with self._flushed:
+                flush_requests = self._flush_requests
+            self._drain()
+            for sink in self._sinks:
+                self._call_sink(sink.flush)
+            with self._flushed:
+                self._flush_done = flush_requests
+                self._flushed.notify_all()
+            if closed:
+                break
+        for sink in self._sinks:
+            self._call_sink(sink.close)
+
+    def _drain(self) -> None:
+        r"""
+        Writes the queued records to the sinks by batches.
+        """
+        queue = self._queue
+        while queue:
+            batch = []
+            popleft = queue.popleft
+            try:
+                for _ in range(self._batch_size):
+                    batch.append(popleft())
+            except IndexError: # The queue is empty
+                pass
+            if self._overflow == "block":
+                with self._space:
+                    self._space.notify_all()
+            records = [(timestamp, self._signature_name(function_index), values) for timestamp, function_index, values in batch]
+            for sink in self._sinks:
+                self._call_sink(sink.write, records)
+            self._written += len(records)
+
+    def _signature_name(self, function_index: int) -> str:
+        signature_names = self._signature_names # Read once: the cache can be replaced by clear_signature_names meanwhile
+        signature_name = signature_names.get(function_index)
+        if signature_name is None:
+            signature_name = signature_names[function_index] = self._get_signature_name(function_index)
+        return signature_name
+
+    def clear_signature_names(self) -> None:
+        r"""
+        Clears the cached signature names, so the next records are written with the names returned by ``get_signature_name``.
+        """
+        self._signature_names = {}
+
+    def _call_sink(self, method: Callable, *args) -> None:
+        r"""
+        Calls a method of a sink, the errors are counted instead of stopping the background thread.
+        """
+        try:
+            method(*args)
+        except Exception as error:
+            self._errors += 1
+            self.last_error = error
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        r"""
+        Wakes up the background thread and waits until the records queued before the call are written and the sinks are flushed.
+
+        Parameters
+        ----------
+        timeout : float
+            The maximum time to wait in seconds.
+            Default is None (no limit).
+
+        Returns
+        -------
+        bool
+            If the records were written before the timeout.
+        """
+        if not self._thread.is_alive():
+            return False
+        with self._flushed:
+            self._flush_requests += 1
+            request = self._flush_requests
+            self._wakeup.set()
+            return self._flushed.wait_for(lambda: self._flush_done >= request or not self._thread.is_alive(), timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        r"""
+        Writes the queued records, closes the sinks and stops the background thread.
+        The records queued after the closing are dropped.
+
+        Parameters
+        ----------
+        timeout : float
+            The maximum time to wait for the background thread in seconds.
+            Default is None (no limit).
+        """
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        self._wakeup.set()
+        with self._space:
+            self._space.notify_all()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
@@ -0,0 +1,60 @@
+from typing import Union, IO, Iterator
+import contextlib
+import gzip
+import io
+import os
+
+@contextlib.contextmanager
+def open_text_output(target: Union[str, os.PathLike, IO], buffering: int = 1024 * 1024) -> Iterator[IO]:
+    r"""
+    Opens a text output to write the reports and exports of the :class:`pydecorium.decorators.FunctionProfiler` chunk by chunk.
+
+    The target can be:
+
+    - a path. If the path ends with ".gz", the output is compressed with gzip. The file is closed at the end.
+    - an open text file object (``sys.stdout``, ``io.StringIO``, ...). The file is flushed but not closed at the end.
+    - an open binary file object (``gzip.GzipFile``, ``io.BytesIO``, ...). The text is encoded in UTF-8 and the file is flushed but not closed at the end.
+
+    .. code-block:: python
+
+        with open_text_output("report.txt.gz") as file:
+            file.write("...")
+
+    Parameters
+    ----------
+    target : Union[str, os.PathLike, IO]
+        The path or the file object to write.
+    buffering : int
+        The size of the write buffer in bytes when the target is a path.
+        Default is 1 MB.
+
+    Yields
+    ------
+    IO
+        The text file object to write.
+
+    Raises
+    ------
+    TypeError
+        If the target is not a path or a file object.
+    """
+    if isinstance(target, (str, os.PathLike)):
+        path = os.fspath(target)
+        if path.endswith(".gz"):
+            file = io.TextIOWrapper(io.BufferedWriter(gzip.GzipFile(path, "wb"), buffer_size=buffering), encoding="utf-8")
+        else:
+            file = open(path, "w", buffering=buffering)
+        with file:
+            yield file
+    elif isinstance(target, (io.RawIOBase, io.BufferedIOBase)):
+        file = io.TextIOWrapper(target, encoding="utf-8")
+        try:
+            yield file
+            file.flush()
+        finally:
+            file.detach() # The target is not closed
+    elif hasattr(target, "write"):
+        yield target
+        target.flush()
+    else:
+        raise TypeError("The target must be a path or a file object.")
@@ -1,5 +1,7 @@
 from .profiler_utils import ProfilerUtils
+import statistics
 import time
+from typing import List, Union
 
 class Timer(ProfilerUtils):
     """
@@ -9,46 +11,171 @@ class Timer(ProfilerUtils):
 
     The ``data_name`` attribute is set to "runtime".
 
+    The runtime is measured with one of the nanosecond clocks of the ``time`` module:
+
+    - "perf_counter_ns": The monotonic clock with the highest available resolution (default). It includes the time elapsed during sleep.
+    - "monotonic_ns": The monotonic clock, which can't go backward (not affected by the system clock updates).
+    - "process_time_ns": The CPU time (system and user) of the current process. It doesn't include the time elapsed during sleep.
+    - "thread_time_ns": The CPU time (system and user) of the current thread. It doesn't include the time elapsed during sleep.
+
+    The overhead of the timer (the runtime measured for an empty function) can be measured with :meth:`calibrate` and subtracted from the measured runtimes if ``subtract_overhead`` is True.
+
     .. note::
-    
-        The runtime handle result is given in seconds. It can be summed to get the total runtime. The string_value method converts the result in hours, minutes and seconds.
+
+        The runtime handle result is given in nanoseconds as an integer. It can be summed to get the total runtime. The string_value method converts the result in hours, minutes and seconds.
+
+    Parameters
+    ----------
+    clock : str
+        The name of the clock used to measure the runtime.
+        Default is "perf_counter_ns".
+    subtract_overhead : bool
+        If True, the overhead measured by :meth:`calibrate` is subtracted from the measured runtimes (the runtimes are clamped to 0).
+        Default is False.
+
+    Attributes
+    ----------
+    clock : str
+        The name of the clock used to measure the runtime.
+    overhead : int
+        The overhead of the timer in nanoseconds measured by :meth:`calibrate`. Default is 0.
+    subtract_overhead : bool
+        If the overhead is subtracted from the measured runtimes.
     """
     data_name: str = "runtime"
+    data_typecode: str = "q"
+    correct_clocks = ["perf_counter_ns", "monotonic_ns", "process_time_ns", "thread_time_ns"]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, clock: str = "perf_counter_ns", subtract_overhead: bool = False, **kwargs):
         super().__init__(*args, **kwargs)
+        self.clock = clock
+        self.subtract_overhead = subtract_overhead
+        self.overhead = 0
+
+    @property
+    def clock(self) -> str:
+        return self._clock_name
 
-    def pre_execute(self, func, *args, **kwargs) -> None:
+    @clock.setter
+    def clock(self, clock: str) -> None:
+        if not isinstance(clock, str):
+            raise TypeError("The clock must be a string.")
+        if clock not in self.correct_clocks:
+            raise ValueError(f"The clock must be one of {self.correct_clocks}.")
+        self._clock_name = clock
+        self._clock = getattr(time, clock)
+
+    @property
+    def subtract_overhead(self) -> bool:
+        return self._subtract_overhead
+
+    @subtract_overhead.setter
+    def subtract_overhead(self, subtract_overhead: bool) -> None:
+        if not isinstance(subtract_overhead, bool):
+            raise TypeError("The subtract_overhead must be a booleen.")
+        self._subtract_overhead = subtract_overhead
+
+    def pre_execute(self, func, *args, **kwargs) -> int:
         """
         Initializes the timer before the function execution.
+
+        Returns
+        -------
+        int
+            The start time in nanoseconds.
         """
-        self.tic = time.time()
+        return self._clock()
 
-    def post_execute(self, func, *args, **kwargs) -> None:
+    def post_execute(self, token: int, func, *args, **kwargs) -> int:
         """
         Computes the runtime after the function execution.
+
+        Parameters
+        ----------
+        token : int
+            The start time in nanoseconds returned by :meth:`pre_execute`.
+
+        Returns
+        -------
+        int
+            The runtime in nanoseconds.
         """
-        self.toc = time.time()
-    
-    def handle_result(self) -> float:
+        return self._clock() - token
+
+    def handle_result(self, token: int) -> int:
         """
         Computes the runtime.
 
+        Parameters
+        ----------
+        token : int
+            The runtime in nanoseconds returned by :meth:`post_execute`.
+
+        Returns
+        -------
+        int
+            The runtime in nanoseconds.
+        """
+        if self._subtract_overhead:
+            token -= self.overhead
+            if token < 0:
+                token = 0
+        return token
+
+    def calibrate(self, number: int = 10000) -> int:
+        """
+        Measures the overhead of the timer: the median runtime measured for an empty function.
+        Every call of the empty function is measured, whatever the ``sampling`` policy of the timer.
+
+        The measured overhead is stored in the ``overhead`` attribute and subtracted from the next runtimes if ``subtract_overhead`` is True.
+
+        .. seealso::
+
+            - :meth:`pydecorium.decorators.FunctionProfiler.calibrate` : Measures the overhead of the timers through the whole profiling of a ``FunctionProfiler``.
+
+        Parameters
+        ----------
+        number : int
+            The number of measures.
+            Default is 10000.
+
         Returns
         -------
-        float
-            The runtime in seconds.
+        int
+            The overhead in nanoseconds.
+
+        Raises
+        ------
+        TypeError
+            If `number` is not an integer.
+        ValueError
+            If `number` is not strictly positive.
         """
-        return self.toc - self.tic
-    
+        # Parameter check
+        if not isinstance(number, int):
+            raise TypeError("The parameter `number` must be an integer.")
+        if number <= 0:
+            raise ValueError("The parameter `number` must be strictly positive.")
+        def empty_function():
+            pass
+        # The methods of the class measure every call, even if a sampling policy replaced the hooks of the instance
+        pre_execute, post_execute = type(self).pre_execute, type(self).post_execute
+        runtimes = []
+        for _ in range(number):
+            token = pre_execute(self, empty_function)
+            empty_function()
+            runtimes.append(post_execute(self, token, empty_function))
+        self.overhead = int(statistics.median(runtimes))
+        return self.overhead
+
     def string_value(self, result) -> str:
         """
         Converts the runtime in hours, minutes and seconds in the format "{hours}h {minutes}m {seconds}s".
 
         Parameters
         ----------
-        result : float
-            The runtime in seconds.
+        result : Union[int, float]
+            The runtime in nanoseconds.
 
         Returns
         -------
@@ -63,10 +190,45 @@ class Timer(ProfilerUtils):
         # Parameter check
         if not isinstance(result, (float, int)):
             raise TypeError("The parameter `result` must be numeric.")
-        # Conversion
-        hours, remainder = divmod(result, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        return f"{int(hours)}h {int(minutes)}m {seconds:.4f}s"
+        return format_runtime(result)
 
+    def string_results(self, results) -> List[str]:
+        """
+        Converts a column of runtimes in a list of strings in the format "runtime : {hours}h {minutes}m {seconds}s".
+
+        Parameters
+        ----------
+        results : Iterable[Union[int, float]]
+            The runtimes in nanoseconds.
 
+        Returns
+        -------
+        List[str]
+            The runtimes in a string format.
+        """
+        prefix = f"{self.data_name} : "
+        string_value = self.string_value
+        # The runtimes lower than one minute don't need the conversion
+        return [f"{prefix}0h 0m {result / 1e9:.4f}s" if 0 <= result < 60e9 else prefix + string_value(result) for result in results]
 
+
+
+def format_runtime(runtime: Union[int, float]) -> str:
+    """
+    Converts a runtime in nanoseconds in hours, minutes and seconds in the format "{hours}h {minutes}m {seconds}s".
+    A negative runtime (an exclusive runtime for example) is prefixed by "-".
+
+    Parameters
+    ----------
+    runtime : Union[int, float]
+        The runtime in nanoseconds.
+
+    Returns
+    -------
+    str
+        The runtime in hours, minutes and seconds.
+    """
+    sign = "-" if runtime < 0 else ""
+    hours, remainder = divmod(abs(runtime) / 1e9, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{sign}{int(hours)}h {int(minutes)}m {seconds:.4f}s"
@@ -0,0 +1,148 @@
+from .record_store import missing_mask
+
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+import json
+
+def collapsed_stack_name(signature_name: str) -> str:
+    r"""
+    Converts a signature name into a frame name of the collapsed-stack format: the separators ";" and the spaces are replaced.
+
+    Parameters
+    ----------
+    signature_name : str
+        The signature name of a profiled function.
+
+    Returns
+    -------
+    str
+        The frame name.
+    """
+    return signature_name.replace(";", ",").replace(" ", "_")
+
+
+def iter_collapsed_stacks(stacks: Iterable[Tuple[Tuple[int, ...], Any]], signature_names: List[str], chunk_size: int = 10000) -> Iterator[str]:
+    r"""
+    Iterates over the chunks of the collapsed-stack format read by ``flamegraph.pl`` and speedscope.
+
+    Each line contains the frames of a stack from the root, separated by ";", and the weight of the stack (its exclusive value):
+
+    .. code-block:: console
+
+        process_request 15800000
+        process_request;load 30300000
+        process_request;save 60300000
+
+    The weights are rounded to integers, the stacks with a non-numeric or a negative weight are skipped.
+
+    Parameters
+    ----------
+    stacks : Iterable[Tuple[Tuple[int, ...], Any]]
+        The stacks (tuples of function indices from the root) and their weights.
+    signature_names : List[str]
+        The signature names of the functions.
+    chunk_size : int
+        The number of lines per chunk.
+        Default is 10000.
+
+    Yields
+    ------
+    str
+        The chunks of lines.
+    """
+    names = [collapsed_stack_name(signature_name) for signature_name in signature_names]
+    lines = []
+    for path, weight in stacks:
+        if not isinstance(weight, (int, float)) or weight != weight or weight < 0:
+            continue
+        lines.append(f"{';'.join([names[function_index] for function_index in path])} {int(round(weight))}\n")
+        if len(lines) >= chunk_size:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+def iter_chrome_trace(threads: Iterable[Tuple[int, int, str, Iterable[Tuple[Any, Any, List]]]], signature_names: List[str], data_names: List[str], missing_values: List[Any], duration_column: Optional[int] = None, chunk_size: int = 10000) -> Iterator[str]:
+    r"""
+    Iterates over the chunks of a JSON document in the trace-event format read by the Chrome trace viewers (``chrome://tracing``, Perfetto).
+
+    Each profiled call is a complete event ("X") of the process and the thread which profiled it, starting at its timestamp and lasting its duration.
+    The events are nested by the viewers according to their times.
+    The present values of the call are given in the arguments of the event.
+    If there is no duration column, the calls are instant events ("i").
+
+    .. code-block:: console
+
+        {"traceEvents": [
+        {"name": "thread_name", "ph": "M", "pid": 1234, "tid": 1, "args": {"name": "MainThread"}},
+        {"name": "load", "cat": "function", "ph": "X", "ts": 1737395000000000.000, "dur": 10102.400, "pid": 1234, "tid": 1, "args": {"runtime": 10102400}},
+        ...
+        ], "displayTimeUnit": "ms"}
+
+    The events are formatted column by column, by chunks of ``chunk_size`` records.
+
+    Parameters
+    ----------
+    threads : Iterable[Tuple[int, int, str, Iterable[Tuple[Any, Any, List]]]]
+        The process identifier, the thread identifier, the thread name and the columns of the records (timestamps in nanoseconds, function indices and value columns) of each store of each thread.
+    signature_names : List[str]
+        The signature names of the functions.
+    data_names : List[str]
+        The names of the data columns.
+    missing_values : List[Any]
+        The sentinels of the missing values of the data columns.
+    duration_column : int
+        The index of the data column containing the durations in nanoseconds.
+        Default is None (instant events).
+    chunk_size : int
+        The number of events per chunk.
+        Default is 10000.
+
+    Yields
+    ------
+    str
+        The chunks of the JSON document.
+    """
+    names = [json.dumps(signature_name) for signature_name in signature_names]
+    keys = [json.dumps(data_name) for data_name in data_names]
+    phase = '"ph": "i", "s": "t"' if duration_column is None else '"ph": "X"'
+    yield '{"traceEvents": [\n'
+    separator = ""
+    for pid, tid, thread_name, stores in threads:
+        yield f'{separator}{{"name": "thread_name", "ph": "M", "pid": {pid}, "tid": {tid}, "args": {{"name": {json.dumps(thread_name)}}}}}'
+        separator = ",\n"
+        suffix = f', "pid": {pid}, "tid": {tid}, "args": {{'
+        for timestamps, function_indices, columns in stores:
+            for start in range(0, len(timestamps), chunk_size):
+                end = start + chunk_size
+                events = [f'{{"name": {names[function_index]}, "cat": "function", {phase}, "ts": {timestamp / 1000:.3f}' for function_index, timestamp in zip(function_indices[start:end], timestamps[start:end])]
+                if duration_column is not None:
+                    durations = columns[duration_column][start:end]
+                    mask = missing_mask(durations, missing_values[duration_column])
+                    if mask is not None:
+                        durations = [0 if missing else duration for duration, missing in zip(durations, mask)]
+                    events = [f'{event}, "dur": {duration / 1000:.3f}{suffix}' for event, duration in zip(events, durations)]
+                else:
+                    events = [event + suffix for event in events]
+                arguments = None
+                for key, column, missing_value in zip(keys, columns, missing_values):
+                    column = column[start:end]
+                    mask = missing_mask(column, missing_value)
+                    if mask is None:
+                        parts = [f"{key}: {value}" if type(value) is int else f"{key}: {_json_value(value)}" for value in column]
+                    else:
+                        parts = ["" if missing else f"{key}: {value}" if type(value) is int else f"{key}: {_json_value(value)}" for value, missing in zip(column, mask)]
+                    arguments = parts if arguments is None else [f"{argument}, {part}" if argument and part else argument or part for argument, part in zip(arguments, parts)]
+                if arguments is not None:
+                    events = [event + argument for event, argument in zip(events, arguments)]
+                yield separator + separator.join([event + "}}" for event in events])
+    yield '\n], "displayTimeUnit": "ms"}\n'
+
+
+def _json_value(value: Any) -> str:
+    r"""
+    Converts a value of a record in JSON, the values which are not JSON serializable are converted in strings.
+    """
+    if isinstance(value, (int, float)) and value == value and value not in (float("inf"), float("-inf")):
+        return repr(value) if isinstance(value, int) else f"{value:.17g}"
+    return json.dumps(value, default=str)
@@ -0,0 +1,109 @@
+import random
+import statistics
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Aggregate, Timer
+
+
+def make_aggregate(values, quantiles=False):
+    aggregate = Aggregate(quantiles=quantiles)
+    for value in values:
+        aggregate.add(value)
+    return aggregate
+
+
+def test_aggregate_statistics():
+    values = [random.gauss(1000, 100) for _ in range(1000)]
+    aggregate = make_aggregate(values)
+    assert aggregate.count == 1000
+    assert aggregate.total == pytest.approx(sum(values))
+    assert aggregate.minimum == min(values)
+    assert aggregate.maximum == max(values)
+    assert aggregate.mean == pytest.approx(statistics.fmean(values))
+    assert aggregate.variance == pytest.approx(statistics.pvariance(values))
+    assert aggregate.std == pytest.approx(statistics.pstdev(values))
+
+
+def test_empty_aggregate():
+    aggregate = Aggregate()
+    assert aggregate.count == 0
+    assert aggregate.total is None and aggregate.mean is None and aggregate.variance is None and aggregate.std is None
+    with pytest.raises(ValueError):
+        aggregate.quantile(0.5)
+
+
+def test_merged_aggregates_equal_the_aggregate_of_all_the_values():
+    values = [random.randint(0, 10 ** 6) for _ in range(1000)]
+    aggregate = make_aggregate(values[:300])
+    aggregate.merge(make_aggregate(values[300:]))
+    aggregate.merge(Aggregate())
+    expected = make_aggregate(values)
+    assert (aggregate.count, aggregate.total, aggregate.minimum, aggregate.maximum) == (expected.count, expected.total, expected.minimum, expected.maximum)
+    assert aggregate.mean == pytest.approx(expected.mean)
+    assert aggregate.variance == pytest.approx(expected.variance)
+
+
+def test_aggregate_only_mode_keeps_no_record():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], aggregate_only=True, report_format="cumulative")
+
+    @function_profiler
+    def function():
+        pass
+
+    for _ in range(100):
+        function()
+    assert len(function_profiler.profiled_data) == 0
+    calls, (runtime,) = function_profiler.aggregates[0]
+    assert calls == runtime.count == 100
+    assert function_profiler.cumulative_data[0] == [100, [runtime.total]]
+    assert "[function] - 100 calls" in function_profiler.generate_report()
+    function_profiler.report_format = "statistics"
+    assert "mean" in function_profiler.generate_report()
+    function_profiler.report_format = "datetime"
+    with pytest.raises(ValueError, match="aggregate_only"):
+        function_profiler.generate_report()
+
+
+def test_aggregates_match_the_records():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer])
+
+    @function_profiler
+    def function():
+        pass
+
+    for _ in range(50):
+        function()
+    runtimes = [values[0] for _, _, values in function_profiler.profiled_data]
+    calls, (runtime,) = function_profiler.aggregates[0]
+    assert calls == 50
+    assert runtime.total == sum(runtimes)
+    assert runtime.minimum == min(runtimes)
+    assert runtime.maximum == max(runtimes)
+    assert runtime.variance == pytest.approx(statistics.pvariance(runtimes))
+
+
+def test_aggregate_only_must_be_a_boolean():
+    with pytest.raises(TypeError):
+        FunctionProfiler(profiler_utils=[Timer], aggregate_only=1)
+
+
+def test_copy_keeps_the_sketch_of_an_empty_aggregate():
+    aggregate = Aggregate(quantiles=True)
+    copy = aggregate.copy()
+    assert copy.sketch is not None and copy.sketch is not aggregate.sketch
+    assert copy.count == 0 and copy.total is None
+    copy.add(5)
+    assert aggregate.count == 0 and aggregate.sketch.count == 0
+    assert copy.quantile(0.5) == pytest.approx(5, rel=0.01)
+
+
+def test_copy_is_independent():
+    aggregate = Aggregate(quantiles=True)
+    for value in (1, 2, 3):
+        aggregate.add(value)
+    copy = aggregate.copy()
+    assert (copy.count, copy.total, copy.minimum, copy.maximum, copy.mean, copy.variance) == (aggregate.count, aggregate.total, aggregate.minimum, aggregate.maximum, aggregate.mean, aggregate.variance)
+    copy.add(10)
+    assert aggregate.count == 3 and aggregate.sketch.count == 3
+    assert Aggregate().copy().sketch is None
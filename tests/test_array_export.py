@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Timer, Memory
+
+numpy = pytest.importorskip("numpy")
+
+
+def make_profiler(**kwargs):
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], **kwargs)
+
+    @function_profiler
+    def load():
+        pass
+
+    @function_profiler
+    def save():
+        pass
+
+    return function_profiler, load, save
+
+
+def test_to_numpy_is_sorted_by_timestamp():
+    function_profiler, load, save = make_profiler()
+    thread = threading.Thread(target=lambda: [save() for _ in range(5)])
+    for _ in range(5):
+        load()
+    thread.start()
+    thread.join()
+    load()
+    records = function_profiler.to_numpy()
+    assert records.dtype.names == ("timestamp", "function_index", "runtime")
+    assert len(records) == 11
+    assert numpy.all(numpy.diff(records["timestamp"]) >= 0)
+    assert int((records["function_index"] == 1).sum()) == 5
+    assert int(records["runtime"].sum()) == sum(aggregate[1][0].total for aggregate in function_profiler.aggregates.values())
+
+
+def test_to_numpy_keeps_the_missing_values_sentinels():
+    function_profiler, load, _ = make_profiler()
+    load()
+    function_profiler.connect_profiler_utils(Memory)
+    load()
+    records = function_profiler.to_numpy()
+    assert records.dtype.names[2:] == ("runtime", "memory usage")
+    assert records["memory usage"][0] == numpy.iinfo(records["memory usage"].dtype).min
+
+
+def test_to_dataframe():
+    pandas = pytest.importorskip("pandas")
+    function_profiler, load, save = make_profiler()
+    load()
+    save()
+    function_profiler.connect_profiler_utils(Memory)
+    load()
+    dataframe = function_profiler.to_dataframe()
+    assert list(dataframe.columns) == ["timestamp", "function_index", "function", "runtime", "memory usage"]
+    assert str(dataframe["timestamp"].dtype) == "datetime64[ns, UTC]"
+    assert list(dataframe["function"]) == ["load", "save", "load"]
+    assert isinstance(dataframe["function"].dtype, pandas.CategoricalDtype)
+    assert dataframe["memory usage"].isna().tolist() == [True, True, False]
+    assert dataframe.groupby("function", observed=True)["runtime"].count().to_dict() == {"load": 2, "save": 1}
+
+
+def test_summarize_records():
+    function_profiler, load, save = make_profiler()
+    for _ in range(9):
+        load()
+    save()
+    summary = function_profiler.summarize_records(quantiles=[0.5, 1])
+    assert summary["load"]["calls"] == 9
+    runtime = summary["load"]["runtime"]
+    assert runtime["count"] == 9
+    assert runtime["max"] == runtime["p100"]
+    assert runtime["min"] <= runtime["p50"] <= runtime["max"]
+    assert runtime["sum"] == function_profiler.aggregates[0][1][0].total
+    with pytest.raises(ValueError):
+        function_profiler.summarize_records(quantiles=[2])
+
+
+def test_array_export_is_not_available_in_the_aggregate_only_mode():
+    function_profiler, load, _ = make_profiler(aggregate_only=True)
+    load()
+    with pytest.raises(ValueError):
+        function_profiler.to_numpy()
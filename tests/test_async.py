@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Timer, EveryNSampling
+
+
+def test_profiler_utils_awaits_the_coroutine(capsys):
+    @Timer()
+    async def sleep():
+        await asyncio.sleep(0.01)
+        return 1
+
+    assert asyncio.iscoroutinefunction(sleep)
+    assert asyncio.run(sleep()) == 1
+    assert "runtime" in capsys.readouterr().out
+
+
+def test_function_profiler_measures_the_whole_coroutine():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer])
+
+    @function_profiler
+    async def sleep(duration):
+        await asyncio.sleep(duration)
+        return duration
+
+    assert asyncio.iscoroutinefunction(sleep)
+    assert asyncio.run(sleep(0.02)) == 0.02
+    records = list(function_profiler.profiled_data)
+    assert len(records) == 1
+    assert records[0][2][0] >= 20_000_000
+
+
+def test_concurrent_coroutines_are_measured_apart():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer])
+
+    @function_profiler
+    async def sleep(duration):
+        await asyncio.sleep(duration)
+
+    async def main():
+        await asyncio.gather(sleep(0.01), sleep(0.05), sleep(0.01))
+
+    asyncio.run(main())
+    runtimes = sorted(record[2][0] for record in function_profiler.profiled_data)
+    assert len(runtimes) == 3
+    # The concurrent coroutines don't add their runtimes
+    assert runtimes[0] < 50_000_000 <= runtimes[2]
+
+
+def test_coroutine_raising_an_exception_is_not_stored():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer])
+
+    @function_profiler
+    async def fail():
+        await asyncio.sleep(0)
+        raise ValueError("fail")
+
+    with pytest.raises(ValueError):
+        asyncio.run(fail())
+    assert len(function_profiler.profiled_data) == 0
+
+
+def test_sampled_coroutines():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], sampling=EveryNSampling(2))
+
+    @function_profiler
+    async def noop():
+        pass
+
+    async def main():
+        for _ in range(10):
+            await noop()
+
+    asyncio.run(main())
+    assert len(function_profiler.profiled_data) == 5
+    assert function_profiler.cumulative_data[0][0] == 10
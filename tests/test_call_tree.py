@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, ProfilerUtils, Timer, EveryNSampling
+
+
+class Work(ProfilerUtils):
+    """
+    Profiler utils measuring the units of work done by a call: the results don't depend on the clock.
+    """
+    data_name = "work"
+    data_typecode = "q"
+    done = 0
+
+    def pre_execute(self, func, *args, **kwargs):
+        return Work.done
+
+    def post_execute(self, token, func, *args, **kwargs):
+        return Work.done - token
+
+    def handle_result(self, token):
+        return token
+
+    def string_value(self, result):
+        return str(result)
+
+
+def make_profiler(**kwargs):
+    function_profiler = FunctionProfiler(profiler_utils=[Work], track_call_tree=True, **kwargs)
+
+    @function_profiler
+    def leaf(work):
+        Work.done += work
+
+    @function_profiler
+    def node():
+        Work.done += 1
+        leaf(2)
+        leaf(3)
+
+    @function_profiler
+    def root():
+        node()
+        leaf(4)
+
+    return function_profiler, root
+
+
+def totals(function_profiler):
+    return {path: (calls, inclusive[0].total, exclusive[0].total) for path, (calls, inclusive, exclusive) in function_profiler.call_tree.items()}
+
+
+def test_inclusive_and_exclusive_values():
+    function_profiler, root = make_profiler()
+    root()
+    root()
+    assert totals(function_profiler) == {
+        (2,): (2, 20, 0),
+        (2, 1): (2, 12, 2),
+        (2, 1, 0): (4, 10, 10),
+        (2, 0): (2, 8, 8),
+    }
+
+
+def test_tree_report():
+    function_profiler, root = make_profiler(report_format="tree")
+    root()
+    assert function_profiler.generate_report().splitlines() == [
+        "[root] - 1 calls - work : 10 (self 0)",
+        "\t[node] - 1 calls - work : 6 (self 1)",
+        "\t\t[leaf] - 2 calls - work : 5 (self 5)",
+        "\t[leaf] - 1 calls - work : 4 (self 4)",
+    ]
+
+
+def test_tree_report_requires_the_call_tree():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer])
+    with pytest.raises(ValueError):
+        function_profiler.report_format = "tree"
+        function_profiler.generate_report()
+
+
+def test_call_raising_an_exception_keeps_its_children():
+    function_profiler = FunctionProfiler(profiler_utils=[Work], track_call_tree=True, report_format="tree")
+
+    @function_profiler
+    def child():
+        Work.done += 1
+
+    @function_profiler
+    def fail():
+        child()
+        raise ValueError("fail")
+
+    with pytest.raises(ValueError):
+        fail()
+    assert list(function_profiler.call_tree) == [(1, 0)]
+    assert function_profiler.generate_report().splitlines() == ["[fail] - 0 calls", "\t[child] - 1 calls - work : 1 (self 1)"]
+
+
+def test_unsampled_calls_are_in_the_tree():
+    function_profiler, root = make_profiler(sampling=EveryNSampling(2))
+    root()
+    root()
+    tree = function_profiler.call_tree
+    assert tree[(2,)][0] == 2
+    assert tree[(2,)][1][0].count == 1
+
+
+def test_concurrent_tasks_have_their_own_paths():
+    function_profiler = FunctionProfiler(profiler_utils=[Work], track_call_tree=True)
+
+    @function_profiler
+    async def child():
+        await asyncio.sleep(0.001)
+        Work.done += 1
+
+    @function_profiler
+    async def first():
+        await child()
+
+    @function_profiler
+    async def second():
+        await asyncio.gather(child(), child())
+
+    async def main():
+        await asyncio.gather(first(), second())
+
+    asyncio.run(main())
+    calls = {path: node[0] for path, node in function_profiler.call_tree.items()}
+    assert calls == {(1,): 1, (1, 0): 1, (2,): 1, (2, 0): 2}
@@ -0,0 +1,80 @@
+import sys
+
+import pytest
+
+from pydecorium.decorator import Decorator
+from pydecorium.decorators import FunctionProfiler, Timer
+
+
+function_profiler = FunctionProfiler(profiler_utils=[Timer], rebind=True)
+
+
+@function_profiler
+def module_function():
+    return 1
+
+
+class Methods(object):
+    @function_profiler
+    def method(self):
+        return 2
+
+    @staticmethod
+    @function_profiler
+    def static():
+        return 3
+
+    @classmethod
+    @function_profiler
+    def klass(cls):
+        return 4
+
+
+def call_all():
+    module = sys.modules[__name__]
+    return module.module_function() + Methods().method() + Methods.static() + Methods.klass()
+
+
+def test_compiled_out_returns_the_function(monkeypatch):
+    monkeypatch.setattr(Decorator, "compiled_out", True)
+    profiler = FunctionProfiler(profiler_utils=[Timer])
+
+    def function():
+        return 1
+
+    assert profiler(function) is function
+    monkeypatch.setattr(Decorator, "compiled_out", False)
+    assert profiler(function) is not function
+
+
+def test_rebind_replaces_the_decorated_functions():
+    function_profiler.initialize()
+    decorated = module_function
+    assert call_all() == 10
+    assert len(function_profiler.profiled_data) == 4
+    function_profiler.activated = False
+    try:
+        assert module_function is not decorated
+        assert not hasattr(module_function, "__wrapped__")
+        assert not hasattr(Methods.__dict__["method"], "__wrapped__")
+        assert not hasattr(Methods.__dict__["static"].__func__, "__wrapped__")
+        assert not hasattr(Methods.__dict__["klass"].__func__, "__wrapped__")
+        assert call_all() == 10
+        assert len(function_profiler.profiled_data) == 4
+    finally:
+        function_profiler.activated = True
+    assert module_function is decorated
+    assert call_all() == 10
+    assert len(function_profiler.profiled_data) == 8
+
+
+def test_function_decorated_while_deactivated_is_rebound():
+    profiler = FunctionProfiler(profiler_utils=[Timer], rebind=True, activated=False)
+
+    def function():
+        pass
+
+    assert profiler(function) is function
+    assert profiler.rebind
+    with pytest.raises(TypeError):
+        FunctionProfiler(profiler_utils=[Timer], rebind=1)
@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from pydecorium.decorators import CPUTimer, FunctionProfiler
+
+
+def busy(duration):
+    # The thread time advances by the duration even if the thread is preempted
+    end = time.thread_time() + duration
+    while time.thread_time() < end:
+        pass
+
+
+def test_cpu_timer_splits_computing_and_waiting():
+    function_profiler = FunctionProfiler(profiler_utils=[CPUTimer])
+
+    @function_profiler
+    def compute():
+        busy(0.02)
+
+    @function_profiler
+    def wait():
+        time.sleep(0.02)
+
+    compute()
+    wait()
+    (_, _, computing), (_, _, waiting) = sorted(function_profiler.profiled_data, key=lambda record: record[1])
+    assert computing[0] >= 20_000_000 and computing[2] >= 10_000_000
+    assert waiting[0] >= 20_000_000 and waiting[2] < 10_000_000
+    # Each field is stored and aggregated in its own column
+    assert [data_column.data_name for data_column in function_profiler.data_columns] == ["wall time", "process time", "thread time"]
+    assert len(function_profiler.aggregates[0][1]) == 3
+
+
+def test_cpu_utilization_summary():
+    cpu_timer = CPUTimer()
+    assert cpu_timer.string_summary((100, 100, 50)) == "cpu utilization : 50.0%"
+    assert cpu_timer.string_summary((0, 0, 0)) is None
+    assert cpu_timer.string_value((2_000_000_000, 1_000_000_000, 1_000_000_000)) == "wall time 0h 0m 2.0000s - process time 0h 0m 1.0000s - thread time 0h 0m 1.0000s - cpu utilization 50.0%"
+    assert cpu_timer.string_value(1_500_000_000) == "0h 0m 1.5000s"
+
+
+def test_cpu_utilization_in_the_report():
+    function_profiler = FunctionProfiler(profiler_utils=[CPUTimer])
+
+    @function_profiler
+    def compute():
+        busy(0.005)
+
+    compute()
+    assert "cpu utilization" in function_profiler.generate_report()
+
+
+@pytest.mark.parametrize("result", [(1, 2), (1, 2, "3"), "1"])
+def test_invalid_cpu_times(result):
+    with pytest.raises(TypeError):
+        CPUTimer().string_value(result)
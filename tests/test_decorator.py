@@ -0,0 +1,73 @@
+import gc
+
+import pytest
+
+from pydecorium import Decorator
+from pydecorium.decorators import FunctionProfiler, Timer
+
+
+class PassThrough(Decorator):
+    def _wrapper(self, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+
+def function():
+    pass
+
+
+class Class:
+    def method(self):
+        pass
+
+
+@pytest.mark.parametrize("signature_name_format, expected", [
+    ("{name}", "method"),
+    ("{qualname}", "Class.method"),
+    ("{module}.{qualname}", f"{__name__}.Class.method"),
+    ("Function {name} from {module}", f"Function method from {__name__}"),
+    ("{name} and \\{other}", "method and {other}"),
+    ("\\{other {name} other\\}", "{other method other}"),
+])
+def test_signature_name_format(signature_name_format, expected):
+    decorator = PassThrough(signature_name_format="{name}")
+    decorator.signature_name_format = signature_name_format
+    assert decorator.get_signature_name(Class.method) == expected
+
+
+@pytest.mark.parametrize("signature_name_format", ["{other}", "{name} and {qualname", "name}"])
+def test_invalid_signature_name_format(signature_name_format):
+    decorator = PassThrough()
+    with pytest.raises(ValueError):
+        decorator.signature_name_format = signature_name_format
+    assert decorator.signature_name_format == "{name}"
+    with pytest.raises(TypeError):
+        decorator.signature_name_format = 1
+
+
+def test_signature_names_are_cached_until_the_format_changes():
+    decorator = PassThrough()
+    assert decorator.get_signature_name(function) == "function"
+    assert function in decorator._signature_name_cache
+    decorator.signature_name_format = "{module}.{name}"
+    assert decorator.get_signature_name(function) == f"{__name__}.function"
+    # The cache doesn't keep the functions alive
+    def temporary():
+        pass
+    decorator.get_signature_name(temporary)
+    del temporary
+    gc.collect()
+    assert len(decorator._signature_name_cache) == 1
+
+
+def test_signature_name_of_an_object_without_weak_reference():
+    decorator = PassThrough()
+    assert decorator.get_signature_name(len) == "len"
+
+
+def test_profiler_reports_the_names_with_the_current_format():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], report_format="cumulative")
+    function_profiler(Class.method)(Class())
+    assert function_profiler.generate_report().startswith("[method] - 1 calls")
+    function_profiler.signature_name_format = "{qualname}"
+    assert function_profiler.profiled_functions_signature_name == ["Class.method"]
+    assert function_profiler.generate_report().startswith("[Class.method] - 1 calls")
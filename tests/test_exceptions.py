@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Timer, Allocations
+
+
+def test_allocations_releases_the_frames_of_the_failed_calls():
+    allocations = Allocations(count_allocations=True)
+    function_profiler = FunctionProfiler(profiler_utils=[allocations, Timer])
+
+    @function_profiler
+    def fail():
+        raise RuntimeError("fail")
+
+    @function_profiler
+    def generator():
+        yield 1
+        raise KeyError("fail")
+
+    @function_profiler
+    async def fail_async():
+        raise ValueError("fail")
+
+    for _ in range(100):
+        with pytest.raises(RuntimeError):
+            fail()
+    with pytest.raises(KeyError):
+        list(generator())
+    with pytest.raises(ValueError):
+        asyncio.run(fail_async())
+    assert allocations._get_active_frames() == []
+
+
+def test_allocations_peak_of_a_call_after_a_failed_nested_call():
+    allocations = Allocations()
+    function_profiler = FunctionProfiler(profiler_utils=[allocations])
+
+    @function_profiler
+    def fail():
+        raise RuntimeError("fail")
+
+    @function_profiler
+    def outer():
+        try:
+            fail()
+        except RuntimeError:
+            pass
+        return bytearray(1_000_000)
+
+    outer()
+    records = list(function_profiler.profiled_data)
+    assert len(records) == 1
+    peak_memory = records[0][2][0]
+    if peak_memory is not None: # tracemalloc.reset_peak requires Python 3.9
+        assert peak_memory >= 1_000_000
+    assert allocations._get_active_frames() == []
+
+
+def test_standalone_allocations_decorator_releases_its_frames(capsys):
+    allocations = Allocations()
+
+    @allocations
+    def fail():
+        raise RuntimeError("fail")
+
+    for _ in range(10):
+        with pytest.raises(RuntimeError):
+            fail()
+    assert allocations._get_active_frames() == []
+
+
+def test_call_tree_ignores_the_failed_calls():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], track_call_tree=True)
+
+    @function_profiler
+    def fail():
+        raise RuntimeError("fail")
+
+    @function_profiler
+    def outer():
+        try:
+            fail()
+        except RuntimeError:
+            pass
+
+    outer()
+    with pytest.raises(RuntimeError):
+        fail()
+    outer()
+    call_tree = function_profiler.call_tree
+    assert call_tree[(1,)][0] == 2
+    # The failed calls are not recorded and don't leave a stale frame
+    assert (1, 0) not in call_tree
+    assert (0,) not in call_tree
+    assert function_profiler._call_frame.get() is None
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Timer
+
+
+def make_profiler(**kwargs):
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], profile_generators=True, **kwargs)
+
+    @function_profiler
+    def count(n, delay=0.0):
+        for index in range(n):
+            time.sleep(delay)
+            yield index
+
+    return function_profiler, count
+
+
+def test_generator_is_profiled_during_its_iteration():
+    function_profiler, count = make_profiler()
+    generator = count(5, 0.002)
+    assert len(function_profiler.profiled_data) == 0
+    time.sleep(0.02) # The time spent by the consumer is not measured
+    assert list(generator) == [0, 1, 2, 3, 4]
+    records = list(function_profiler.profiled_data)
+    assert len(records) == 1
+    assert 10_000_000 <= records[0][2][0] < 20_000_000
+    calls, (items, throughput) = function_profiler.generator_aggregates[0]
+    assert calls == 1
+    assert items.total == 5
+    assert throughput.total > 0
+
+
+def test_closed_generator_is_stored():
+    function_profiler, count = make_profiler()
+    for index in count(10):
+        if index == 2:
+            break
+    assert len(function_profiler.profiled_data) == 1
+    assert function_profiler.generator_aggregates[0][1][0].total == 3
+
+
+def test_generator_raising_an_exception_is_not_stored():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], profile_generators=True)
+
+    @function_profiler
+    def fail():
+        yield 1
+        raise ValueError("fail")
+
+    with pytest.raises(ValueError):
+        list(fail())
+    assert len(function_profiler.profiled_data) == 0
+    assert function_profiler.generator_aggregates == {}
+
+
+def test_send_and_return_value():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], profile_generators=True)
+
+    @function_profiler
+    def accumulate():
+        total = 0
+        while True:
+            value = yield total
+            if value is None:
+                return total
+            total += value
+
+    generator = accumulate()
+    next(generator)
+    assert generator.send(2) == 2
+    assert generator.send(3) == 5
+    with pytest.raises(StopIteration) as stop:
+        generator.send(None)
+    assert stop.value.value == 5
+    assert function_profiler.generator_aggregates[0][1][0].total == 3
+
+
+def test_generators_are_profiled_at_creation_by_default():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer])
+
+    @function_profiler
+    def count(n):
+        yield from range(n)
+
+    generator = count(3)
+    assert len(function_profiler.profiled_data) == 1
+    assert list(generator) == [0, 1, 2]
+    assert function_profiler.generator_aggregates == {}
+
+
+def test_async_generator_is_profiled_during_its_iteration():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], profile_generators=True)
+
+    @function_profiler
+    async def ticks(n):
+        for index in range(n):
+            await asyncio.sleep(0.002)
+            yield index
+
+    async def main():
+        return [item async for item in ticks(4)]
+
+    assert asyncio.run(main()) == [0, 1, 2, 3]
+    records = list(function_profiler.profiled_data)
+    assert len(records) == 1
+    assert records[0][2][0] >= 8_000_000
+    assert function_profiler.generator_aggregates[0][1][0].total == 4
@@ -0,0 +1,78 @@
+import gc
+import os
+import weakref
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Memory, EveryNSampling
+from pydecorium.decorators import memory as memory_module
+
+
+def backends():
+    return ["psutil"] + (["statm"] if os.path.exists(Memory.statm_path) else [])
+
+
+@pytest.mark.parametrize("backend", backends())
+def test_memory_measures_the_allocations(backend):
+    function_profiler = FunctionProfiler(profiler_utils=[Memory(backend=backend)])
+    data = []
+
+    @function_profiler
+    def allocate():
+        data.append(bytearray(64 * 1024 ** 2))
+        data[-1][::4096] = b"\x01" * len(data[-1][::4096]) # The pages are resident once written
+
+    allocate()
+    (_, _, values), = function_profiler.profiled_data
+    assert values[0] >= 32 * 1024 ** 2
+
+
+def test_sample_every():
+    memory = Memory(sample_every=3)
+    assert memory.sample_every == 3
+    assert isinstance(memory.sampling, EveryNSampling)
+    assert Memory().sample_every == 1
+    with pytest.raises(ValueError):
+        Memory(sample_every=2, sampling=EveryNSampling(2))
+    with pytest.raises(ValueError):
+        Memory(sample_every=0)
+    with pytest.raises(TypeError):
+        Memory(sample_every=1.0)
+    with pytest.raises(ValueError):
+        Memory(backend="proc")
+
+
+def test_instances_are_not_kept_alive_by_the_fork_hook():
+    memory = Memory()
+    reference = weakref.ref(memory)
+    assert memory in memory_module._memory_instances
+    del memory
+    gc.collect()
+    assert reference() is None
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+def test_backend_is_reopened_in_the_forked_process():
+    memory = Memory()
+    parent_rss = memory._read_rss()
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read)
+            ballast = bytearray(128 * 1024 ** 2)
+            ballast[::4096] = b"\x01" * len(ballast[::4096])
+            os.write(write, str(memory._read_rss()).encode())
+        finally:
+            os._exit(0)
+    os.close(write)
+    child_rss = int(os.read(read, 64))
+    os.close(read)
+    os.waitpid(pid, 0)
+    # The child reads its own memory usage, not the one of the parent
+    assert child_rss - parent_rss >= 64 * 1024 ** 2
+
+
+def test_format_memory():
+    assert memory_module.format_memory(1024 ** 2 + 1024 + 1) == "1MB 1KB 1B"
+    assert memory_module.format_memory(-1.6) == "-0MB 0KB 2B"
@@ -0,0 +1,63 @@
+from pydecorium.decorators import FunctionProfiler, Timer
+
+
+def make_profiler(a_calls, b_calls):
+    function_profiler = FunctionProfiler(profiler_utils=[Timer])
+
+    class A:
+        @function_profiler
+        def process(self):
+            pass
+
+    class B:
+        @function_profiler
+        def process(self):
+            pass
+
+    for _ in range(a_calls):
+        A().process()
+    for _ in range(b_calls):
+        B().process()
+    return function_profiler
+
+
+def test_diff_keeps_the_functions_with_the_same_name_apart():
+    profile, baseline = make_profiler(3, 2), make_profiler(0, 5)
+    difference = profile.diff(baseline)
+    calls = sorted((entry["calls"] for entry in difference.values()), key=str)
+    assert len(difference) == 2
+    assert calls == [(5, 2), (None, 3)]
+    assert all(name.startswith("process [") for name in difference)
+    report = profile.generate_report_diff(baseline)
+    assert report.count("[process [") == 2
+
+
+def make_single_profiler(calls):
+    function_profiler = FunctionProfiler(profiler_utils=[Timer])
+
+    @function_profiler
+    def process():
+        pass
+
+    for _ in range(calls):
+        process()
+    return function_profiler
+
+
+def test_diff_of_the_same_function():
+    profile, baseline = make_single_profiler(4), make_single_profiler(2)
+    difference = profile.diff(baseline)
+    assert list(difference) == ["process"]
+    assert difference["process"]["calls"] == (2, 4)
+    runtime = difference["process"]["data"]["runtime"]
+    assert set(runtime) == {"total", "mean", "p99"}
+
+
+def test_merge_combines_the_functions_with_the_same_name_separately():
+    profile, other = make_profiler(3, 2), make_profiler(1, 5)
+    profile.merge(other)
+    calls = sorted(calls for calls, _ in profile.aggregates.values())
+    assert calls == [4, 7]
+    assert len(profile.profiled_data) == 11
+    # The other profiler is not modified
+    assert sorted(calls for calls, _ in other.aggregates.values()) == [1, 5]
@@ -0,0 +1,115 @@
+import collections
+import re
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Timer, Memory
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\]|\\.)*",?)*\})? (\S+)$')
+
+
+def parse(text):
+    """
+    Checks the structure of the OpenMetrics text and returns the samples {(name, labels): value}.
+    """
+    lines = text.splitlines()
+    assert text.endswith("\n")
+    assert lines[-1] == "# EOF"
+    samples = {}
+    for line in lines[:-1]:
+        if line.startswith("#"):
+            assert re.match(r"^# (TYPE|HELP) [a-zA-Z_:][a-zA-Z0-9_:]* .+$", line), line
+            continue
+        match = SAMPLE.match(line)
+        assert match is not None, line
+        key = (match.group(1), match.group(2) or "")
+        assert key not in samples, f"Duplicate sample {key}"
+        samples[key] = float(match.group(3))
+    return samples
+
+
+def make_profiler(**kwargs):
+    function_profiler = FunctionProfiler(profiler_utils=[Timer, Memory], **kwargs)
+
+    class A:
+        @function_profiler
+        def process(self):
+            return bytearray(100)
+
+    class B:
+        @function_profiler
+        def process(self):
+            pass
+
+    for _ in range(3):
+        A().process()
+    for _ in range(2):
+        B().process()
+    return function_profiler
+
+
+def test_openmetrics_output_is_valid():
+    function_profiler = make_profiler()
+    samples = parse(function_profiler.generate_openmetrics(buckets=[1e3, 1e6, 1e9]))
+    calls = {labels: value for (name, labels), value in samples.items() if name == "pydecorium_calls_total"}
+    assert sorted(calls.values()) == [2, 3]
+    histograms = collections.defaultdict(list)
+    for (name, labels), value in samples.items():
+        if name == "pydecorium_runtime_bucket":
+            function_label = re.search(r'function="((?:[^"\\]|\\.)*)"', labels).group(1)
+            histograms[function_label].append(value)
+    assert len(histograms) == 2
+    for function_label, buckets in histograms.items():
+        assert buckets == sorted(buckets)
+        assert buckets[-1] == samples[("pydecorium_runtime_count", f'{{function="{function_label}"}}')]
+
+
+def test_openmetrics_summaries_without_quantiles():
+    function_profiler = make_profiler(track_quantiles=False)
+    text = function_profiler.generate_openmetrics(prefix="app")
+    samples = parse(text)
+    assert "# TYPE app_runtime summary" in text
+    assert not any(name.endswith("_bucket") for name, _ in samples)
+
+
+def test_openmetrics_labels_are_escaped():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer])
+
+    def function():
+        pass
+
+    function_profiler(function)()
+    function_profiler.signature_name_format = 'a"b\\c'
+    samples = parse(function_profiler.generate_openmetrics())
+    assert ("pydecorium_calls_total", '{function="a\\"b\\\\c"}') in samples
+
+
+def test_metrics_server_serves_the_metrics_while_profiling():
+    function_profiler = make_profiler()
+
+    @function_profiler
+    def work():
+        pass
+
+    stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            work()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    try:
+        with function_profiler.start_metrics_server(port=0) as metrics_server:
+            for _ in range(10):
+                with urllib.request.urlopen(metrics_server.url) as response:
+                    assert response.headers["Content-Type"].startswith("application/openmetrics-text")
+                    parse(response.read().decode("utf-8"))
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(metrics_server.url.replace("/metrics", "/other"))
+    finally:
+        stop.set()
+        thread.join()
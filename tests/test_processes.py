@@ -0,0 +1,77 @@
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Timer
+
+
+function_profiler = FunctionProfiler(profiler_utils=[Timer], report_format="process")
+
+
+@function_profiler
+def work(value):
+    return os.getpid()
+
+
+@pytest.fixture
+def collection():
+    function_profiler.initialize()
+    spool_directory = function_profiler.start_process_collection()
+    yield spool_directory
+    function_profiler.stop_process_collection()
+
+
+def start_methods():
+    return [method for method in ("fork", "spawn") if method in multiprocessing.get_all_start_methods() and not (method == "fork" and sys.platform == "darwin")]
+
+
+@pytest.mark.parametrize("start_method", start_methods())
+def test_workers_data_are_collected(collection, start_method):
+    pool = multiprocessing.get_context(start_method).Pool(2)
+    worker_pids = set(pool.map(work, range(20)))
+    # The workers write their data at their exit, the pool must not be terminated
+    pool.close()
+    pool.join()
+    work(0)
+    function_profiler.stop_process_collection()
+    assert not os.path.exists(collection) # The temporary spool directory is removed
+    assert function_profiler.aggregates[0][0] == 21
+    assert len(function_profiler.profiled_data) == 21
+    assert set(function_profiler.process_ids) == {os.getpid()} | worker_pids
+    report = function_profiler.generate_report()
+    assert str(os.getpid()) in report
+    for pid in worker_pids:
+        assert str(pid) in report
+
+
+def test_collect_process_data_during_the_collection(collection):
+    context = multiprocessing.get_context(start_methods()[0])
+    process = context.Process(target=work, args=(0,))
+    process.start()
+    process.join()
+    assert function_profiler.collect_process_data() == 1
+    assert function_profiler.aggregates[0][0] == 1
+    assert function_profiler.collect_process_data() == 0 # The spool files are removed once merged
+
+
+def test_aggregates_only_collection():
+    function_profiler.initialize()
+    function_profiler.start_process_collection(collect_records=False)
+    try:
+        pool = multiprocessing.get_context(start_methods()[0]).Pool(2)
+        pool.map(work, range(10))
+        pool.close()
+        pool.join()
+    finally:
+        function_profiler.stop_process_collection()
+    assert function_profiler.aggregates[0][0] == 10
+    assert len(function_profiler.profiled_data) == 0
+
+
+def test_collection_can_not_be_started_twice(collection):
+    with pytest.raises(ValueError):
+        function_profiler.start_process_collection()
+    with pytest.raises(TypeError):
+        FunctionProfiler(profiler_utils=[Timer]).start_process_collection(collect_records=1)
@@ -0,0 +1,191 @@
+import os
+import threading
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Timer, Memory, ProfileReader, ProfileWriter, ProfileWriterQueue, RecordStore
+
+
+def make_profiler():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer])
+
+    @function_profiler
+    def load():
+        pass
+
+    @function_profiler
+    def save():
+        pass
+
+    return function_profiler, load, save
+
+
+def test_write_profile_round_trip(tmp_path):
+    function_profiler, load, save = make_profiler()
+    for _ in range(5):
+        load()
+        save()
+    function_profiler.connect_profiler_utils(Memory) # The previous records have a missing memory value
+    load()
+    file_path = tmp_path / "profile.pdprof"
+    function_profiler.write_profile(file_path)
+    expected = [(record[1], record[2]) for record in function_profiler.profiled_data]
+    with ProfileReader(file_path) as reader:
+        assert reader.signature_names == ["load", "save"]
+        assert reader.data_names == ["runtime", "memory usage"]
+        records = list(reader.iter_records())
+        assert [(function_index, values) for _, function_index, values in records] == expected
+        timestamps = [timestamp for timestamp, _, _ in records]
+        assert timestamps == sorted(timestamps)
+        assert reader.get_record(len(records) - 1)[2] == expected[-1][1]
+
+
+def test_open_profile_file_spills_the_records(tmp_path):
+    function_profiler, load, _ = make_profiler()
+    file_path = tmp_path / "profile.pdprof"
+    function_profiler.open_profile_file(file_path, flush_records=10)
+    for _ in range(25):
+        load()
+    assert len(function_profiler.profiled_data) == 5
+    # The file is readable while it is open, the stores handed over are written by a background thread
+    with ProfileReader(file_path) as reader:
+        assert len(list(reader.iter_records())) in (0, 10, 20)
+    function_profiler.flush_profile_file()
+    assert len(function_profiler.profiled_data) == 0
+    with ProfileReader(file_path) as reader:
+        assert len(list(reader.iter_records())) == 25
+    with pytest.raises(ValueError):
+        function_profiler.connect_profiler_utils(Memory)
+    function_profiler.close_profile_file()
+    with ProfileReader(file_path) as reader:
+        assert len(list(reader.iter_records())) == 25
+    assert function_profiler.aggregates[0][0] == 25
+
+
+def test_profile_file_as_numpy(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    function_profiler, load, _ = make_profiler()
+    for _ in range(10):
+        load()
+    file_path = tmp_path / "profile.pdprof"
+    function_profiler.write_profile(file_path)
+    with ProfileReader(file_path) as reader:
+        records = reader.to_numpy()
+        assert len(records) == 10
+        assert int(records["runtime"].sum()) == function_profiler.aggregates[0][1][0].total
+        del records
+
+
+class CheckedFile(object):
+    """
+    File checking that the profile file is readable after each write of the writer.
+    """
+    def __init__(self, file, file_path, expected):
+        self.file = file
+        self.file_path = file_path
+        self.expected = expected
+        self.checks = 0
+
+    def write(self, data):
+        written = self.file.write(data)
+        self.file.flush()
+        with ProfileReader(self.file_path) as reader:
+            records = [record[1:] for record in reader.iter_records()]
+            assert records == self.expected[:len(records)]
+            assert len(reader.signature_names) <= 50
+        self.checks += 1
+        return written
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def test_profile_writer_is_readable_after_each_write(tmp_path):
+    file_path = tmp_path / "profile.pdprof"
+    expected = []
+    with ProfileWriter(file_path, ["value"], ["q"]) as writer:
+        writer._file = CheckedFile(writer._file, file_path, expected)
+        for index in range(50):
+            # Small chunks and a growing footer: the footer is moved before the records overwrite it
+            writer.set_signature_names([f"function_{function_index}" for function_index in range(index + 1)])
+            values = list(range(index, index + 1 + index % 3))
+            expected.extend((index, {0: value}) for value in values)
+            writer.write([index] * len(values), [index] * len(values), [values])
+        assert writer._file.checks > 100
+    with ProfileReader(file_path) as reader:
+        assert [record[1:] for record in reader.iter_records()] == expected
+        assert len(reader.signature_names) == 50
+    # The gap between the records and the footer is removed at the closing
+    footer_size = 3 + len("value") + 4 + sum(4 + len(f"function_{index}") for index in range(50))
+    assert os.path.getsize(file_path) == 64 + len(expected) * writer.record_size + footer_size
+
+
+def test_profile_file_is_written_by_a_background_thread(tmp_path, monkeypatch):
+    threads = set()
+    write = ProfileWriter.write
+
+    def record_thread(self, *args):
+        threads.add(threading.current_thread().name)
+        write(self, *args)
+
+    monkeypatch.setattr(ProfileWriter, "write", record_thread)
+    function_profiler, load, _ = make_profiler()
+    function_profiler.open_profile_file(tmp_path / "profile.pdprof", flush_records=5)
+    assert isinstance(function_profiler._profile_queue, ProfileWriterQueue)
+    for _ in range(50):
+        load()
+    function_profiler.close_profile_file()
+    assert threads == {"pydecorium-profile-file"}
+    assert function_profiler.profile_file is None
+
+
+def test_flush_profile_file_loses_no_record(tmp_path):
+    function_profiler, load, save = make_profiler()
+    file_path = tmp_path / "profile.pdprof"
+    function_profiler.open_profile_file(file_path, flush_records=100)
+    stop = threading.Event()
+    calls = [0] * 4
+
+    def run(index):
+        while not stop.is_set():
+            load()
+            calls[index] += 1
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(20):
+        function_profiler.flush_profile_file()
+        save()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    function_profiler.close_profile_file()
+    with ProfileReader(file_path) as reader:
+        function_indices = [function_index for _, function_index, _ in reader.iter_records()]
+    assert len(function_profiler.profiled_data) == 0
+    assert function_indices.count(0) == sum(calls) == function_profiler.aggregates[0][0]
+    assert function_indices.count(1) == 20
+
+
+def test_profile_writer_queue(tmp_path):
+    file_path = tmp_path / "profile.pdprof"
+    names = ["load"]
+    profile_queue = ProfileWriterQueue(ProfileWriter(file_path, ["runtime"], ["q"]), lambda: names, max_pending=1)
+    for index in range(10):
+        record_store = RecordStore(["q"])
+        record_store.append(index, 0, [index])
+        profile_queue.put(record_store)
+    assert profile_queue.flush()
+    assert profile_queue.written == 10
+    assert profile_queue.errors == 0
+    names = ["load", "save"]
+    profile_queue.close()
+    assert profile_queue.closed and profile_queue.writer.closed
+    with pytest.raises(ValueError):
+        profile_queue.put(RecordStore(["q"]))
+    with ProfileReader(file_path) as reader:
+        assert reader.signature_names == ["load", "save"]
+        assert [timestamp for timestamp, _, _ in reader.iter_records()] == list(range(10))
+    with pytest.raises(ValueError):
+        ProfileWriterQueue(ProfileWriter(tmp_path / "other.pdprof", [], []), lambda: [], max_pending=0)
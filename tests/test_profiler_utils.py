@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, ProfilerUtils, Timer, EveryNSampling
+
+
+class CallDepth(ProfilerUtils):
+    """
+    Profiler utils measuring the depth of the call in the stack of its thread: the token protocol must keep the state of each call apart.
+    """
+    data_name = "depth"
+    data_typecode = "q"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.local = threading.local()
+        self.aborted = 0
+
+    def pre_execute(self, func, *args, **kwargs):
+        depth = getattr(self.local, "depth", 0)
+        self.local.depth = depth + 1
+        return depth
+
+    def post_execute(self, token, func, *args, **kwargs):
+        self.local.depth = token
+        return token
+
+    def abort_execute(self, token, func, *args, **kwargs):
+        self.local.depth = token
+        self.aborted += 1
+
+    def handle_result(self, token):
+        return token
+
+    def string_value(self, result):
+        return str(result)
+
+
+def test_recursion_keeps_the_tokens_of_the_nested_calls():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer, CallDepth])
+
+    @function_profiler
+    def recurse(n):
+        if n > 0:
+            time.sleep(0.001)
+            recurse(n - 1)
+
+    recurse(4)
+    records = list(function_profiler.profiled_data)
+    assert len(records) == 5
+    # The innermost call finishes first
+    assert [record[2][1] for record in records] == [4, 3, 2, 1, 0]
+    runtimes = [record[2][0] for record in records]
+    assert runtimes == sorted(runtimes)
+    assert runtimes[-1] >= 4 * 1_000_000
+
+
+def test_threads_measure_their_own_calls():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer, CallDepth])
+
+    @function_profiler
+    def work(duration):
+        time.sleep(duration)
+
+    def run(duration):
+        for _ in range(20):
+            work(duration)
+
+    threads = [threading.Thread(target=run, args=(0.001 * (index + 1),)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    calls, aggregates = function_profiler.aggregates[0]
+    assert calls == 80
+    runtime_aggregate, depth_aggregate = aggregates
+    assert runtime_aggregate.count == 80
+    assert runtime_aggregate.minimum >= 1_000_000
+    assert depth_aggregate.maximum == 0
+
+
+def test_exception_calls_abort_execute_and_is_not_recorded():
+    depth = CallDepth()
+    function_profiler = FunctionProfiler(profiler_utils=[depth])
+
+    @function_profiler
+    def fail():
+        raise RuntimeError("fail")
+
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            fail()
+    assert depth.aborted == 3
+    assert depth.local.depth == 0
+    assert len(function_profiler.profiled_data) == 0
+
+
+def test_sampled_utils_skip_the_unmeasured_calls():
+    depth = CallDepth(sampling=EveryNSampling(2))
+    function_profiler = FunctionProfiler(profiler_utils=[Timer, depth])
+
+    @function_profiler
+    def function():
+        pass
+
+    for _ in range(4):
+        function()
+    assert [1 in record[2] for record in function_profiler.profiled_data] == [True, False, True, False]
+
+
+def test_signature_names_are_consistent_under_concurrent_readers():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer])
+    for index in range(300):
+        def function():
+            pass
+        function.__name__ = function.__qualname__ = f"function_{index}"
+        function_profiler(function)
+    barrier = threading.Barrier(4)
+
+    def read():
+        barrier.wait()
+        for _ in range(20):
+            function_profiler._get_signature_names()
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert function_profiler.profiled_functions_signature_name == [f"function_{index}" for index in range(300)]
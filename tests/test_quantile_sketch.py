@@ -0,0 +1,108 @@
+import json
+import random
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, QuantileSketch, Timer
+
+
+def exact_quantile(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+@pytest.mark.parametrize("q", [0, 0.5, 0.9, 0.99, 1])
+def test_quantiles_are_within_the_relative_accuracy(q):
+    values = [random.lognormvariate(10, 2) for _ in range(10000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    assert sketch.quantile(q) == pytest.approx(exact_quantile(values, q), rel=0.01)
+
+
+def test_negative_and_zero_values():
+    values = [-100, -10, 0, 0, 10, 100]
+    sketch = QuantileSketch()
+    for value in values:
+        sketch.add(value)
+    assert sketch.quantile(0) == -100
+    assert sketch.quantile(0.5) == 0
+    assert sketch.quantile(1) == 100
+    assert sketch.quantile(0.2) == pytest.approx(-10, rel=0.01)
+
+
+def test_merged_sketches_equal_the_sketch_of_all_the_values():
+    values = [random.expovariate(1e-6) for _ in range(5000)]
+    merged, other, expected = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for index, value in enumerate(values):
+        (merged if index % 2 else other).add(value)
+        expected.add(value)
+    merged.merge(other)
+    assert merged.count == expected.count
+    for q in (0.1, 0.5, 0.99):
+        assert merged.quantile(q) == expected.quantile(q)
+    with pytest.raises(ValueError):
+        merged.merge(QuantileSketch(relative_accuracy=0.05))
+
+
+def test_buckets_are_bounded():
+    sketch = QuantileSketch(max_buckets=64)
+    for exponent in range(-30, 30):
+        for mantissa in range(1, 10):
+            sketch.add(mantissa * 10.0 ** exponent)
+    assert len(sketch._positive) <= 64
+    # Only the smallest magnitudes lose their accuracy
+    assert sketch.quantile(1) == sketch.maximum
+    assert sketch.quantile(0.99) == pytest.approx(exact_quantile([m * 10.0 ** e for e in range(-30, 30) for m in range(1, 10)], 0.99), rel=0.01)
+
+
+def test_dictionary_round_trip():
+    sketch = QuantileSketch()
+    for value in range(-50, 1000):
+        sketch.add(value)
+    copy = QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert copy.count == sketch.count
+    for q in (0, 0.25, 0.5, 0.75, 1):
+        assert copy.quantile(q) == sketch.quantile(q)
+
+
+@pytest.mark.parametrize("kwargs", [{"relative_accuracy": 0}, {"relative_accuracy": 1}, {"max_buckets": 0}])
+def test_invalid_parameters(kwargs):
+    with pytest.raises(ValueError):
+        QuantileSketch(**kwargs)
+
+
+def test_invalid_quantile():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None
+    with pytest.raises(ValueError):
+        sketch.quantile(1.5)
+
+
+def test_percentiles_report():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], report_format="percentiles")
+
+    @function_profiler
+    def function():
+        pass
+
+    for _ in range(100):
+        function()
+    report = function_profiler.generate_report()
+    assert report.startswith("[function] - 100 calls - runtime : p50 ")
+    assert all(f" p{name} " in report for name in ("50", "90", "99", "999"))
+    runtime = function_profiler.aggregates[0][1][0]
+    assert runtime.minimum <= runtime.quantile(0.5) <= runtime.maximum
+
+
+def test_percentiles_report_requires_the_quantiles():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], report_format="percentiles", track_quantiles=False)
+
+    @function_profiler
+    def function():
+        pass
+
+    function()
+    assert function_profiler.aggregates[0][1][0].sketch is None
+    with pytest.raises(ValueError, match="track_quantiles"):
+        function_profiler.generate_report()
@@ -0,0 +1,82 @@
+import math
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, RecordStore, Timer, Memory
+
+
+def test_records_are_stored_in_typed_columns():
+    record_store = RecordStore(["q", "d", None])
+    record_store.append(10, 0, [1, 0.5, "a"])
+    record_store.append(20, 1, [None, None, None])
+    assert len(record_store) == 2
+    assert record_store.timestamps.typecode == "q"
+    assert record_store.function_indices.typecode == "i"
+    assert [column.typecode if hasattr(column, "typecode") else None for column in record_store.columns] == ["q", "d", None]
+    assert record_store.get_record(0) == (10, 0, {0: 1, 1: 0.5, 2: "a"})
+    # The missing values are stored with a sentinel and not returned
+    assert record_store.get_record(1) == (20, 1, {})
+    assert math.isnan(record_store.columns[1][1])
+    assert record_store.columns[0][1] == RecordStore.missing_value("q")
+
+
+def test_added_column_has_missing_values():
+    record_store = RecordStore(["q"])
+    record_store.append(10, 0, [1])
+    record_store.add_column("q")
+    record_store.append(20, 0, [2, 3])
+    assert list(record_store.iter_records()) == [(10, 0, {0: 1}), (20, 0, {0: 2, 1: 3})]
+
+
+def test_ring_buffer_keeps_the_most_recent_records():
+    record_store = RecordStore(["q"], capacity=3)
+    for index in range(7):
+        record_store.append(index, 0, [index * 10])
+    assert len(record_store) == 3
+    assert record_store.evicted == 4
+    assert list(record_store.timestamps) == [4, 5, 6]
+    assert list(record_store.iter_rows()) == [(4, 0, 40), (5, 0, 50), (6, 0, 60)]
+    assert record_store.tail(2).get_record(0) == (5, 0, {0: 50})
+
+
+def test_max_age_expires_the_old_records():
+    record_store = RecordStore(["q"], max_age=1)
+    record_store.append(0, 0, [1])
+    record_store.append(500_000_000, 0, [2])
+    record_store.append(1_200_000_000, 0, [3])
+    assert list(record_store.timestamps) == [500_000_000, 1_200_000_000]
+    record_store.expire(now=2_000_000_000)
+    assert list(record_store.timestamps) == [1_200_000_000]
+
+
+@pytest.mark.parametrize("kwargs, error", [
+    ({"capacity": 0}, ValueError),
+    ({"capacity": 1.5}, TypeError),
+    ({"max_age": -1}, ValueError),
+    ({"max_age": "1"}, TypeError),
+])
+def test_invalid_retention(kwargs, error):
+    with pytest.raises(error):
+        RecordStore(["q"], **kwargs)
+
+
+def test_profiled_data_keeps_the_historical_structure():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer])
+
+    @function_profiler
+    def function():
+        pass
+
+    function()
+    function_profiler.connect_profiler_utils(Memory) # The previous record has a missing memory value
+    function()
+    profiled_data = function_profiler.profiled_data
+    assert len(profiled_data) == 2
+    (first_datetime, first_index, first_values), (datetime, function_index, values) = profiled_data
+    assert first_index == function_index == 0
+    assert set(first_values) == {0}
+    assert set(values) == {0, 1}
+    assert isinstance(values[0], int) and isinstance(values[1], int)
+    assert first_datetime <= datetime
+    assert profiled_data[-1] == [datetime, function_index, values]
+    assert profiled_data == function_profiler.extract_profiled_data()
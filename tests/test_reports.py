@@ -0,0 +1,113 @@
+import gzip
+import io
+import threading
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Timer, Memory
+
+
+def make_profiler(**kwargs):
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], **kwargs)
+
+    @function_profiler
+    def first():
+        pass
+
+    @function_profiler
+    def second():
+        pass
+
+    first()
+    second()
+    first()
+    function_profiler.connect_profiler_utils(Memory) # The previous records have a missing memory value
+    second()
+    return function_profiler, first
+
+
+def expected_lines(function_profiler):
+    timer, memory = function_profiler.connected_profiler_utils
+    lines = []
+    for datetime, function_index, values in function_profiler.profiled_data:
+        results = [utils.string_result(values[index]) for index, utils in enumerate((timer, memory)) if index in values]
+        lines.append((str(datetime), function_profiler.profiled_functions_signature_name[function_index], " - ".join(results)))
+    return lines
+
+
+def test_datetime_report():
+    function_profiler, _ = make_profiler()
+    report = function_profiler.generate_report()
+    assert report == "".join(f"[{datetime}] - [{name}] - {results}\n" for datetime, name, results in expected_lines(function_profiler))
+    assert report.count("memory usage") == 1
+
+
+def test_function_report():
+    function_profiler, _ = make_profiler(report_format="function")
+    lines = expected_lines(function_profiler)
+    expected = ""
+    for name in ("first", "second"):
+        expected += f"[{name}]\n" + "".join(f"\t[{datetime}] - {results}\n" for datetime, line_name, results in lines if line_name == name)
+    assert function_profiler.generate_report() == expected
+
+
+def test_cumulative_and_statistics_reports():
+    function_profiler, _ = make_profiler(report_format="cumulative")
+    timer = function_profiler.connected_profiler_utils[0]
+    cumulative_data = function_profiler.cumulative_data
+    report = function_profiler.generate_report().splitlines()
+    assert report[0] == f"[first] - 2 calls - {timer.string_result(cumulative_data[0][1][0])}"
+    assert report[1].startswith(f"[second] - 2 calls - {timer.string_result(cumulative_data[1][1][0])} - memory usage : ")
+    assert report[1].endswith("(estimated from 1 calls)")
+    function_profiler.report_format = "statistics"
+    runtime = function_profiler.aggregates[0][1][0]
+    assert function_profiler.generate_report().splitlines()[0] == f"[first] - 2 calls - runtime : mean {timer.string_value(runtime.mean)} - std {timer.string_value(runtime.std)} - min {timer.string_value(runtime.minimum)} - max {timer.string_value(runtime.maximum)}"
+
+
+def test_report_of_several_threads_is_sorted_by_datetime():
+    function_profiler, first = make_profiler()
+    thread = threading.Thread(target=first)
+    thread.start()
+    thread.join()
+    datetimes = [line.split("] - [")[0] for line in function_profiler.generate_report().splitlines()]
+    assert len(datetimes) == 5
+    assert datetimes == sorted(datetimes)
+
+
+def test_invalid_report_format():
+    function_profiler, _ = make_profiler()
+    with pytest.raises(ValueError):
+        function_profiler.report_format = "other"
+    with pytest.raises(TypeError):
+        function_profiler.report_format = 1
+
+
+@pytest.mark.parametrize("report_format", ["datetime", "function", "cumulative", "statistics", "percentiles"])
+def test_iter_report_chunks_are_the_report(report_format):
+    function_profiler, first = make_profiler(report_format=report_format)
+    function_profiler.report_chunk_size = 2
+    for _ in range(5):
+        first()
+    chunks = list(function_profiler.iter_report())
+    assert "".join(chunks) == function_profiler.generate_report()
+    if report_format == "datetime":
+        assert len(chunks) == 5
+
+
+def test_write_report_targets(tmp_path):
+    function_profiler, _ = make_profiler()
+    report = function_profiler.generate_report()
+    function_profiler.write_report(tmp_path / "report.txt")
+    assert (tmp_path / "report.txt").read_text() == report
+    function_profiler.write_report(str(tmp_path / "report.txt.gz"))
+    with gzip.open(tmp_path / "report.txt.gz", "rt") as file:
+        assert file.read() == report
+    text = io.StringIO()
+    function_profiler.write_report(text)
+    assert text.getvalue() == report
+    binary = io.BytesIO()
+    function_profiler.write_report(binary)
+    assert not binary.closed
+    assert binary.getvalue().decode("utf-8") == report
+    with pytest.raises(TypeError):
+        function_profiler.write_report(1)
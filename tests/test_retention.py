@@ -0,0 +1,154 @@
+import threading
+import time
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Timer
+
+
+def make_profiler(**kwargs):
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], **kwargs)
+
+    @function_profiler
+    def first():
+        pass
+
+    @function_profiler
+    def second():
+        pass
+
+    return function_profiler, first, second
+
+
+def test_max_records_keeps_the_most_recent_records():
+    function_profiler, first, second = make_profiler(max_records=5)
+    for _ in range(10):
+        first()
+    second()
+    records = list(function_profiler.profiled_data)
+    assert len(records) == 5
+    assert records[-1][1] == 1
+    # The aggregates are not affected by the eviction
+    assert function_profiler.aggregates[0][0] == 10
+
+
+def test_max_records_per_function():
+    function_profiler, first, second = make_profiler(max_records_per_function=3)
+    for _ in range(10):
+        first()
+        second()
+    function_indices = [record[1] for record in function_profiler.profiled_data]
+    assert function_indices.count(0) == 3
+    assert function_indices.count(1) == 3
+
+
+def test_max_age_evicts_the_old_records():
+    function_profiler, first, _ = make_profiler(max_age=0.05)
+    first()
+    time.sleep(0.1)
+    first()
+    assert len(function_profiler.profiled_data) == 1
+
+
+def test_set_retention_moves_the_stored_records():
+    function_profiler, first, _ = make_profiler()
+    for _ in range(10):
+        first()
+    function_profiler.set_retention(max_records=4)
+    assert len(function_profiler.profiled_data) == 4
+    assert function_profiler.max_records == 4
+
+
+@pytest.mark.parametrize("kwargs, error, message", [
+    ({"max_records": 0}, ValueError, "max_records"),
+    ({"max_records": "10"}, TypeError, "max_records"),
+    ({"max_records_per_function": -1}, ValueError, "max_records_per_function"),
+    ({"max_age": 0}, ValueError, "max_age"),
+    ({"max_age": "1"}, TypeError, "max_age"),
+    ({"max_records": 1, "max_records_per_function": 1}, ValueError, "together"),
+])
+def test_invalid_retention_is_rejected_without_changing_the_policy(kwargs, error, message):
+    function_profiler, first, _ = make_profiler(max_records=3)
+    with pytest.raises(error, match=message):
+        function_profiler.set_retention(**kwargs)
+    assert function_profiler.max_records == 3
+    assert function_profiler.max_records_per_function is None
+    assert function_profiler.max_age is None
+    function_profiler.initialize()
+    for _ in range(5):
+        first()
+    assert len(function_profiler.profiled_data) == 3
+
+
+def run_threads(function, threads, calls, concurrent=False):
+    def run():
+        for _ in range(calls):
+            function()
+
+    started = []
+    for _ in range(threads):
+        thread = threading.Thread(target=run)
+        thread.start()
+        if concurrent:
+            started.append(thread)
+        else:
+            thread.join()
+    for thread in started:
+        thread.join()
+
+
+def test_max_records_applies_to_all_the_threads_together():
+    function_profiler, first, _ = make_profiler(max_records=5)
+    run_threads(first, 50, 3)
+    assert len(function_profiler.profiled_data) == 5
+    assert len(function_profiler._shards) <= 2
+    assert function_profiler.aggregates[0][0] == 150
+
+
+def test_max_records_with_live_threads():
+    function_profiler, first, second = make_profiler(max_records=20)
+    done, release = threading.Barrier(9), threading.Event()
+
+    def run():
+        for _ in range(50):
+            first()
+        done.wait()
+        release.wait()
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    done.wait()
+    records = list(function_profiler.profiled_data)
+    assert len(records) == 20
+    assert function_profiler.aggregates[0][0] == 400
+    release.set()
+    for thread in threads:
+        thread.join()
+    run_threads(second, 1, 1) # The finished threads are folded when a new thread profiles its first call
+    assert len(function_profiler._shards) <= 3
+    assert list(function_profiler.profiled_data)[:19] == records[1:]
+
+
+def test_max_records_per_function_applies_to_all_the_threads_together():
+    function_profiler, first, second = make_profiler(max_records_per_function=4)
+
+    def both():
+        first()
+        second()
+
+    run_threads(both, 30, 2)
+    function_indices = [record[1] for record in function_profiler.profiled_data]
+    assert function_indices.count(0) == 4
+    assert function_indices.count(1) == 4
+    assert len(function_profiler._shards) <= 2
+
+
+def test_finished_threads_are_folded_without_losing_data():
+    function_profiler, first, _ = make_profiler()
+    run_threads(first, 20, 5)
+    assert len(function_profiler._shards) <= 2
+    assert len(function_profiler.profiled_data) == 100
+    assert function_profiler.aggregates[0][0] == 100
+    timestamps = [record[0] for record in function_profiler.profiled_data]
+    assert timestamps == sorted(timestamps)
@@ -0,0 +1,125 @@
+import gc
+import threading
+import weakref
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Timer, Sampling, EveryNSampling, ProbabilisticSampling, AdaptiveSampling
+
+
+def test_every_n_sampling_counts_each_function():
+    sampling = EveryNSampling(3)
+    assert [sampling.sample(0) for _ in range(6)] == [True, False, False, True, False, False]
+    assert sampling.sample(1)
+    assert sampling.rate(0) == 1 / 3
+
+
+def test_every_n_sampling_does_not_lose_calls_across_threads():
+    sampling = EveryNSampling(4)
+    results = []
+
+    def run():
+        results.extend(sampling.sample(0) for _ in range(10000))
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(results) == 10000
+
+
+def test_probabilistic_sampling_is_reproducible():
+    first, second = ProbabilisticSampling(0.2, seed=1), ProbabilisticSampling(0.2, seed=1)
+    samples = [first.sample(0) for _ in range(10000)]
+    assert samples == [second.sample(0) for _ in range(10000)]
+    assert 1500 < sum(samples) < 2500
+
+
+def test_adaptive_sampling_lowers_the_rate_of_the_short_functions():
+    sampling = AdaptiveSampling(max_overhead=0.01, min_rate=0.001)
+    assert sampling.rate(0) == 1.0
+    assert sampling.sample(0)
+    sampling.update(0, runtime=100, overhead=1000) # Overhead larger than the runtime
+    assert sampling.rate(0) == 0.001
+    assert 9 <= sum(sampling.sample(0) for _ in range(10000)) <= 11
+    sampling.update(1, runtime=10 ** 9, overhead=1000)
+    assert sampling.rate(1) == 1.0
+
+
+def test_adaptive_sampling_is_thread_safe():
+    sampling = AdaptiveSampling(max_overhead=0.01, min_rate=0.25)
+    sampling.update(0, runtime=100, overhead=10 ** 6)
+    assert sampling.rate(0) == 0.25
+    sampling.sample(0) # Consumes the credit of the first call
+    results = []
+
+    def run():
+        results.extend(sampling.sample(0) for _ in range(10000))
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(results) == 10000
+
+
+@pytest.mark.parametrize("kwargs", [{"max_overhead": 0}, {"min_rate": 2}, {"smoothing": 0}, {"max_overhead": "1"}])
+def test_invalid_adaptive_sampling(kwargs):
+    with pytest.raises((TypeError, ValueError)):
+        AdaptiveSampling(**kwargs)
+
+
+@pytest.mark.parametrize("sampling", [EveryNSampling(2), AdaptiveSampling()])
+def test_policies_do_not_keep_the_functions_alive(sampling):
+    timer = Timer(sampling=sampling)
+
+    def function():
+        pass
+
+    reference = weakref.ref(function)
+    timer.handle_result(timer.post_execute(timer.pre_execute(function), function))
+    assert len(sampling._counters if isinstance(sampling, EveryNSampling) else sampling._states) == 1
+    del function
+    gc.collect()
+    assert reference() is None
+    assert len(sampling._counters if isinstance(sampling, EveryNSampling) else sampling._states) == 0
+
+
+def test_profiler_utils_counts_the_unsampled_calls():
+    timer = Timer(sampling=EveryNSampling(4))
+    function_profiler = FunctionProfiler(profiler_utils=[timer])
+
+    @function_profiler
+    def function():
+        pass
+
+    for _ in range(10):
+        function()
+    assert timer.unsampled_calls == 7
+    assert [0 in record[2] for record in function_profiler.profiled_data].count(True) == 3
+    timer.sampling = None
+    assert timer.unsampled_calls == 0
+
+
+def test_function_profiler_sampling_rates():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer], sampling=EveryNSampling(4), report_format="cumulative")
+
+    @function_profiler
+    def function():
+        pass
+
+    for _ in range(8):
+        function()
+    assert function_profiler.unsampled_calls == {0: 6}
+    assert function_profiler.sampling_rates == {0: 0.25}
+    assert "sampling rate : 25.00%" in function_profiler.generate_report()
+    assert "(estimated from 2 calls)" in function_profiler.generate_report()
+
+
+def test_sampling_is_an_abstract_policy():
+    with pytest.raises(NotImplementedError):
+        Sampling().sample(0)
+    with pytest.raises(TypeError):
+        Timer(sampling=0.5)
@@ -0,0 +1,136 @@
+import csv
+import json
+import socket
+import sqlite3
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Timer, CPUTimer, Memory, Sink, SinkQueue, FileSink, JSONLinesSink, CSVSink, SQLiteSink, StatsDSink
+
+
+class ListSink(Sink):
+    """
+    Sink keeping the records in a list.
+    """
+    def __init__(self):
+        self.records = []
+
+    def write(self, records):
+        self.records.extend(records)
+
+
+class FailingSink(Sink):
+    def write(self, records):
+        raise OSError("disk full")
+
+
+def make_profiler():
+    function_profiler = FunctionProfiler(profiler_utils=[Timer, Memory])
+
+    @function_profiler
+    def load():
+        pass
+
+    return function_profiler, load
+
+
+def test_file_sinks(tmp_path):
+    function_profiler, load = make_profiler()
+    function_profiler.connect_sinks([FileSink(tmp_path / "records.log"), JSONLinesSink(tmp_path / "records.jsonl"), CSVSink(tmp_path / "records.csv"), SQLiteSink(tmp_path / "records.db")])
+    for _ in range(5):
+        load()
+    statistics = function_profiler.disconnect_sinks()
+    assert statistics == {"pending": 0, "written": 5, "dropped": 0, "errors": 0}
+    lines = (tmp_path / "records.log").read_text().splitlines()
+    assert len(lines) == 5 and all(" - [load] - runtime : " in line for line in lines)
+    records = [json.loads(line) for line in (tmp_path / "records.jsonl").read_text().splitlines()]
+    assert [record["function"] for record in records] == ["load"] * 5
+    assert set(records[0]) == {"timestamp", "function", "runtime", "memory usage"}
+    with open(tmp_path / "records.csv", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["timestamp", "function", "runtime", "memory usage"]
+    assert len(rows) == 6
+    with sqlite3.connect(tmp_path / "records.db") as connection:
+        assert connection.execute("SELECT COUNT(*), MIN(function) FROM records").fetchone() == (5, "load")
+
+
+def test_statsd_sink():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(5)
+    try:
+        function_profiler, load = make_profiler()
+        function_profiler.connect_sinks(StatsDSink("127.0.0.1", server.getsockname()[1], prefix="test"))
+        load()
+        function_profiler.disconnect_sinks()
+        lines = server.recv(65536).decode("utf-8").splitlines()
+    finally:
+        server.close()
+    assert any(line.startswith("test.load.runtime:") and line.endswith("|h") for line in lines)
+
+
+def test_sink_errors_are_counted():
+    function_profiler, load = make_profiler()
+    sink = ListSink()
+    function_profiler.connect_sinks([FailingSink(), sink])
+    load()
+    assert function_profiler.flush_sinks(timeout=5)
+    assert function_profiler.sink_statistics["errors"] == 1
+    assert len(sink.records) == 1
+    assert isinstance(function_profiler._sink_queue.last_error, OSError)
+    function_profiler.disconnect_sinks()
+
+
+def test_full_queue_drops_the_records():
+    sink = ListSink()
+    sink_queue = SinkQueue([sink], [], str, max_size=10, batch_size=1000, flush_interval=60)
+    try:
+        for index in range(15):
+            sink_queue.put((index, 0, []))
+        assert sink_queue.dropped == 5
+    finally:
+        sink_queue.close()
+    assert sink_queue.written == 10
+
+
+def test_records_put_after_the_closing_are_dropped():
+    sink = ListSink()
+    sink_queue = SinkQueue([sink], [], str, overflow="block")
+    sink_queue.put((0, 0, []))
+    sink_queue.close()
+    sink_queue.put((1, 0, []))
+    assert sink_queue.pending == 0
+    assert sink_queue.dropped == 1
+    assert sink_queue.written == 1
+
+
+def test_signature_names_follow_the_format():
+    function_profiler, load = make_profiler()
+    sink = ListSink()
+    function_profiler.connect_sinks(sink)
+    load()
+    assert function_profiler.flush_sinks(timeout=5)
+    function_profiler.signature_name_format = "{module}.{name}"
+    load()
+    assert function_profiler.flush_sinks(timeout=5)
+    function_profiler.initialize()
+    function_profiler.signature_name_format = "{qualname}"
+    load()
+    function_profiler.disconnect_sinks()
+    assert [signature_name for _, signature_name, _ in sink.records] == ["load", f"{__name__}.load", "make_profiler.<locals>.load"]
+
+
+def test_connect_sinks_errors():
+    function_profiler, _ = make_profiler()
+    with pytest.raises(TypeError):
+        function_profiler.connect_sinks(["records.jsonl"])
+    function_profiler.connect_sinks(ListSink())
+    try:
+        with pytest.raises(ValueError):
+            function_profiler.connect_sinks(ListSink())
+        with pytest.raises(ValueError):
+            function_profiler.connect_profiler_utils(CPUTimer)
+    finally:
+        function_profiler.disconnect_sinks()
+    with pytest.raises(ValueError):
+        SinkQueue([ListSink()], [], str, overflow="wait")
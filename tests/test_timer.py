@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, Timer, Memory, EveryNSampling, ProbabilisticSampling
+
+
+@pytest.mark.parametrize("clock", Timer.correct_clocks)
+def test_clocks_measure_nanoseconds(clock):
+    timer = Timer(clock=clock)
+    read_clock = getattr(time, clock)
+    token = timer.pre_execute(None)
+    end = read_clock() + 2_000_000
+    while read_clock() < end: # Busy wait on the measured clock, so the CPU clocks also advance when the thread is preempted
+        pass
+    runtime = timer.handle_result(timer.post_execute(token, None))
+    assert isinstance(runtime, int)
+    assert 1_000_000 <= runtime < 1_000_000_000
+
+
+@pytest.mark.parametrize("kwargs, error", [
+    ({"clock": "time"}, ValueError),
+    ({"clock": 1}, TypeError),
+    ({"subtract_overhead": 1}, TypeError),
+])
+def test_invalid_timer(kwargs, error):
+    with pytest.raises(error):
+        Timer(**kwargs)
+
+
+def test_calibrate_and_subtract_overhead():
+    timer = Timer(subtract_overhead=True)
+    overhead = timer.calibrate(1000)
+    assert overhead == timer.overhead >= 0
+    timer.overhead = 10 ** 12
+    assert timer.handle_result(timer.post_execute(timer.pre_execute(None), None)) == 0
+    with pytest.raises(ValueError):
+        timer.calibrate(0)
+    with pytest.raises(TypeError):
+        timer.calibrate(1.0)
+
+
+@pytest.mark.parametrize("sampling", [EveryNSampling(2), ProbabilisticSampling(0.001)])
+def test_calibrate_measures_every_call_of_a_sampled_timer(sampling):
+    timer = Timer(sampling=sampling)
+    assert isinstance(timer.calibrate(10), int)
+    assert timer.pre_execute == timer._sampled_pre_execute
+
+
+def test_function_profiler_calibrate():
+    timer = Timer(subtract_overhead=True)
+    function_profiler = FunctionProfiler(profiler_utils=[timer, Memory])
+    overheads = function_profiler.calibrate(100)
+    assert list(overheads) == [0]
+    assert overheads[0] == timer.overhead > 0
+    assert timer.subtract_overhead
+    assert len(function_profiler.profiled_data) == 0
+    # A sampled timer measuring no call keeps its overhead
+    timer.sampling = ProbabilisticSampling(1e-12)
+    assert function_profiler.calibrate(10) == overheads
+
+
+def test_format_of_the_runtimes():
+    timer = Timer()
+    assert timer.string_value(3_723_500_000_000) == "1h 2m 3.5000s"
+    assert timer.string_results([1_500_000, 61_000_000_000]) == ["runtime : 0h 0m 0.0015s", "runtime : 0h 1m 1.0000s"]
+    with pytest.raises(TypeError):
+        timer.string_value("1")
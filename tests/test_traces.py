@@ -0,0 +1,124 @@
+import gzip
+import io
+import json
+import os
+import threading
+
+import pytest
+
+from pydecorium.decorators import FunctionProfiler, ProfilerUtils, Timer
+
+
+class Work(ProfilerUtils):
+    """
+    Profiler utils measuring the units of work done by a call: the results don't depend on the clock.
+    """
+    data_name = "work"
+    data_typecode = "q"
+    done = 0
+
+    def pre_execute(self, func, *args, **kwargs):
+        return Work.done
+
+    def post_execute(self, token, func, *args, **kwargs):
+        return Work.done - token
+
+    def handle_result(self, token):
+        return token
+
+    def string_value(self, result):
+        return str(result)
+
+
+def make_profiler(**kwargs):
+    function_profiler = FunctionProfiler(profiler_utils=[Timer, Work], **kwargs)
+
+    @function_profiler
+    def load():
+        Work.done += 3
+
+    @function_profiler
+    def save():
+        Work.done += 5
+
+    @function_profiler
+    def process():
+        Work.done += 1
+        load()
+        save()
+
+    return function_profiler, process
+
+
+def test_collapsed_stacks_of_the_call_tree():
+    function_profiler, process = make_profiler(track_call_tree=True)
+    process()
+    process()
+    lines = "".join(function_profiler.iter_collapsed_stacks("work")).splitlines()
+    assert sorted(lines) == ["process 2", "process;load 6", "process;save 10"]
+    # The default weight is the runtime of the timer
+    runtimes = dict(line.rsplit(" ", 1) for line in "".join(function_profiler.iter_collapsed_stacks()).splitlines())
+    assert set(runtimes) == {"process", "process;load", "process;save"}
+
+
+def test_collapsed_stacks_without_the_call_tree():
+    function_profiler, process = make_profiler()
+    process()
+    assert sorted("".join(function_profiler.iter_collapsed_stacks("work")).splitlines()) == ["load 3", "process 9", "save 5"]
+    with pytest.raises(ValueError):
+        list(function_profiler.iter_collapsed_stacks("memory usage"))
+    with pytest.raises(ValueError):
+        list(FunctionProfiler(profiler_utils=[Work]).iter_collapsed_stacks())
+
+
+def test_write_collapsed_stacks(tmp_path):
+    function_profiler, process = make_profiler(track_call_tree=True)
+    process()
+    file_path = tmp_path / "work.folded"
+    function_profiler.write_collapsed_stacks(file_path, data_name="work")
+    assert file_path.read_text() == "".join(function_profiler.iter_collapsed_stacks("work"))
+
+
+def test_chrome_trace_events():
+    function_profiler, process = make_profiler()
+    process()
+    thread = threading.Thread(target=process, name="worker")
+    thread.start()
+    thread.join()
+    trace = json.loads("".join(function_profiler.iter_chrome_trace()))
+    metadata = [event for event in trace["traceEvents"] if event["ph"] == "M"]
+    events = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert sorted(event["args"]["name"] for event in metadata) == ["MainThread", "worker"]
+    assert len({event["tid"] for event in metadata}) == 2
+    assert len(events) == 6
+    assert {event["pid"] for event in events} == {os.getpid()}
+    for event in events:
+        assert event["dur"] == pytest.approx(event["args"]["runtime"] / 1000, abs=1e-3)
+    # The events of the children are nested in the event of their parent
+    parent = next(event for event in events if event["name"] == "process" and event["tid"] == metadata[0]["tid"])
+    children = [event for event in events if event["name"] != "process" and event["tid"] == parent["tid"]]
+    for child in children:
+        assert parent["ts"] <= child["ts"] and child["ts"] + child["dur"] <= parent["ts"] + parent["dur"] + 1e-3
+    assert sorted(event["args"]["work"] for event in children) == [3, 5]
+
+
+def test_chrome_trace_duration_data():
+    function_profiler, process = make_profiler()
+    process()
+    events = [event for event in json.loads("".join(function_profiler.iter_chrome_trace("work")))["traceEvents"] if event["ph"] == "X"]
+    assert sorted(event["dur"] for event in events) == [0.003, 0.005, 0.009]
+    with pytest.raises(ValueError):
+        list(function_profiler.iter_chrome_trace("memory usage"))
+    with pytest.raises(ValueError):
+        list(FunctionProfiler(profiler_utils=[Timer], aggregate_only=True).iter_chrome_trace())
+
+
+def test_write_chrome_trace(tmp_path):
+    function_profiler, process = make_profiler()
+    process()
+    function_profiler.write_chrome_trace(tmp_path / "trace.json.gz")
+    with gzip.open(tmp_path / "trace.json.gz", "rt") as file:
+        assert json.load(file) == json.loads("".join(function_profiler.iter_chrome_trace()))
+    buffer = io.StringIO()
+    function_profiler.write_chrome_trace(buffer)
+    assert len(json.loads(buffer.getvalue())["traceEvents"]) == 4